@@ -0,0 +1,32 @@
+"""
+Django settings for goober_api project.
+
+``DJANGO_SETTINGS_PROFILE`` (read from the process environment, not from
+``.env``) selects the settings:
+
+- ``development`` (the default): debug, ``.env`` loading, django-extensions
+  and the browsable API. See development.py.
+- ``production``: only what serving the API needs, so worker processes boot
+  fast. See production.py.
+
+Both build on base.py. ``DJANGO_SETTINGS_MODULE`` stays ``goober_api.settings``
+either way.
+"""
+
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+PROFILES = ("development", "production")
+
+PROFILE = os.getenv("DJANGO_SETTINGS_PROFILE", "development")
+
+if PROFILE == "production":
+    from .production import *  # noqa: F401,F403
+elif PROFILE == "development":
+    from .development import *  # noqa: F401,F403
+else:
+    raise ImproperlyConfigured(
+        f"Unknown DJANGO_SETTINGS_PROFILE {PROFILE!r}; expected one of "
+        f"{', '.join(PROFILES)}."
+    )
@@ -0,0 +1,202 @@
+"""
+Django settings for goober_api project: what every profile shares.
+
+Generated by 'django-admin startproject' using Django 5.1. The development
+and production profiles build on this module (see goober_api.settings).
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.1/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/5.1/ref/settings/
+"""
+
+import os
+import dj_database_url
+from pathlib import Path
+
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+
+# See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = os.getenv("DJANGO_SECRET_KEY", "")
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = False
+
+ALLOWED_HOSTS = [
+    host.strip()
+    for host in os.getenv("DJANGO_ALLOWED_HOSTS", "").split(",")
+    if host.strip()
+]
+
+
+# Application definition
+
+# The admin and the apps only it needs. Profiles may leave them out with
+# ADMIN_ENABLED = False, which also drops the admin/ URLs.
+ADMIN_ENABLED = True
+ADMIN_APPS = [
+    "django.contrib.admin",
+    "django.contrib.messages",
+    "django.contrib.staticfiles",
+]
+
+INSTALLED_APPS = [
+    "django.contrib.admin",
+    "django.contrib.auth",
+    "django.contrib.contenttypes",
+    "django.contrib.sessions",
+    "django.contrib.messages",
+    "django.contrib.staticfiles",
+    "django_filters",
+    "rest_framework",
+    "workouts",
+]
+
+MIDDLEWARE = [
+    "workouts.middleware.InstrumentationMiddleware",
+    "django.middleware.security.SecurityMiddleware",
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "django.middleware.common.CommonMiddleware",
+    "django.middleware.csrf.CsrfViewMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "django.contrib.messages.middleware.MessageMiddleware",
+    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+]
+
+ROOT_URLCONF = "goober_api.urls"
+
+TEMPLATES = [
+    {
+        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "DIRS": [],
+        "APP_DIRS": True,
+        "OPTIONS": {
+            "context_processors": [
+                "django.template.context_processors.debug",
+                "django.template.context_processors.request",
+                "django.contrib.auth.context_processors.auth",
+                "django.contrib.messages.context_processors.messages",
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = "goober_api.wsgi.application"
+
+
+# Database
+# https://docs.djangoproject.com/en/5.1/ref/settings/#databases
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+DATABASES = {
+    "default": dj_database_url.parse(
+        url=DATABASE_URL, conn_max_age=600, conn_health_checks=True
+    )
+}
+
+# Read replicas
+# Comma-separated URLs of read replicas of DATABASE_URL. Each becomes a
+# "replica_<n>" database; safe requests of the workouts API then read from a
+# healthy replica while writes stay on the primary (see workouts.routers).
+
+DATABASE_REPLICA_URLS = [
+    url.strip()
+    for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",")
+    if url.strip()
+]
+DATABASE_REPLICAS = []
+for index, url in enumerate(DATABASE_REPLICA_URLS, 1):
+    alias = f"replica_{index}"
+    DATABASES[alias] = dj_database_url.parse(
+        url=url, conn_max_age=600, conn_health_checks=True
+    )
+    # Test runs point the replicas at the primary's test database; test cases
+    # that read through the API then need them in ``databases``.
+    DATABASES[alias]["TEST"] = {"MIRROR": "default"}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["workouts.routers.ReplicaRouter"] if DATABASE_REPLICAS else []
+
+# Seconds a client that wrote keeps reading from the primary; keep it above
+# the replicas' usual lag.
+DATABASE_REPLICA_STICKY_SECONDS = float(os.getenv("DATABASE_REPLICA_STICKY_SECONDS", 5))
+# Seconds between health checks of each replica.
+DATABASE_REPLICA_HEALTH_INTERVAL = float(
+    os.getenv("DATABASE_REPLICA_HEALTH_INTERVAL", 10)
+)
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Local memory by default; point CACHE_BACKEND/CACHE_LOCATION at a shared
+# backend (e.g. django.core.cache.backends.redis.RedisCache) in production so
+# cached workout representations are shared between workers.
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    }
+}
+
+WORKOUT_CACHE_ALIAS = "default"
+WORKOUT_CACHE_TIMEOUT = int(os.getenv("WORKOUT_CACHE_TIMEOUT", 60 * 60 * 24))
+
+
+# Performance instrumentation
+# Server-Timing headers, slow request logging and per-endpoint histograms
+# (see workouts.instrumentation). Opt-in; the development profile turns it on.
+
+PERFORMANCE_INSTRUMENTATION = os.getenv("PERFORMANCE_INSTRUMENTATION", "0") == "1"
+PERFORMANCE_SLOW_REQUEST_MS = int(os.getenv("PERFORMANCE_SLOW_REQUEST_MS", 500))
+# How often each process adds its requests to the shared histograms.
+PERFORMANCE_FLUSH_SECONDS = float(os.getenv("PERFORMANCE_FLUSH_SECONDS", 10))
+
+
+# Password validation
+# https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
+    },
+    {
+        "NAME": "django.contrib.auth.password_validation.MinimumLengthValidator",
+    },
+    {
+        "NAME": "django.contrib.auth.password_validation.CommonPasswordValidator",
+    },
+    {
+        "NAME": "django.contrib.auth.password_validation.NumericPasswordValidator",
+    },
+]
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/5.1/topics/i18n/
+
+LANGUAGE_CODE = "en-us"
+
+TIME_ZONE = "UTC"
+
+USE_I18N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/5.1/howto/static-files/
+
+STATIC_URL = "static/"
+
+# Default primary key field type
+# https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
+
+DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
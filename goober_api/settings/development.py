@@ -0,0 +1,27 @@
+"""
+Development settings: the base settings with debugging on, ``.env`` loaded,
+the shell tooling of django-extensions installed and performance
+instrumentation on.
+"""
+
+import os
+
+import dotenv
+
+dotenv.load_dotenv(os.path.join(os.path.dirname(__file__), "../../.env"))
+
+from .base import *  # noqa: E402,F401,F403
+from .base import INSTALLED_APPS  # noqa: E402
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = os.getenv(
+    "DJANGO_SECRET_KEY",
+    "django-insecure-s(*o-jlm0@38orw1(tk^mu3g@o-l#(klugrit%i4=m0v#uw##0",
+)
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = True
+
+INSTALLED_APPS = [*INSTALLED_APPS, "django_extensions"]
+
+PERFORMANCE_INSTRUMENTATION = os.getenv("PERFORMANCE_INSTRUMENTATION", "1") == "1"
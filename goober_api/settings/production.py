@@ -0,0 +1,55 @@
+"""
+Production settings: only what serving the API needs.
+
+Configuration comes from the environment alone (no ``.env``). On top of the
+base settings this profile
+
+- requires ``DJANGO_SECRET_KEY`` and takes the hosts it serves from
+  ``DJANGO_ALLOWED_HOSTS``,
+- leaves out the admin and the apps and middleware only it uses, unless
+  ``DJANGO_ADMIN_ENABLED=1``,
+- renders JSON only (plus the workout file formats), so the browsable API
+  and its templates and forms are never loaded.
+
+Fewer apps and renderers mean fewer imports when a worker boots;
+``python -m workouts.benchmarks.startup`` measures it.
+"""
+
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .base import *  # noqa: F401,F403
+from .base import ADMIN_APPS, INSTALLED_APPS, MIDDLEWARE, SECRET_KEY, TEMPLATES
+
+DEBUG = False
+
+if not SECRET_KEY:
+    raise ImproperlyConfigured("Set DJANGO_SECRET_KEY for the production profile.")
+
+ADMIN_ENABLED = os.getenv("DJANGO_ADMIN_ENABLED", "0") == "1"
+
+if not ADMIN_ENABLED:
+    INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in ADMIN_APPS]
+    MIDDLEWARE = [
+        middleware
+        for middleware in MIDDLEWARE
+        if middleware != "django.contrib.messages.middleware.MessageMiddleware"
+    ]
+    TEMPLATES = [
+        {
+            **TEMPLATES[0],
+            "OPTIONS": {
+                "context_processors": [
+                    processor
+                    for processor in TEMPLATES[0]["OPTIONS"]["context_processors"]
+                    if processor
+                    != "django.contrib.messages.context_processors.messages"
+                ],
+            },
+        }
+    ]
+
+REST_FRAMEWORK = {
+    "DEFAULT_RENDERER_CLASSES": ["rest_framework.renderers.JSONRenderer"],
+}
@@ -1,9 +1,218 @@
+"""
+Admins for workouts, intervals and durations, built for large tables.
+
+- Changelists join the rows they display (``list_select_related``), so a
+  page costs the same number of queries however many rows it shows.
+- Unfiltered changelists of tables over ``ESTIMATED_COUNT_THRESHOLD`` rows are
+  paginated with the database's row estimate instead of a ``COUNT(*)`` (see
+  ``estimated_count``), and no changelist counts the whole table twice.
+- Relations to big tables are edited with raw id or autocomplete widgets, never
+  with a ``<select>`` listing every row.
+- A workout's steps are an inline in ``position`` order, loaded with their
+  intervals and durations in one query.
+"""
+
+from decimal import Decimal, InvalidOperation
+from typing import Optional
+
 from django.contrib import admin
+from django.contrib.admin.widgets import ForeignKeyRawIdWidget
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.utils.functional import cached_property
+
+from .models import BaseDuration, Interval, Workout, WorkoutStep
+from .signals import intervals_changed
+
+# Below this many rows an exact COUNT(*) is cheap, and exact.
+ESTIMATED_COUNT_THRESHOLD = 100_000
+
+
+def estimated_count(model, using) -> Optional[int]:
+    """
+    The row count of ``model``'s table according to the database's statistics,
+    or None where there are none (SQLite, or a table never analyzed).
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    queries = {
+        "postgresql": (
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)",
+            [connection.ops.quote_name(table)],
+        ),
+        "mysql": (
+            "SELECT table_rows FROM information_schema.tables "
+            "WHERE table_schema = DATABASE() AND table_name = %s",
+            [table],
+        ),
+    }
+    if connection.vendor not in queries:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(*queries[connection.vendor])
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    # PostgreSQL reports -1 before the first ANALYZE.
+    return int(row[0]) if row and row[0] is not None and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Counts an unfiltered queryset from the table's row estimate once that is
+    over ``ESTIMATED_COUNT_THRESHOLD``; filtered querysets are counted exactly.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    # "N results (M total)" would count the whole table again.
+    show_full_result_count = False
+
+
+def unit_label(duration) -> str:
+    if duration.unit_choices is None:
+        return str(duration.unit)
+    return duration.unit_choices(duration.unit).label
+
+
+def describe(interval) -> str:
+    duration = interval.duration
+    return f"{interval.get_type_display()}: {duration.value} {unit_label(duration)}"
+
 
-from .models import Workout
+class StepIntervalWidget(ForeignKeyRawIdWidget):
+    """
+    A raw id input without the label next to it, which would cost a query per
+    step; the step inline shows the interval itself.
+    """
+
+    def label_and_url_for_value(self, value):
+        return "", ""
+
+
+class WorkoutStepInline(admin.TabularInline):
+    model = WorkoutStep
+    fields = ("position", "interval", "step", "rest_interval")
+    readonly_fields = ("step", "rest_interval")
+    raw_id_fields = ("interval",)
+    ordering = ("position",)
+    extra = 0
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            "interval__duration", "interval__rest_interval__duration"
+        )
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == "interval":
+            kwargs["widget"] = StepIntervalWidget(
+                db_field.remote_field, self.admin_site
+            )
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    @admin.display(description="Interval")
+    def step(self, step):
+        interval = step.interval
+        if interval.repititions:
+            return f"{describe(interval)} x {interval.repititions}"
+        return describe(interval)
+
+    @admin.display(description="Rest")
+    def rest_interval(self, step):
+        rest_interval = step.interval.rest_interval
+        return describe(rest_interval) if rest_interval else "-"
 
 
 # Admin classes
 @admin.register(Workout)
-class WorkoutAdmin(admin.ModelAdmin):
-    list_display = ("title", "author", "created_at")
+class WorkoutAdmin(LargeTableAdmin):
+    list_display = (
+        "title",
+        "author",
+        "workout_type",
+        "total_time",
+        "total_distance",
+        "total_work",
+        "created_at",
+    )
+    list_select_related = ("author",)
+    list_filter = ("workout_type",)
+    search_fields = ("^title",)
+    raw_id_fields = ("author",)
+    readonly_fields = ("total_time", "total_distance", "total_work")
+    inlines = [WorkoutStepInline]
+
+    def save_formset(self, request, form, formset, change):
+        super().save_formset(request, form, formset, change)
+        if formset.deleted_objects:
+            # Deleted steps send no signal workouts.signals listens to.
+            intervals_changed([form.instance.pk])
+
+
+@admin.register(Interval)
+class IntervalAdmin(LargeTableAdmin):
+    list_display = (
+        "id",
+        "type",
+        "duration",
+        "perceived_effort",
+        "repititions",
+        "rest_interval",
+    )
+    list_select_related = ("duration", "rest_interval__duration")
+    list_filter = ("type",)
+    autocomplete_fields = ("duration",)
+    raw_id_fields = ("rest_interval",)
+
+
+@admin.register(BaseDuration)
+class DurationAdmin(LargeTableAdmin):
+    """
+    Durations are interned and shared by every interval of the same value, so
+    they can be added and viewed but not edited or deleted here; give an
+    interval another duration instead.
+    """
+
+    list_display = ("id", "type", "value", "unit_label", "canonical_value")
+    list_filter = ("type",)
+    # The order of the (type, value, unit) unique index.
+    ordering = ("type", "value", "unit")
+    # For the autocomplete of IntervalAdmin; see get_search_results.
+    search_fields = ("value",)
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description="Unit", ordering="unit")
+    def unit_label(self, duration):
+        return unit_label(duration)
+
+    def get_search_results(self, request, queryset, search_term):
+        # Search by exact value ("10", "2.5"); anything else matches nothing
+        # rather than failing to convert to a decimal.
+        if not search_term.strip():
+            return queryset, False
+        try:
+            value = Decimal(search_term.strip())
+        except InvalidOperation:
+            return queryset.none(), False
+        field = BaseDuration._meta.get_field("value")
+        if not value.is_finite() or abs(value) >= 10 ** (
+            field.max_digits - field.decimal_places
+        ):
+            return queryset.none(), False
+        return queryset.filter(value=value), False
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class WorkoutsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'workouts'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from workouts import signals
+        from workouts.instrumentation import install_execute_wrapper
+
+        signals.connect()
+        connection_created.connect(install_execute_wrapper)
@@ -0,0 +1,31 @@
+"""
+Micro-benchmarks for the workouts app.
+
+Benchmarks that need the database run against a throwaway test database built
+from the configured ``DATABASES`` (in memory for SQLite), so they never touch
+real data::
+
+    DATABASE_URL=sqlite:///bench.sqlite3 python -m workouts.benchmarks.serialization
+"""
+
+import contextlib
+import os
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "goober_api.settings")
+    import django
+
+    django.setup()
+
+
+@contextlib.contextmanager
+def test_database(verbosity=0):
+    from django.db import connection
+
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
@@ -0,0 +1,203 @@
+"""
+API benchmark suite.
+
+Seeds the database at increasing scales and, at each scale, measures a fixed
+set of calls through the real URLconf with Django's test client:
+
+``list``
+    ``GET /api/workouts/``, the whole collection, cold cache.
+``list_page``
+    ``GET /api/workouts/?page_size=100``, cold cache.
+``retrieve``
+    ``GET /api/workouts/{id}/``, cold cache.
+``create``
+    ``POST /api/workouts/`` of a nested 40-step workout.
+``serialize_500``
+    ``WorkoutSerializer`` output of a single 500-interval workout.
+
+For every call the median wall time over ``repeat`` runs, the SQL query count
+and the peak Python memory (``tracemalloc``, measured on a separate run so it
+does not skew timings) are recorded. ``run_suite`` returns a JSON-serializable
+report and ``compare`` diffs two of them. Both are driven by the
+``benchmark`` and ``benchmark_compare`` management commands::
+
+    DATABASE_URL=sqlite:///bench.sqlite3 python manage.py benchmark -o after.json
+    python manage.py benchmark_compare before.json after.json --threshold 0.1
+"""
+
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from io import StringIO
+
+SCALES = (100, 1_000, 10_000)
+INTERVALS_PER_WORKOUT = 8
+CREATE_STEPS = 40
+SERIALIZE_STEPS = 500
+
+# Metrics recorded per call, all of which ``compare`` checks.
+METRICS = ("wall_ms", "queries", "peak_kib")
+
+
+def measure(func, repeat):
+    from django.core.cache import cache
+    from django.db import connection
+
+    timings = []
+    for _ in range(repeat):
+        cache.clear()
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1e3)
+
+    # Counted with an execute wrapper rather than ``connection.queries``,
+    # which the test client's request_started signal resets.
+    queries = 0
+
+    def count(execute, *args):
+        nonlocal queries
+        queries += 1
+        return execute(*args)
+
+    cache.clear()
+    with connection.execute_wrapper(count):
+        func()
+
+    cache.clear()
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "wall_ms": round(statistics.median(timings), 3),
+        "queries": queries,
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def create_payload(author_id, steps):
+    from workouts.benchmarks.serialization import workout_spec
+
+    spec = workout_spec(None, steps)
+    return json.dumps(
+        {**spec, "author": author_id, "description": "Benchmark"}, default=str
+    )
+
+
+def run_suite(
+    scales=SCALES,
+    repeat=5,
+    intervals_per_workout=INTERVALS_PER_WORKOUT,
+    seed=0,
+    stdout=None,
+):
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test import Client
+
+    from workouts.benchmarks.serialization import workout_spec
+    from workouts.models import Workout
+    from workouts.models.utils import bulk_build_workouts
+    from workouts.serializers import WorkoutSerializer
+
+    client = Client(HTTP_ACCEPT="application/json")
+    author = User.objects.create(username="benchmark")
+    payload = create_payload(author.pk, CREATE_STEPS)
+
+    def check(response, status=200):
+        if response.status_code != status:
+            raise RuntimeError(f"{response.status_code}: {response.content[:200]!r}")
+
+    calls = {
+        "list": lambda: check(client.get("/api/workouts/")),
+        "list_page": lambda: check(client.get("/api/workouts/?page_size=100")),
+        "retrieve": lambda: check(client.get(f"/api/workouts/{sample.pk}/")),
+        "create": lambda: check(
+            client.post(
+                "/api/workouts/", payload, content_type="application/json"
+            ),
+            status=201,
+        ),
+    }
+
+    def serialize_large():
+        return WorkoutSerializer(Workout.objects.with_intervals().get(pk=large.pk)).data
+
+    results = []
+    for index, scale in enumerate(sorted(scales)):
+        missing = scale - Workout.objects.count()
+        if missing > 0:
+            call_command(
+                "seed",
+                workouts=missing,
+                intervals_per_workout=intervals_per_workout,
+                users=20,
+                seed=seed * 1000 + index,
+                stdout=StringIO(),
+            )
+        sample = Workout.objects.order_by("pk").first()
+        measured = [(name, measure(call, repeat)) for name, call in calls.items()]
+
+        # The large workout only exists while it is measured so it does not
+        # weigh on the list calls.
+        [large] = bulk_build_workouts([workout_spec(author, SERIALIZE_STEPS)])
+        measured.append(("serialize_500", measure(serialize_large, repeat)))
+        large.delete()
+
+        for name, metrics in measured:
+            results.append({"scale": scale, "name": name, **metrics})
+            if stdout is not None:
+                stdout.write(
+                    f"{scale:>8} {name:<14} {metrics['wall_ms']:>10.1f}ms "
+                    f"{metrics['queries']:>6} queries {metrics['peak_kib']:>10.1f}KiB"
+                )
+
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "database": connection.vendor,
+            "repeat": repeat,
+            "intervals_per_workout": intervals_per_workout,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold=0.1):
+    """
+    Return the regressions of ``current`` against ``baseline``.
+
+    A metric regresses when it grew by more than ``threshold`` (relative);
+    query counts regress on any increase. Calls missing from either report
+    are ignored.
+    """
+    before = {(r["scale"], r["name"]): r for r in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        previous = before.get((result["scale"], result["name"]))
+        if previous is None:
+            continue
+        for metric in METRICS:
+            old, new = previous[metric], result[metric]
+            limit = old if metric == "queries" else old * (1 + threshold)
+            if new > limit:
+                regressions.append(
+                    {
+                        "scale": result["scale"],
+                        "name": result["name"],
+                        "metric": metric,
+                        "baseline": old,
+                        "current": new,
+                        "change": (new - old) / old if old else None,
+                    }
+                )
+    return regressions
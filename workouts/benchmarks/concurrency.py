@@ -0,0 +1,96 @@
+"""
+Benchmark the sync and async workout read paths under concurrency.
+
+    DATABASE_URL=sqlite:///bench.sqlite3 python -m workouts.benchmarks.concurrency
+
+Both paths are driven through Django's ASGI handler by in-process
+``AsyncClient``s, as they would be under an ASGI server: the sync DRF viewset
+(``/api/workouts/``), which takes a thread-pool hop per request, and the async
+views (``/api/async/workouts/``). At each concurrency level every client
+issues ``REQUESTS_PER_CLIENT`` requests back to back; requests/sec and the
+median and p99 latencies are reported. The workout cache is swapped for a
+dummy cache so both paths hit the database.
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+from io import StringIO
+
+from workouts.benchmarks import setup_django, test_database
+
+CONCURRENCY = (10, 100, 1_000)
+REQUESTS_PER_CLIENT = 5
+WORKOUTS = 200
+
+PATHS = {
+    "sync": "/api/workouts/{pk}/",
+    "async": "/api/async/workouts/{pk}/",
+}
+
+
+async def run_level(template, pks, concurrency, requests_per_client):
+    from django.test import AsyncClient
+
+    latencies = []
+
+    async def client_loop(index):
+        client = AsyncClient()
+        for request in range(requests_per_client):
+            pk = pks[(index * requests_per_client + request) % len(pks)]
+            started = time.perf_counter()
+            response = await client.get(template.format(pk=pk))
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                raise RuntimeError(f"{template}: {response.status_code}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client_loop(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests_per_sec": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1e3,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        * 1e3,
+    }
+
+
+def run(
+    concurrency=CONCURRENCY,
+    requests_per_client=REQUESTS_PER_CLIENT,
+    workouts=WORKOUTS,
+    out=sys.stdout,
+):
+    from django.core.management import call_command
+    from django.test.utils import override_settings
+
+    from workouts.models import Workout
+
+    call_command("seed", workouts=workouts, stdout=StringIO())
+    pks = list(Workout.objects.values_list("pk", flat=True))
+
+    dummy_cache = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+    out.write(f"{'clients':>8} {'path':>6} {'req/s':>10} {'p50':>10} {'p99':>10}\n")
+    with override_settings(CACHES=dummy_cache, PERFORMANCE_SLOW_REQUEST_MS=10**9):
+        for clients in concurrency:
+            for name, template in PATHS.items():
+                result = asyncio.run(
+                    run_level(template, pks, clients, requests_per_client)
+                )
+                out.write(
+                    f"{clients:>8} {name:>6} {result['requests_per_sec']:10.0f} "
+                    f"{result['p50_ms']:8.1f}ms {result['p99_ms']:8.1f}ms\n"
+                )
+
+
+if __name__ == "__main__":
+    setup_django()
+    from django.test.utils import setup_test_environment
+
+    # Lets the test client's "testserver" host through ALLOWED_HOSTS.
+    setup_test_environment()
+    with test_database():
+        run()
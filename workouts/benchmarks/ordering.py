@@ -0,0 +1,82 @@
+"""
+Benchmark interval ordering against the recursive walk it replaced.
+
+    python -m workouts.benchmarks.ordering
+
+Runs without a database: intervals are plain objects with ``pk``/``parent``.
+"""
+
+import random
+import sys
+import timeit
+from types import SimpleNamespace
+
+from workouts.ordering import order_intervals, order_intervals_by_workout
+
+SIZES = (10, 1_000, 50_000)
+WORKOUTS = 100
+
+
+def build_chain(size, start=0, seed=0):
+    """A shuffled ``size`` step chain, the worst case input order."""
+    intervals = [
+        SimpleNamespace(pk=start + i, parent=start + i - 1 if i else None)
+        for i in range(size)
+    ]
+    random.Random(seed).shuffle(intervals)
+    return intervals
+
+
+def recursive_order(intervals):
+    """The original ``Workout.sorted_intervals`` implementation."""
+    object_map = {interval.pk: interval for interval in intervals}
+    visited = set()
+    sorted_intervals = []
+
+    def _add_to_sorted_pks(interval):
+        if interval.pk in visited:
+            return
+        parent_pk = interval.parent
+        if parent_pk is not None and parent_pk in object_map:
+            _add_to_sorted_pks(object_map[parent_pk])
+        sorted_intervals.append(interval)
+        visited.add(interval.pk)
+
+    for i in intervals:
+        _add_to_sorted_pks(i)
+    return sorted_intervals
+
+
+def best_of(func, repeat=5):
+    number = 1
+    while timeit.timeit(func, number=number) < 0.2 and number < 10_000:
+        number *= 10
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def run(sizes=SIZES, out=sys.stdout):
+    out.write(f"{'intervals':>10} {'iterative':>12} {'recursive':>12} {'batch/workout':>14}\n")
+    for size in sizes:
+        chain = build_chain(size)
+        iterative = best_of(lambda: order_intervals(chain))
+        try:
+            recursive = f"{best_of(lambda: recursive_order(chain)) * 1e3:10.3f}ms"
+        except RecursionError:
+            recursive = "RecursionError"
+
+        # Many workouts ordered from one flat result set, as a prefetch gives.
+        workouts = max(1, min(WORKOUTS, 500_000 // size))
+        rows = [
+            (w, interval)
+            for w in range(workouts)
+            for interval in build_chain(size, start=w * size, seed=w)
+        ]
+        batch = best_of(lambda: order_intervals_by_workout(rows), repeat=3) / workouts
+
+        out.write(
+            f"{size:>10} {iterative * 1e3:10.3f}ms {recursive:>12} {batch * 1e3:12.3f}ms\n"
+        )
+
+
+if __name__ == "__main__":
+    run()
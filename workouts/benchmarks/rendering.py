@@ -0,0 +1,119 @@
+"""
+Benchmark rendering large, repeat-heavy workouts to device files.
+
+    DATABASE_URL=sqlite:///bench.sqlite3 python -m workouts.benchmarks.rendering
+
+Every other step of the workouts is an 8x repeat with a rest interval, so the
+``.erg`` course (which writes repeats out in full) holds many more segments
+than the workout has steps. For each size and format the median time of a
+cold download (``GET /api/workouts/{id}/?format=...`` with an empty cache:
+load, render and cache) and of a cached download is reported, with the query
+count of each and the size of the file.
+"""
+
+import statistics
+import sys
+import time
+
+from workouts.benchmarks import setup_django, test_database
+
+SIZES = (100, 1_000, 10_000)
+REPETITIONS = 8
+FORMATS = ("zwo", "erg")
+
+
+def workout_spec(author, size):
+    """``size`` timed steps, every other one a repeat with a rest interval."""
+    from workouts.models import BaseDuration, Interval, TimeDuration
+
+    def timed_step(seconds, interval_type, effort):
+        return {
+            "interval_type": interval_type,
+            "duration_type": BaseDuration.DurationType.TIME,
+            "duration_value": seconds,
+            "duration_unit": TimeDuration.TimeUnitChoices.SECONDS,
+            "perceived_effort": effort,
+        }
+
+    steps = []
+    for i in range(size):
+        step = timed_step(30 + i % 10 * 30, Interval.IntervalType.ACTIVE, i % 10 + 1)
+        if i % 2 == 0:
+            step["repititions"] = REPETITIONS
+            step["rest_interval"] = timed_step(60, Interval.IntervalType.REST, 2)
+        steps.append(step)
+    return {"author": author, "title": f"{size} steps", "intervals": steps}
+
+
+def timings(func, repeat):
+    results = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = func()
+        results.append(time.perf_counter() - started)
+    return statistics.median(results), response
+
+
+def count_queries(func):
+    # Not ``connection.queries``, which the test client's request_started
+    # signal resets.
+    from django.db import connection
+
+    queries = 0
+
+    def count(execute, *args):
+        nonlocal queries
+        queries += 1
+        return execute(*args)
+
+    with connection.execute_wrapper(count):
+        func()
+    return queries
+
+
+def run(sizes=SIZES, repeat=5, out=sys.stdout):
+    from django.contrib.auth.models import User
+    from django.test import Client
+
+    from workouts.cache import rendered_cache
+    from workouts.models.utils import bulk_build_workouts
+
+    client = Client()
+    author = User.objects.create(username="benchmark")
+    out.write(
+        f"{'steps':>7} {'format':>6} {'cold':>11} {'queries':>8} "
+        f"{'cached':>10} {'queries':>8} {'bytes':>10}\n"
+    )
+    for size in sizes:
+        [workout] = bulk_build_workouts([workout_spec(author, size)])
+        for format in FORMATS:
+            url = f"/api/workouts/{workout.pk}/?format={format}"
+
+            def cold():
+                rendered_cache.invalidate([workout.pk])
+                return client.get(url)
+
+            def cached():
+                return client.get(url)
+
+            row = []
+            for func in (cold, cached):
+                best, response = timings(func, repeat)
+                if response.status_code != 200:
+                    raise RuntimeError(f"{url}: {response.status_code}")
+                row.append((best, count_queries(func)))
+            (cold_s, cold_queries), (cached_s, cached_queries) = row
+            out.write(
+                f"{size:>7} {format:>6} {cold_s * 1e3:9.1f}ms {cold_queries:>8} "
+                f"{cached_s * 1e3:8.2f}ms {cached_queries:>8} "
+                f"{len(response.content):>10}\n"
+            )
+
+
+if __name__ == "__main__":
+    from django.test.utils import setup_test_environment
+
+    setup_django()
+    setup_test_environment()
+    with test_database():
+        run()
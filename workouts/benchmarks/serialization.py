@@ -0,0 +1,94 @@
+"""
+Benchmark loading and serializing a single large workout.
+
+    DATABASE_URL=sqlite:///bench.sqlite3 python -m workouts.benchmarks.serialization
+
+Reports, for ``WorkoutSerializer`` (fetching the workout with its prefetches
+and rendering ``.data``) and for the read-only fast path of
+``workouts.serializers.fast``, the best wall time, the resulting
+intervals/sec and the number of queries issued.
+"""
+
+import sys
+import timeit
+
+from workouts.benchmarks import setup_django, test_database
+
+SIZES = (1_000, 10_000, 100_000)
+
+
+def workout_spec(author, size):
+    """``size`` steps cycling through every duration type, every third a repeat."""
+    from workouts.models import BaseDuration, Interval
+
+    units = {
+        BaseDuration.DurationType.DISTANCE: 2,
+        BaseDuration.DurationType.TIME: 2,
+        BaseDuration.DurationType.CALORIC: 1,
+        BaseDuration.DurationType.HEART_RATE: 1,
+        BaseDuration.DurationType.POWER: 1,
+    }
+    types = list(units)
+    steps = []
+    for i in range(size):
+        duration_type = types[i % len(types)]
+        step = {
+            "interval_type": Interval.IntervalType.ACTIVE,
+            "duration_type": duration_type,
+            "duration_value": i % 100 + 1,
+            "duration_unit": units[duration_type],
+        }
+        if i % 3 == 0:
+            step["repititions"] = 4
+            step["rest_interval"] = {
+                "interval_type": Interval.IntervalType.REST,
+                "duration_type": BaseDuration.DurationType.TIME,
+                "duration_value": 90,
+                "duration_unit": 1,
+            }
+        steps.append(step)
+    return {"author": author, "title": f"{size} steps", "intervals": steps}
+
+
+def run(sizes=SIZES, repeat=3, out=sys.stdout):
+    from django.contrib.auth.models import User
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    from workouts.models import Workout
+    from workouts.models.utils import bulk_build_workouts
+    from workouts.serializers import WorkoutSerializer
+    from workouts.serializers.fast import workout_representations
+
+    author = User.objects.create(username="benchmark")
+    out.write(
+        f"{'intervals':>10} {'path':>10} {'best':>12} {'intervals/s':>14} "
+        f"{'queries':>8} {'speedup':>8}\n"
+    )
+    for size in sizes:
+        [workout] = bulk_build_workouts([workout_spec(author, size)])
+
+        def serialize():
+            instance = Workout.objects.with_intervals().get(pk=workout.pk)
+            return WorkoutSerializer(instance).data
+
+        def fast():
+            [entry] = workout_representations(Workout.objects.filter(pk=workout.pk))
+            return entry.data
+
+        baseline = None
+        for name, func in (("serializer", serialize), ("fast", fast)):
+            with CaptureQueriesContext(connection) as queries:
+                func()
+            best = min(timeit.repeat(func, number=1, repeat=repeat))
+            baseline = baseline or best
+            out.write(
+                f"{size:>10} {name:>10} {best * 1e3:10.1f}ms {size / best:14.0f} "
+                f"{len(queries):>8} {baseline / best:7.1f}x\n"
+            )
+
+
+if __name__ == "__main__":
+    setup_django()
+    with test_database():
+        run()
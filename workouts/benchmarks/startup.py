@@ -0,0 +1,189 @@
+"""
+Benchmark how fast a worker process boots under each settings profile.
+
+    python -m workouts.benchmarks.startup
+
+For each settings profile and entry point (``goober_api.wsgi`` and
+``goober_api.asgi``), ``repeat`` fresh interpreters import the application,
+as a gunicorn or uvicorn worker does when it spawns, and serve it a first
+request: ``GET /api/`` (URL configuration, middleware and a DRF view, no
+database rows). The median import time, the median first request latency and
+the number of modules loaded by then are reported.
+
+``BUDGET`` caps what the production profile may cost. workouts.tests checks
+the module count, which is stable across machines, and the times only with
+``STARTUP_TIMING_TESTS=1``, on hardware they were calibrated for.
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import NamedTuple
+
+PROFILES = ("development", "production")
+ENTRY_POINTS = ("goober_api.wsgi", "goober_api.asgi")
+PATH = "/api/"
+
+PROJECT_DIR = Path(__file__).resolve().parents[2]
+
+# Run in a fresh interpreter: ``python -c CHILD <entry point> <path>``.
+CHILD = r"""
+import json
+import sys
+import time
+
+started = time.perf_counter()
+import importlib
+
+entry_point, path = sys.argv[1:]
+application = importlib.import_module(entry_point).application
+imported = time.perf_counter()
+
+if entry_point.endswith("asgi"):
+    import asyncio
+
+    messages = []
+    requests = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if requests:
+            return requests.pop()
+        # The client never disconnects; Django stops listening once it has
+        # responded.
+        await asyncio.Future()
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"localhost"), (b"accept", b"application/json")],
+        "client": ("127.0.0.1", 0),
+        "server": ("localhost", 80),
+    }
+    asyncio.run(application(scope, receive, send))
+    status = messages[0]["status"]
+else:
+    from wsgiref.util import setup_testing_defaults
+
+    environ = {
+        "PATH_INFO": path,
+        "HTTP_HOST": "localhost",
+        "HTTP_ACCEPT": "application/json",
+    }
+    setup_testing_defaults(environ)
+    statuses = []
+
+    def start_response(status, headers, exc_info=None):
+        statuses.append(status)
+
+    b"".join(application(environ, start_response))
+    status = int(statuses[0].split()[0])
+served = time.perf_counter()
+
+print(json.dumps({
+    "status": status,
+    "import_ms": (imported - started) * 1e3,
+    "first_request_ms": (served - imported) * 1e3,
+    "modules": len(sys.modules),
+}))
+"""
+
+
+class Startup(NamedTuple):
+    import_ms: float
+    first_request_ms: float
+    modules: int
+
+
+# Production workers. The first request imports DRF's views, which pull in
+# django.contrib.admin and admindocs even when they are not installed: 880
+# modules with Django 5.1 and DRF 3.15. The ~5% headroom absorbs what minor
+# releases of those add or drop; a new dependency imported at boot, or an
+# eagerly imported heavy module, costs far more and still fails.
+BUDGET = Startup(import_ms=1500, first_request_ms=500, modules=920)
+
+
+def child_environment(profile):
+    env = dict(os.environ)
+    env.pop("DJANGO_SETTINGS_MODULE", None)
+    env["DJANGO_SETTINGS_PROFILE"] = profile
+    env.setdefault("DJANGO_SECRET_KEY", "startup-benchmark")
+    env["DJANGO_ALLOWED_HOSTS"] = "localhost"
+    # Serving /api/ opens no connection.
+    env.setdefault("DATABASE_URL", "sqlite://:memory:")
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(PROJECT_DIR), env.get("PYTHONPATH")])
+    )
+    return env
+
+
+def measure_once(profile, entry_point, path=PATH) -> Startup:
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD, entry_point, path],
+        env=child_environment(profile),
+        cwd=PROJECT_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{profile} {entry_point} failed:\n{result.stderr}")
+    # Anything else printed comes before the result.
+    data = json.loads(result.stdout.strip().splitlines()[-1])
+    if data["status"] != 200:
+        raise RuntimeError(f"{profile} {entry_point} {path}: {data['status']}")
+    return Startup(data["import_ms"], data["first_request_ms"], data["modules"])
+
+
+def measure(profile, entry_point, repeat=5, path=PATH) -> Startup:
+    """The medians of ``repeat`` processes."""
+    runs = [measure_once(profile, entry_point, path) for _ in range(repeat)]
+    return Startup(
+        statistics.median(run.import_ms for run in runs),
+        statistics.median(run.first_request_ms for run in runs),
+        max(run.modules for run in runs),
+    )
+
+
+def over_budget(startup, budget=BUDGET) -> list[str]:
+    """The measurements of ``startup`` that exceed ``budget``."""
+    return [
+        f"{field} {getattr(startup, field):.0f} > {getattr(budget, field)}"
+        for field in Startup._fields
+        if getattr(startup, field) > getattr(budget, field)
+    ]
+
+
+def run(repeat=5, out=sys.stdout):
+    out.write(
+        f"{'profile':>12} {'entry point':>16} {'import':>10} "
+        f"{'first request':>14} {'modules':>8}\n"
+    )
+    results = {}
+    for profile in PROFILES:
+        for entry_point in ENTRY_POINTS:
+            startup = results[profile, entry_point] = measure(
+                profile, entry_point, repeat
+            )
+            out.write(
+                f"{profile:>12} {entry_point:>16} {startup.import_ms:8.1f}ms "
+                f"{startup.first_request_ms:12.1f}ms {startup.modules:>8}\n"
+            )
+    for entry_point in ENTRY_POINTS:
+        exceeded = over_budget(results["production", entry_point])
+        out.write(f"{entry_point} budget: {'; '.join(exceeded) or 'within'}\n")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,155 @@
+"""
+Cache of serialized workout representations.
+
+Each workout's nested representation is stored under its pk together with the
+``updated_at`` it was rendered from. An entry is only served while
+``updated_at`` still matches, and the signal handlers in ``workouts.signals``
+bump ``updated_at`` and drop entries whenever the workout, one of its steps,
+intervals or their durations changes.
+
+Everything goes through Django's cache framework (``WORKOUT_CACHE_ALIAS``), so
+tests run against locmem while production can share a memcached/redis cache
+between workers.
+"""
+
+import hashlib
+import json
+from typing import Iterable, NamedTuple, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class CachedWorkout(NamedTuple):
+    updated_at: str
+    data: dict
+
+
+class CachedFile(NamedTuple):
+    updated_at: str
+    content: bytes
+
+
+def compute_etag(*parts: str) -> str:
+    digest = hashlib.sha256("\n".join(parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def render(data) -> str:
+    return json.dumps(data, cls=JSONEncoder, separators=(",", ":"))
+
+
+class WorkoutCache:
+    # Versioned: entries stored under an older prefix have another shape.
+    key_prefix = "workouts:repr:v2"
+    stats_prefix = "workouts:repr-stats"
+
+    def __init__(self, alias=None, timeout=None):
+        self.alias = alias
+        self.timeout = timeout
+
+    @property
+    def cache(self):
+        return caches[self.alias or getattr(settings, "WORKOUT_CACHE_ALIAS", "default")]
+
+    def get_timeout(self):
+        if self.timeout is not None:
+            return self.timeout
+        return getattr(settings, "WORKOUT_CACHE_TIMEOUT", 60 * 60 * 24)
+
+    def key(self, pk) -> str:
+        return f"{self.key_prefix}:{pk}"
+
+    def get_many(self, workouts: Iterable) -> dict:
+        """
+        Return ``{pk: CachedWorkout}`` for the ``workouts`` with a current entry.
+
+        ``workouts`` only need ``pk`` and ``updated_at``, so callers can look up
+        the cache from a narrow query before loading any intervals.
+        """
+        workouts = list(workouts)
+        found = self.cache.get_many([self.key(w.pk) for w in workouts])
+        entries = {}
+        for workout in workouts:
+            entry = found.get(self.key(workout.pk))
+            if entry is not None and entry.updated_at == workout.updated_at.isoformat():
+                entries[workout.pk] = entry
+        self.count(hits=len(entries), misses=len(workouts) - len(entries))
+        return entries
+
+    def set_many(self, workouts: Iterable, representations: Iterable) -> dict:
+        """Store freshly serialized ``representations`` of ``workouts``."""
+        entries = {
+            workout.pk: CachedWorkout(workout.updated_at.isoformat(), data)
+            for workout, data in zip(workouts, representations)
+        }
+        self.cache.set_many(
+            {self.key(pk): entry for pk, entry in entries.items()},
+            timeout=self.get_timeout(),
+        )
+        return entries
+
+    def invalidate(self, pks: Iterable) -> None:
+        keys = [self.key(pk) for pk in set(pks)]
+        if keys:
+            self.cache.delete_many(keys)
+
+    def count(self, hits=0, misses=0) -> None:
+        for name, delta in (("hits", hits), ("misses", misses)):
+            if not delta:
+                continue
+            key = f"{self.stats_prefix}:{name}"
+            self.cache.add(key, 0, timeout=None)
+            try:
+                self.cache.incr(key, delta)
+            except ValueError:
+                # Evicted between add() and incr(); start counting again.
+                self.cache.set(key, delta, timeout=None)
+
+    def stats(self) -> dict:
+        keys = {name: f"{self.stats_prefix}:{name}" for name in ("hits", "misses")}
+        found = self.cache.get_many(keys.values())
+        return {name: found.get(key, 0) for name, key in keys.items()}
+
+    def reset_stats(self) -> None:
+        self.cache.delete_many([f"{self.stats_prefix}:{n}" for n in ("hits", "misses")])
+
+
+class RenderedWorkoutCache(WorkoutCache):
+    """
+    Workouts rendered to device files (``.zwo``, ``.erg``), one entry per
+    workout and format. Entries are validated and invalidated exactly like
+    ``WorkoutCache`` entries.
+    """
+
+    key_prefix = "workouts:file"
+    stats_prefix = "workouts:file-stats"
+    formats = ("zwo", "erg")
+
+    def key(self, pk, format="zwo") -> str:
+        return f"{self.key_prefix}:{format}:{pk}"
+
+    def get(self, workout, format) -> Optional[bytes]:
+        entry = self.cache.get(self.key(workout.pk, format))
+        if entry is not None and entry.updated_at == workout.updated_at.isoformat():
+            self.count(hits=1)
+            return entry.content
+        self.count(misses=1)
+        return None
+
+    def set(self, workout, format, content: bytes) -> None:
+        self.cache.set(
+            self.key(workout.pk, format),
+            CachedFile(workout.updated_at.isoformat(), content),
+            timeout=self.get_timeout(),
+        )
+
+    def invalidate(self, pks: Iterable) -> None:
+        keys = [self.key(pk, format) for pk in set(pks) for format in self.formats]
+        if keys:
+            self.cache.delete_many(keys)
+
+
+workout_cache = WorkoutCache()
+rendered_cache = RenderedWorkoutCache()
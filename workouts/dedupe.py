@@ -0,0 +1,149 @@
+"""
+Deduplication of duration rows.
+
+Durations are interned by ``(type, value, unit)`` (see
+``workouts.models.duration.DurationInterner``). Rows written before that
+carry many copies of each key; ``dedupe_durations`` keeps the lowest pk of
+every key, repoints ``Interval.duration`` at it and deletes the copies, a
+batch of keys per transaction.
+
+The model classes are passed in, so migration 0007 runs the same code on its
+historical models as the ``dedupe_durations`` command does on the real ones.
+
+Copies are deleted without signals, so running workers keep their interning
+caches (which only ever hold the lowest pk, but may predate it): restart them
+after running the command.
+"""
+
+import statistics
+import time
+from dataclasses import dataclass
+from functools import reduce
+from operator import or_
+from typing import Optional
+
+from django.db import DatabaseError, connections, router, transaction
+from django.db.models import Count, Min, Q
+
+# Duplicated keys handled per transaction; each costs three query parameters.
+BATCH_SIZE = 300
+
+
+@dataclass
+class DedupeResult:
+    keys: int = 0
+    repointed: int = 0
+    deleted: int = 0
+
+
+def duplicated_keys(Duration) -> list[tuple]:
+    """``(type, value, unit, kept pk)`` of every key stored more than once."""
+    return list(
+        Duration.objects.order_by()
+        .values("type", "value", "unit")
+        .annotate(keep=Min("pk"), copies=Count("pk"))
+        .filter(copies__gt=1)
+        .values_list("type", "value", "unit", "keep")
+    )
+
+
+def dedupe_batch(Duration, Interval, keys) -> DedupeResult:
+    condition = reduce(or_, (Q(type=t, value=v, unit=u) for t, v, u, _ in keys))
+    kept = {(t, v, u): keep for t, v, u, keep in keys}
+    copies = {}  # kept pk: [pks of its copies]
+    rows = Duration.objects.filter(condition).values_list(
+        "pk", "type", "value", "unit"
+    )
+    for pk, *key in rows:
+        keep = kept[tuple(key)]
+        if pk != keep:
+            copies.setdefault(keep, []).append(pk)
+
+    result = DedupeResult(keys=len(keys))
+    with transaction.atomic(using=router.db_for_write(Duration)):
+        for keep, pks in copies.items():
+            result.repointed += Interval.objects.filter(duration_id__in=pks).update(
+                duration_id=keep
+            )
+        # Nothing references the copies any more: skip the deletion collector,
+        # which would look for intervals and fire a signal per row.
+        doomed = Duration.objects.filter(
+            pk__in=[pk for pks in copies.values() for pk in pks]
+        )
+        result.deleted = doomed._raw_delete(doomed.db)
+    return result
+
+
+def dedupe_durations(
+    Duration, Interval, batch_size=BATCH_SIZE, report=None
+) -> DedupeResult:
+    """
+    Collapse every duplicated duration key onto its lowest pk, ``batch_size``
+    keys per transaction; ``report`` is called with each batch's result.
+    """
+    total = DedupeResult()
+    keys = duplicated_keys(Duration)
+    for start in range(0, len(keys), batch_size):
+        result = dedupe_batch(Duration, Interval, keys[start : start + batch_size])
+        total.keys += result.keys
+        total.repointed += result.repointed
+        total.deleted += result.deleted
+        if report is not None:
+            report(result)
+    return total
+
+
+def table_size(model) -> Optional[int]:
+    """
+    Bytes used by ``model``'s table and its indexes, or None where the
+    database does not tell (SQLite needs the ``dbstat`` table).
+    """
+    connection = connections[router.db_for_read(model)]
+    table = model._meta.db_table
+    queries = {
+        "postgresql": ("SELECT pg_total_relation_size(%s)", [table]),
+        "sqlite": (
+            "SELECT SUM(pgsize) FROM dbstat WHERE name IN "
+            "(SELECT name FROM sqlite_master WHERE tbl_name = %s)",
+            [table],
+        ),
+        "mysql": (
+            "SELECT data_length + index_length FROM information_schema.tables "
+            "WHERE table_schema = DATABASE() AND table_name = %s",
+            [table],
+        ),
+    }
+    if connection.vendor not in queries:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(*queries[connection.vendor])
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    return int(row[0]) if row and row[0] is not None else None
+
+
+def lookup_latency(Duration, samples=200) -> Optional[float]:
+    """
+    Median milliseconds to find the duration rows of a ``(type, value, unit)``,
+    as a get-or-create does, over up to ``samples`` stored keys; None when
+    the table is empty.
+    """
+    keys = list(
+        Duration.objects.order_by()
+        .values_list("type", "value", "unit")
+        .distinct()[:samples]
+    )
+    if not keys:
+        return None
+    timings = []
+    for duration_type, value, unit in keys:
+        started = time.perf_counter()
+        list(
+            Duration.objects.filter(
+                type=duration_type, value=value, unit=unit
+            ).values_list("pk", flat=True)
+        )
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
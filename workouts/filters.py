@@ -0,0 +1,115 @@
+from datetime import datetime, timezone
+
+import django_filters
+
+from workouts import units
+from workouts.models import TrainingLoad, Workout, WorkoutStep
+
+# Step range filters: the duration type each one ranges over.
+STEP_FILTERS = {
+    "step_time": units.TIME,
+    "step_distance": units.DISTANCE,
+    "step_work": units.CALORIC,
+    "step_power": units.POWER,
+}
+
+# The widest updated_at range, for closing one open on the other side.
+UPDATED_AT_LIMITS = {
+    "gte": datetime.min.replace(tzinfo=timezone.utc),
+    "lte": datetime.max.replace(tzinfo=timezone.utc),
+}
+
+
+class WorkoutFilter(django_filters.FilterSet):
+    """
+    Server-side filters for the workouts collection.
+
+    Every supported filter, alone or combined with ``author`` or
+    ``workout_type``, is served by one of the indexes in ``Workout.Meta``.
+    """
+
+    # Filtering on the column rather than the relation skips the query a
+    # ModelChoiceFilter would spend validating that the user exists.
+    author = django_filters.NumberFilter(field_name="author_id")
+    title__startswith = django_filters.CharFilter(method="filter_title_prefix")
+    updated_at__gte = django_filters.IsoDateTimeFilter(method="filter_updated_range")
+    updated_at__lte = django_filters.IsoDateTimeFilter(method="filter_updated_range")
+
+    # Workouts with a step whose duration, in canonical units (seconds,
+    # meters, joules, watts), lies in the range; both bounds apply to the
+    # same step. Served by ``duration_canonical_idx``.
+    step_time__gte = django_filters.NumberFilter(method="filter_step_range")
+    step_time__lte = django_filters.NumberFilter(method="filter_step_range")
+    step_distance__gte = django_filters.NumberFilter(method="filter_step_range")
+    step_distance__lte = django_filters.NumberFilter(method="filter_step_range")
+    step_work__gte = django_filters.NumberFilter(method="filter_step_range")
+    step_work__lte = django_filters.NumberFilter(method="filter_step_range")
+    step_power__gte = django_filters.NumberFilter(method="filter_step_range")
+    step_power__lte = django_filters.NumberFilter(method="filter_step_range")
+
+    class Meta:
+        model = Workout
+        fields = {
+            "workout_type": ["exact"],
+            "created_at": ["gte", "lte"],
+            "total_time": ["gte", "lte"],
+            "total_distance": ["gte", "lte"],
+            "total_work": ["gte", "lte"],
+        }
+
+    def filter_title_prefix(self, queryset, name, value):
+        if not value:
+            return queryset
+        # LIKE 'prefix%', with the backend's usual case sensitivity. Under
+        # PostgreSQL's default (non-C) collations only a pattern_ops index
+        # serves it: ``workout_title_prefix_idx``.
+        return queryset.filter(title__startswith=value)
+
+    def filter_updated_range(self, queryset, name, value):
+        lookup = name.rsplit("__", 1)[1]
+        other = "lte" if lookup == "gte" else "gte"
+        bounds = {lookup: value}
+        if self.form.cleaned_data.get(f"updated_at__{other}") is None:
+            # SQLite plans an open range as a quarter of the table and walks
+            # the page order's index instead; a closed one, even closed by a
+            # bound nothing lies beyond, searches ``workout_updated_created_idx``.
+            bounds[other] = UPDATED_AT_LIMITS[other]
+        return queryset.filter(
+            **{f"updated_at__{lookup}": bound for lookup, bound in bounds.items()}
+        )
+
+    def filter_step_range(self, queryset, name, value):
+        kind, lookup = name.rsplit("__", 1)
+        other = "lte" if lookup == "gte" else "gte"
+        bounds = {lookup: value}
+        if self.form.cleaned_data.get(f"{kind}__{other}") is not None:
+            if lookup == "lte":
+                # Applied together with the lower bound.
+                return queryset
+            bounds[other] = self.form.cleaned_data[f"{kind}__{other}"]
+        steps = WorkoutStep.objects.filter(
+            interval__duration__type=STEP_FILTERS[kind],
+            **{
+                f"interval__duration__canonical_value__{lookup}": bound
+                for lookup, bound in bounds.items()
+            },
+        )
+        return queryset.filter(pk__in=steps.values("workout_id"))
+
+
+class TrainingLoadFilter(django_filters.FilterSet):
+    """
+    Range queries over training loads: ``period`` (1 for weeks, 2 for months)
+    and ``period_start`` bounds, for one ``author`` (served by
+    ``training_load_uniq``) or every athlete (``training_load_period_idx``).
+    """
+
+    author = django_filters.NumberFilter(field_name="author_id")
+
+    class Meta:
+        model = TrainingLoad
+        fields = {
+            "period": ["exact"],
+            "workout_type": ["exact"],
+            "period_start": ["gte", "lte"],
+        }
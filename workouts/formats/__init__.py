@@ -0,0 +1,110 @@
+"""
+Structured workout file formats.
+
+Trainer workouts come as Zwift ``.zwo`` XML or as ``.erg``/``.mrc`` course
+tables (power in watts or percent of FTP against time). ``parse_file`` turns
+any of them into a workout spec for ``bulk_build_workouts`` (everything but
+``author``). Every step becomes a ``TimeDuration`` in seconds; its intensity
+has no column of its own, so it is kept as ``perceived_effort`` through
+``effort_for_power``. Zwift ``IntervalsT`` blocks, and alternating on/off
+segments of course tables, become a repeated step with a rest interval.
+
+``zwo.render`` and ``erg.render`` go the other way, from a workout and its
+``sorted_intervals``; perceived effort is turned back into a power target
+with ``power_for_effort``. Only timed steps can be rendered.
+"""
+
+import os
+from decimal import Decimal
+
+from workouts import units
+from workouts.models import Interval, TimeDuration
+from workouts.models.duration import BaseDuration
+
+EXTENSIONS = (".zwo", ".erg", ".mrc")
+
+# Upper bounds of the Coggan power zones (fraction of FTP) and the perceived
+# effort used for each zone; above the last bound is all-out.
+EFFORT_BY_ZONE = ((0.55, 2), (0.75, 4), (0.90, 6), (1.05, 8), (1.20, 9))
+MAX_EFFORT = 10
+
+# Power target (fraction of FTP) rendered for each perceived effort: the
+# middle of its zone, so that ``effort_for_power`` maps it back.
+POWER_BY_EFFORT = {
+    1: 0.45,
+    2: 0.50,
+    3: 0.60,
+    4: 0.65,
+    5: 0.75,
+    6: 0.83,
+    7: 0.88,
+    8: 0.98,
+    9: 1.13,
+    10: 1.30,
+}
+
+# Steadier than this is treated as recovery between efforts.
+REST_BELOW = 0.55
+
+
+class WorkoutFileError(ValueError):
+    """A workout file could not be parsed."""
+
+
+def effort_for_power(fraction):
+    """Perceived effort (1-10) for a power target given as a fraction of FTP."""
+    if fraction is None:
+        return None
+    for bound, effort in EFFORT_BY_ZONE:
+        if fraction <= bound:
+            return effort
+    return MAX_EFFORT
+
+
+def power_for_effort(effort, interval_type):
+    """Power target (fraction of FTP) for a step without one of its own."""
+    if effort is not None:
+        return POWER_BY_EFFORT[min(max(effort, 1), MAX_EFFORT)]
+    if interval_type == Interval.IntervalType.ACTIVE:
+        return POWER_BY_EFFORT[5]
+    return POWER_BY_EFFORT[2]
+
+
+def step_seconds(interval) -> float:
+    """Length of ``interval`` in seconds; only timed steps have one."""
+    duration = interval.duration
+    if duration.type != BaseDuration.DurationType.TIME:
+        raise WorkoutFileError(
+            f"Interval {interval.pk} has a {duration.duration_string.lower()} "
+            "duration; only timed steps can be exported."
+        )
+    return float(units.canonical_value(duration.type, duration.value, duration.unit))
+
+
+def step(seconds, interval_type, power=None, **extra) -> dict:
+    return {
+        "interval_type": interval_type,
+        "duration_type": BaseDuration.DurationType.TIME,
+        "duration_value": Decimal(str(round(seconds, 2))),
+        "duration_unit": TimeDuration.TimeUnitChoices.SECONDS,
+        "perceived_effort": effort_for_power(power),
+        **extra,
+    }
+
+
+def intensity_type(power):
+    if power is not None and power < REST_BELOW:
+        return Interval.IntervalType.REST
+    return Interval.IntervalType.ACTIVE
+
+
+def parse_file(path) -> dict:
+    """Parse a ``.zwo``, ``.erg`` or ``.mrc`` file into a workout spec."""
+    from workouts.formats import erg, zwo
+
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".zwo":
+        return zwo.parse(path)
+    if extension in (".erg", ".mrc"):
+        return erg.parse(path)
+    raise WorkoutFileError(f"Unsupported workout file: {path}")
@@ -0,0 +1,170 @@
+"""
+``.erg`` and ``.mrc`` course files.
+
+Both are a header of ``KEY = value`` lines followed by ``MINUTES WATTS`` (erg)
+or ``MINUTES PERCENT`` (mrc) points; consecutive points bound a segment, and a
+point repeated at the same minute is a step change::
+
+    [COURSE HEADER]
+    FTP = 250
+    MINUTES WATTS
+    [END COURSE HEADER]
+    [COURSE DATA]
+    0.00    100
+    10.00   200
+    10.00   300
+    ...
+    [END COURSE DATA]
+"""
+
+import os
+
+from workouts.formats import (
+    WorkoutFileError,
+    intensity_type,
+    power_for_effort,
+    step,
+    step_seconds,
+)
+from workouts.models import Interval, Workout
+
+DEFAULT_FTP = 250
+
+# A first (last) segment easier than this, as a fraction of FTP, is the
+# warm-up (cool-down).
+WARMUP_BELOW = COOLDOWN_BELOW = 0.75
+
+
+def read_course(lines):
+    """``(header, points)`` from the lines of a course file."""
+    header, points = {}, []
+    section = None
+    for line in lines:
+        line = line.split(";", 1)[0].strip()
+        if not line:
+            continue
+        if line.startswith("["):
+            section = line.upper()
+            continue
+        if section == "[COURSE HEADER]":
+            key, _, value = line.partition("=")
+            if _:
+                header[key.strip().upper()] = value.strip()
+            else:
+                header["COLUMNS"] = line.upper().split()
+        elif section == "[COURSE DATA]":
+            minutes, value, *_ = line.split()
+            points.append((float(minutes), float(value)))
+    return header, points
+
+
+def segments(points, scale):
+    """``(seconds, power)`` per segment, power as a fraction of FTP."""
+    for (start, low), (end, high) in zip(points, points[1:]):
+        seconds = round((end - start) * 60, 2)
+        if seconds > 0:
+            yield seconds, (low + high) / 2 / scale
+
+
+def merge_repeats(steps):
+    """Collapse runs of identical (work, rest) pairs into one repeated step."""
+    merged = []
+    i = 0
+    while i < len(steps):
+        work = steps[i]
+        rest = steps[i + 1] if i + 1 < len(steps) else None
+        count = 1
+        if (
+            rest is not None
+            and work["interval_type"] == Interval.IntervalType.ACTIVE
+            and rest["interval_type"] == Interval.IntervalType.REST
+        ):
+            while steps[i + 2 * count : i + 2 * count + 2] == [work, rest]:
+                count += 1
+        if count > 1:
+            merged.append({**work, "repititions": count, "rest_interval": rest})
+            i += 2 * count
+        else:
+            merged.append(work)
+            i += 1
+    return merged
+
+
+def parse(path) -> dict:
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            header, points = read_course(f)
+    except (ValueError, IndexError) as e:
+        raise WorkoutFileError(str(e)) from e
+
+    columns = header.get("COLUMNS", ())
+    percent = "PERCENT" in columns or (
+        "WATTS" not in columns and path.lower().endswith(".mrc")
+    )
+    try:
+        scale = 100.0 if percent else float(header.get("FTP") or DEFAULT_FTP)
+    except ValueError as e:
+        raise WorkoutFileError("invalid FTP") from e
+
+    parsed = list(segments(points, scale))
+    if not parsed:
+        raise WorkoutFileError("no course data")
+    steps = [step(seconds, intensity_type(power), power) for seconds, power in parsed]
+    if len(steps) > 2:
+        if parsed[0][1] < WARMUP_BELOW:
+            steps[0]["interval_type"] = Interval.IntervalType.WARMUP
+        if parsed[-1][1] < COOLDOWN_BELOW:
+            steps[-1]["interval_type"] = Interval.IntervalType.COOLDOWN
+
+    name = os.path.splitext(header.get("FILE NAME") or os.path.basename(path))[0]
+    return {
+        "title": name[:200],
+        "description": header.get("DESCRIPTION", ""),
+        "workout_type": Workout.WorkoutType.CYCLE,
+        "intervals": merge_repeats(steps),
+    }
+
+
+def render_points(intervals, ftp):
+    """``(minutes, watts)`` course points; repeats are written out in full."""
+    elapsed = 0.0
+    for interval in intervals:
+        work = (
+            step_seconds(interval),
+            round(power_for_effort(interval.perceived_effort, interval.type) * ftp),
+        )
+        rest = None
+        if interval.repititions > 0 and interval.rest_interval is not None:
+            rest_interval = interval.rest_interval
+            rest = (
+                step_seconds(rest_interval),
+                round(
+                    power_for_effort(rest_interval.perceived_effort, rest_interval.type)
+                    * ftp
+                ),
+            )
+        for _ in range(max(interval.repititions, 1)):
+            for seconds, watts in (work, rest) if rest else (work,):
+                yield elapsed / 60, watts
+                elapsed += seconds
+                yield elapsed / 60, watts
+
+
+def render(workout, intervals, ftp=DEFAULT_FTP) -> bytes:
+    """``.erg`` course for ``workout`` and its ordered ``intervals``."""
+    lines = [
+        "[COURSE HEADER]",
+        "VERSION = 2",
+        "UNITS = ENGLISH",
+        f"DESCRIPTION = {' '.join(workout.description.split())}",
+        f"FILE NAME = {workout.title}.erg",
+        f"FTP = {ftp}",
+        "MINUTES WATTS",
+        "[END COURSE HEADER]",
+        "[COURSE DATA]",
+    ]
+    lines += [
+        f"{minutes:.2f}\t{watts}" for minutes, watts in render_points(intervals, ftp)
+    ]
+    lines += ["[END COURSE DATA]", ""]
+    return "\n".join(lines).encode()
@@ -0,0 +1,87 @@
+"""
+Bulk import of workout file libraries.
+
+Files are parsed in a process pool (parsing is pure CPU and needs no database
+connection) while the parent writes the parsed workouts ``batch_size`` at a
+time through ``bulk_build_workouts``, one transaction per batch.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.db import connections, transaction
+
+from workouts.formats import EXTENSIONS, WorkoutFileError, parse_file
+from workouts.models.utils import bulk_build_workouts
+from workouts.transfer import Progress
+
+
+def find_files(paths):
+    """Supported workout files among ``paths``, walking directories."""
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for root, directories, names in os.walk(path):
+            directories.sort()
+            for name in sorted(names):
+                if name.lower().endswith(EXTENSIONS):
+                    yield os.path.join(root, name)
+
+
+def parse_path(path):
+    """``(path, spec, error)``; a file that fails to parse only reports its error."""
+    try:
+        return path, parse_file(path), None
+    except (WorkoutFileError, OSError) as e:
+        return path, None, str(e)
+
+
+def init_worker():
+    django.setup()
+    # Never share the parent's database connection with a forked worker.
+    connections.close_all()
+
+
+def import_files(paths, author, processes=1, batch_size=500, progress=None):
+    """
+    Import every workout file under ``paths`` for ``author``.
+
+    Returns the ``Progress`` and a list of ``(path, error)`` for the files
+    that were skipped.
+    """
+    progress = progress or Progress()
+    errors = []
+    batch = []
+
+    def flush():
+        with transaction.atomic():
+            bulk_build_workouts(batch)
+        interval_rows = sum(
+            1 + bool(step.get("rest_interval"))
+            for spec in batch
+            for step in spec["intervals"]
+        )
+        progress.add(len(batch), len(batch) + interval_rows)
+        batch.clear()
+
+    def consume(results):
+        for path, spec, error in results:
+            if error is not None:
+                errors.append((path, error))
+                continue
+            batch.append({**spec, "author": author})
+            if len(batch) >= batch_size:
+                flush()
+
+    files = find_files(paths)
+    if processes > 1:
+        connections.close_all()
+        with ProcessPoolExecutor(processes, initializer=init_worker) as pool:
+            consume(pool.map(parse_path, files, chunksize=32))
+    else:
+        consume(map(parse_path, files))
+    if batch:
+        flush()
+    return progress, errors
@@ -0,0 +1,176 @@
+"""Zwift ``.zwo`` workouts."""
+
+import os
+from xml.etree.ElementTree import (
+    Element,
+    ParseError,
+    SubElement,
+    indent,
+    iterparse,
+    tostring,
+)
+
+from workouts.formats import (
+    WorkoutFileError,
+    intensity_type,
+    power_for_effort,
+    step,
+    step_seconds,
+)
+from workouts.models import Interval, Workout
+
+SPORTS = {"run": Workout.WorkoutType.RUN, "bike": Workout.WorkoutType.CYCLE}
+SPORT_NAMES = {workout_type: name for name, workout_type in SPORTS.items()}
+
+STEP_TYPES = {
+    "warmup": Interval.IntervalType.WARMUP,
+    "cooldown": Interval.IntervalType.COOLDOWN,
+}
+STEP_TAGS = {
+    Interval.IntervalType.WARMUP: "Warmup",
+    Interval.IntervalType.COOLDOWN: "Cooldown",
+}
+
+
+def number(element, *names):
+    """The first of the ``names`` attributes present, as a float."""
+    for name in names:
+        value = element.get(name) or element.get(name.lower())
+        if value is not None:
+            return float(value)
+    return None
+
+
+def power(element):
+    """Target power (fraction of FTP); ramps count as their average."""
+    value = number(element, "Power")
+    if value is not None:
+        return value
+    low, high = number(element, "PowerLow"), number(element, "PowerHigh")
+    if low is not None and high is not None:
+        return (low + high) / 2
+    return None
+
+
+def parse_step(element):
+    tag = element.tag.lower()
+    if tag == "intervalst":
+        repeats = int(number(element, "Repeat") or 1)
+        on_power = number(element, "OnPower")
+        off_power = number(element, "OffPower")
+        return step(
+            number(element, "OnDuration"),
+            Interval.IntervalType.ACTIVE,
+            on_power,
+            repititions=repeats,
+            rest_interval=step(
+                number(element, "OffDuration"), Interval.IntervalType.REST, off_power
+            ),
+        )
+
+    seconds = number(element, "Duration")
+    if seconds is None:
+        return None
+    if tag == "maxeffort":
+        target = 2.0
+    elif tag == "freeride":
+        target = None
+    else:
+        target = power(element)
+    return step(seconds, STEP_TYPES.get(tag, intensity_type(target)), target)
+
+
+def parse(path) -> dict:
+    """
+    Parse with ``iterparse``, clearing every step once read, so memory does
+    not depend on the size of the workout.
+    """
+    spec = {
+        "title": os.path.splitext(os.path.basename(path))[0],
+        "description": "",
+        "workout_type": Workout.WorkoutType.CYCLE,
+        "intervals": [],
+    }
+    depth = 0
+    try:
+        for event, element in iterparse(path, events=("start", "end")):
+            tag = element.tag.lower()
+            if event == "start":
+                depth += 1
+                continue
+            depth -= 1
+            if tag == "name" and depth == 1 and element.text:
+                spec["title"] = element.text.strip()[:200]
+            elif tag == "description" and depth == 1 and element.text:
+                spec["description"] = element.text.strip()
+            elif tag == "sporttype" and element.text:
+                spec["workout_type"] = SPORTS.get(
+                    element.text.strip().lower(), Workout.WorkoutType.CYCLE
+                )
+            elif depth == 2 and tag != "textevent":
+                # A direct child of <workout>.
+                parsed = parse_step(element)
+                if parsed is not None:
+                    spec["intervals"].append(parsed)
+                element.clear()
+    except (ParseError, ValueError, TypeError) as e:
+        raise WorkoutFileError(str(e)) from e
+    if not spec["intervals"]:
+        raise WorkoutFileError("no workout steps")
+    return spec
+
+
+def attributes(**values) -> dict:
+    return {
+        name: f"{value:g}" if isinstance(value, float) else str(value)
+        for name, value in values.items()
+    }
+
+
+def render_step(parent, interval) -> None:
+    seconds = step_seconds(interval)
+    target = round(power_for_effort(interval.perceived_effort, interval.type), 2)
+    rest = interval.rest_interval
+    if interval.repititions > 0 and rest is not None:
+        off = round(power_for_effort(rest.perceived_effort, rest.type), 2)
+        SubElement(
+            parent,
+            "IntervalsT",
+            attributes(
+                Repeat=interval.repititions,
+                OnDuration=seconds,
+                OffDuration=step_seconds(rest),
+                OnPower=target,
+                OffPower=off,
+            ),
+        )
+        return
+
+    if interval.type in STEP_TAGS:
+        tag = STEP_TAGS[interval.type]
+        values = attributes(Duration=seconds, PowerLow=target, PowerHigh=target)
+    elif (
+        interval.perceived_effort is None
+        and interval.type == Interval.IntervalType.ACTIVE
+    ):
+        tag, values = "FreeRide", attributes(Duration=seconds)
+    else:
+        tag, values = "SteadyState", attributes(Duration=seconds, Power=target)
+    # A repeat without a rest interval is simply the step, back to back.
+    for _ in range(max(interval.repititions, 1)):
+        SubElement(parent, tag, values)
+
+
+def render(workout, intervals) -> bytes:
+    """``.zwo`` XML for ``workout`` and its ordered ``intervals``."""
+    root = Element("workout_file")
+    SubElement(root, "author").text = workout.author.username
+    SubElement(root, "name").text = workout.title
+    SubElement(root, "description").text = workout.description
+    if workout.workout_type in SPORT_NAMES:
+        SubElement(root, "sportType").text = SPORT_NAMES[workout.workout_type]
+    steps = SubElement(root, "workout")
+    for interval in intervals:
+        render_step(steps, interval)
+    indent(root)
+    return tostring(root, encoding="utf-8", xml_declaration=True) + b"\n"
@@ -0,0 +1,292 @@
+"""
+Per-request performance instrumentation.
+
+``workouts.middleware.InstrumentationMiddleware`` opens a ``RequestMetrics``
+for every request. While it is current, every SQL statement on any database
+connection is counted and timed (see ``install_execute_wrapper``), and code can time its own phases with
+``timed``::
+
+    with timed("serialize"):
+        data = serializer.data
+
+The finished metrics become the response's ``Server-Timing`` header, are
+logged with the most repeated SQL statements when the request is slow, and
+are added to per-endpoint latency histograms kept in Django's cache
+(``endpoint_stats``) so that every worker feeds the same numbers, dumped by the
+``performance_stats`` command or the staff-only ``/api/performance/`` endpoint.
+
+Instrumentation is opt-in (``PERFORMANCE_INSTRUMENTATION``) outside the
+development profile.
+"""
+
+import contextlib
+import contextvars
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+
+# Upper bounds, in milliseconds, of the request latency histogram buckets.
+BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+BUCKET_LABELS = (*(str(bound) for bound in BUCKETS), "+Inf")
+
+_current = contextvars.ContextVar("request_metrics", default=None)
+
+# Collapses "IN (%s, %s, %s)" so statements only differing in the number of
+# parameters count as the same statement.
+PLACEHOLDERS = re.compile(r"IN \(%s(?:\s*,\s*%s)*\)", re.IGNORECASE)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.duration = None
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.statements = Counter()
+        self.statement_time = defaultdict(float)
+        self.timings = defaultdict(float)
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            statement = PLACEHOLDERS.sub("IN (...)", sql)
+            self.sql_count += 1
+            self.sql_time += elapsed
+            self.statements[statement] += 1
+            self.statement_time[statement] += elapsed
+
+    def add(self, name, seconds):
+        self.timings[name] += seconds
+
+    def finish(self):
+        self.duration = time.perf_counter() - self.started
+
+    def repeated_statements(self, limit=5):
+        """The ``limit`` statements run most often, if run more than once."""
+        return [
+            (statement, count, self.statement_time[statement])
+            for statement, count in self.statements.most_common(limit)
+            if count > 1
+        ]
+
+    def server_timing(self) -> str:
+        metrics = [f'db;dur={self.sql_time * 1e3:.1f};desc="{self.sql_count} queries"']
+        metrics += [
+            f"{name};dur={seconds * 1e3:.1f}" for name, seconds in self.timings.items()
+        ]
+        if self.duration is not None:
+            metrics.append(f"total;dur={self.duration * 1e3:.1f}")
+        return ", ".join(metrics)
+
+
+def current_metrics():
+    return _current.get()
+
+
+@contextlib.contextmanager
+def collect_metrics():
+    """Make a fresh ``RequestMetrics`` current for the duration of the block."""
+    metrics = RequestMetrics()
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics.execute_wrapper(execute, sql, params, many, context)
+
+
+def install_execute_wrapper(sender, connection, **kwargs):
+    """
+    ``connection_created`` handler adding ``execute_wrapper`` to every
+    database connection.
+
+    Connections are per thread, and under ASGI the async ORM runs queries on
+    a different thread than the request, so the wrapper stays installed for
+    good and finds the request's metrics through the context variable, which
+    ``sync_to_async`` carries over.
+    """
+    if execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(execute_wrapper)
+
+
+@contextlib.contextmanager
+def timed(name):
+    """Add the time spent in the block to the current request's ``name`` timing."""
+    metrics = _current.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if metrics is not None:
+            metrics.add(name, time.perf_counter() - started)
+
+
+class EndpointStats:
+    """
+    Latency histograms per endpoint, kept as counters in Django's cache.
+
+    Each process adds its requests up in memory and flushes them to the cache
+    once ``PERFORMANCE_FLUSH_SECONDS`` have passed, so recording a request
+    costs no round trip and a flush one ``incr`` per changed counter.
+    Durations are stored in whole microseconds so the counters can be
+    incremented atomically with ``cache.incr``.
+
+    Endpoints are listed in numbered slots: only the process whose
+    ``cache.add`` of an endpoint's marker succeeds takes the next slot (an
+    ``incr``), so concurrent workers never overwrite each other's endpoints.
+    """
+
+    key_prefix = "workouts:perf"
+    counters = ("count", "total_us", "db_us", "queries")
+
+    def __init__(self, alias=None):
+        self.alias = alias
+        self.lock = threading.Lock()
+        self.pending = defaultdict(Counter)
+        self.flushed = time.monotonic()
+
+    @property
+    def cache(self):
+        return caches[self.alias or getattr(settings, "WORKOUT_CACHE_ALIAS", "default")]
+
+    def key(self, endpoint, name) -> str:
+        return f"{self.key_prefix}:{endpoint.replace(' ', '_')}:{name}"
+
+    def keys(self, endpoint) -> list:
+        names = (*self.counters, *(f"le:{label}" for label in BUCKET_LABELS))
+        return [self.key(endpoint, name) for name in names]
+
+    @property
+    def flush_seconds(self) -> float:
+        return getattr(settings, "PERFORMANCE_FLUSH_SECONDS", 10)
+
+    def incr(self, key, delta) -> int:
+        self.cache.add(key, 0, timeout=None)
+        try:
+            return self.cache.incr(key, delta)
+        except ValueError:
+            # Evicted between add() and incr(); start counting again.
+            self.cache.set(key, delta, timeout=None)
+            return delta
+
+    def slot_keys(self) -> list:
+        count = self.cache.get(f"{self.key_prefix}:endpoints", 0)
+        return [f"{self.key_prefix}:endpoint:{slot}" for slot in range(1, count + 1)]
+
+    def endpoints(self) -> list:
+        return sorted(set(self.cache.get_many(self.slot_keys()).values()))
+
+    def register(self, endpoint) -> None:
+        if self.cache.add(self.key(endpoint, "registered"), True, timeout=None):
+            slot = self.incr(f"{self.key_prefix}:endpoints", 1)
+            self.cache.set(f"{self.key_prefix}:endpoint:{slot}", endpoint, timeout=None)
+
+    @staticmethod
+    def bucket(milliseconds) -> str:
+        for bound in BUCKETS:
+            if milliseconds <= bound:
+                return str(bound)
+        return "+Inf"
+
+    def record(self, endpoint, metrics: RequestMetrics) -> bool:
+        """
+        Add a request to this process's counters. Returns whether they are
+        due to be flushed; the caller calls ``flush``.
+        """
+        with self.lock:
+            self.pending[endpoint].update(
+                {
+                    "count": 1,
+                    "total_us": round(metrics.duration * 1e6),
+                    "db_us": round(metrics.sql_time * 1e6),
+                    "queries": metrics.sql_count,
+                    f"le:{self.bucket(metrics.duration * 1e3)}": 1,
+                }
+            )
+            return time.monotonic() - self.flushed >= self.flush_seconds
+
+    def flush(self) -> None:
+        """Add this process's counters to the shared ones."""
+        with self.lock:
+            pending, self.pending = self.pending, defaultdict(Counter)
+            self.flushed = time.monotonic()
+        for endpoint, counters in pending.items():
+            self.register(endpoint)
+            for name, delta in counters.items():
+                if delta:
+                    self.incr(self.key(endpoint, name), delta)
+
+    def stats(self) -> dict:
+        """
+        ``{endpoint: summary}`` with request count, mean total and database
+        time, mean query count, bucket counts and percentile estimates (the
+        upper bound of the bucket each percentile falls in).
+
+        Other processes' requests are included once they have flushed.
+        """
+        self.flush()
+        endpoints = self.endpoints()
+        found = self.cache.get_many(
+            [key for endpoint in endpoints for key in self.keys(endpoint)]
+        )
+        stats = {}
+        for endpoint in endpoints:
+            values = {
+                name: found.get(self.key(endpoint, name), 0) for name in self.counters
+            }
+            count = values["count"]
+            if not count:
+                continue
+            buckets = {
+                label: found.get(self.key(endpoint, f"le:{label}"), 0)
+                for label in BUCKET_LABELS
+            }
+            stats[endpoint] = {
+                "count": count,
+                "mean_ms": round(values["total_us"] / count / 1e3, 2),
+                "db_mean_ms": round(values["db_us"] / count / 1e3, 2),
+                "queries_mean": round(values["queries"] / count, 2),
+                **{
+                    f"p{q}_ms": self.percentile(buckets, count, q / 100)
+                    for q in (50, 95, 99)
+                },
+                "buckets": buckets,
+            }
+        return stats
+
+    @staticmethod
+    def percentile(buckets, count, fraction):
+        seen = 0
+        for label, bucket_count in buckets.items():
+            seen += bucket_count
+            if seen >= count * fraction:
+                return float(label) if label != "+Inf" else None
+        return None
+
+    def reset(self) -> None:
+        with self.lock:
+            self.pending.clear()
+        keys = [
+            key
+            for endpoint in self.endpoints()
+            for key in (*self.keys(endpoint), self.key(endpoint, "registered"))
+        ]
+        self.cache.delete_many(
+            [*keys, *self.slot_keys(), f"{self.key_prefix}:endpoints"]
+        )
+
+
+endpoint_stats = EndpointStats()
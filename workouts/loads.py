@@ -0,0 +1,232 @@
+"""
+Training load: weekly and monthly volume per athlete.
+
+``TrainingLoad`` holds, for every author, period (week or month), period start
+and workout type, how many workouts there were and the sums of their totals
+(``workouts.totals``). A workout counts in the week and the month containing
+its ``created_at`` in the current time zone; weeks start on Monday.
+
+The table is maintained incrementally. Whenever workouts are created, edited
+or deleted, or their totals change, ``refresh_loads`` recomputes only the
+periods they fall in (before and after the change) from the ``Workout`` rows:
+one aggregate query per kind of period and batch of authors, each reading a
+range of ``workout_author_created_idx``, and one upsert, with the authors'
+rows locked (``lock_authors``) so concurrent refreshes of an author are
+serialized and each one sees the workouts the previous one committed.
+``rebuild_loads``
+recomputes the whole table a range of authors at a time, for the migration
+that creates it and the ``rebuild_training_loads`` command.
+"""
+
+import datetime
+from decimal import ROUND_HALF_UP, Decimal
+from functools import reduce
+from itertools import islice
+from operator import or_
+from typing import Iterable, NamedTuple
+
+from django.contrib.auth.models import User
+from django.db import connections, router, transaction
+from django.db.models import Count, DateField, Max, Q, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+
+from workouts.models import TrainingLoad, Workout
+from workouts.totals import CENTS, TOTAL_FIELDS
+
+Period = TrainingLoad.Period
+
+TRUNCATIONS = {Period.WEEK: TruncWeek, Period.MONTH: TruncMonth}
+
+LOAD_FIELDS = ("author", "workout_type", "created_at")
+
+# Authors whose periods are recomputed per aggregate query.
+AUTHOR_BATCH_SIZE = 300
+
+
+class LoadKey(NamedTuple):
+    author_id: int
+    period: int
+    period_start: datetime.date
+    workout_type: int
+
+
+def period_start(period, moment: datetime.datetime) -> datetime.date:
+    day = timezone.localtime(moment).date()
+    if period == Period.WEEK:
+        return day - datetime.timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def period_end(period, start: datetime.date) -> datetime.date:
+    """The first day after the period starting on ``start``."""
+    if period == Period.WEEK:
+        return start + datetime.timedelta(days=7)
+    return (start + datetime.timedelta(days=31)).replace(day=1)
+
+
+def midnight(day: datetime.date) -> datetime.datetime:
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def load_keys(workouts: Iterable[Workout]) -> set[LoadKey]:
+    """The periods ``workouts`` count in, one key per kind of period."""
+    return {
+        LoadKey(
+            workout.author_id,
+            period,
+            period_start(period, workout.created_at),
+            workout.workout_type,
+        )
+        for workout in workouts
+        for period in Period
+    }
+
+
+def aggregate(period, workouts) -> dict[LoadKey, dict]:
+    """``{key: TrainingLoad values}`` of the ``workouts`` queryset."""
+    rows = (
+        workouts.annotate(
+            period_start=TRUNCATIONS[period]("created_at", output_field=DateField())
+        )
+        .values("author_id", "period_start", "workout_type")
+        .annotate(workouts=Count("pk"), **{field: Sum(field) for field in TOTAL_FIELDS})
+        .order_by()
+    )
+    return {
+        LoadKey(row["author_id"], period, row["period_start"], row["workout_type"]): {
+            "workouts": row["workouts"],
+            # SQLite sums come back as plain numbers.
+            **{
+                field: Decimal(str(row[field])).quantize(CENTS, ROUND_HALF_UP)
+                for field in TOTAL_FIELDS
+            },
+        }
+        for row in rows
+    }
+
+
+def batches(items, size):
+    items = iter(items)
+    while batch := list(islice(items, size)):
+        yield batch
+
+
+def lock_authors(author_ids) -> None:
+    """
+    Lock the users ``author_ids`` until the transaction ends, in pk order so
+    concurrent lockers cannot deadlock.
+
+    ``FOR NO KEY UPDATE`` where supported: it does not conflict with the key
+    share lock a transaction inserting one of the author's workouts holds.
+    Backends without row locks (SQLite) serialize writers anyway.
+    """
+    using = router.db_for_write(User)
+    features = connections[using].features
+    if not features.has_select_for_update:
+        return
+    users = User.objects.using(using).select_for_update(
+        no_key=features.has_select_for_no_key_update
+    )
+    for batch in batches(sorted(author_ids), AUTHOR_BATCH_SIZE):
+        list(users.filter(pk__in=batch).order_by("pk").values_list("pk", flat=True))
+
+
+def key_filter(keys: Iterable[LoadKey]) -> Q:
+    return reduce(or_, (Q(**key._asdict()) for key in keys))
+
+
+def refresh_loads(keys: Iterable[LoadKey]) -> int:
+    """
+    Recompute the ``TrainingLoad`` rows of ``keys`` from the workouts,
+    deleting those no workout counts in any more.
+    """
+    keys = set(keys)
+    if not keys:
+        return 0
+    with transaction.atomic():
+        lock_authors({key.author_id for key in keys})
+        loads = recompute(keys)
+        TrainingLoad.objects.bulk_create(
+            [TrainingLoad(**key._asdict(), **values) for key, values in loads.items()],
+            update_conflicts=True,
+            unique_fields=["author", "period", "period_start", "workout_type"],
+            update_fields=["workouts", *TOTAL_FIELDS],
+        )
+        for stale in batches(keys - loads.keys(), AUTHOR_BATCH_SIZE):
+            TrainingLoad.objects.filter(key_filter(stale)).delete()
+    return len(keys)
+
+
+def recompute(keys: set[LoadKey]) -> dict[LoadKey, dict]:
+    """The ``TrainingLoad`` values of those ``keys`` some workout counts in."""
+    loads = {}
+    for period in Period:
+        # Per author, the span from its first to its last period.
+        spans = {}
+        for key in keys:
+            if key.period == period:
+                first, last = spans.get(key.author_id, (key.period_start,) * 2)
+                spans[key.author_id] = (
+                    min(first, key.period_start),
+                    max(last, key.period_start),
+                )
+        for authors in batches(spans.items(), AUTHOR_BATCH_SIZE):
+            workouts = Workout.objects.filter(
+                reduce(
+                    or_,
+                    (
+                        Q(
+                            author_id=author_id,
+                            created_at__gte=midnight(first),
+                            created_at__lt=midnight(period_end(period, last)),
+                        )
+                        for author_id, (first, last) in authors
+                    ),
+                )
+            )
+            loads.update(
+                (key, values)
+                for key, values in aggregate(period, workouts).items()
+                if key in keys
+            )
+    return loads
+
+
+def refresh_workout_loads(workout_ids: Iterable[int]) -> int:
+    """Recompute the periods the given workouts count in."""
+    workout_ids = set(workout_ids)
+    if not workout_ids:
+        return 0
+    return refresh_loads(
+        load_keys(Workout.objects.filter(pk__in=workout_ids).only(*LOAD_FIELDS))
+    )
+
+
+def rebuild_loads(Workout, TrainingLoad, batch_size=1000, report=None) -> int:
+    """
+    Rebuild every row of ``TrainingLoad`` from ``Workout``, over ranges of
+    ``batch_size`` author pks (the models are parameters so migrations can
+    pass their historical ones).
+
+    Each range is one aggregate query per kind of period, after which the
+    range's rows are replaced in one transaction; ``report`` is called with
+    the running count of rows written. Returns that count.
+    """
+    last_author = Workout.objects.aggregate(last=Max("author_id"))["last"] or 0
+    TrainingLoad.objects.filter(author_id__gt=last_author).delete()
+    written = 0
+    for start in range(0, last_author, batch_size):
+        authors = {"author_id__gt": start, "author_id__lte": start + batch_size}
+        loads = {}
+        for period in Period:
+            loads.update(aggregate(period, Workout.objects.filter(**authors)))
+        with transaction.atomic():
+            TrainingLoad.objects.filter(**authors).delete()
+            TrainingLoad.objects.bulk_create(
+                TrainingLoad(**key._asdict(), **values) for key, values in loads.items()
+            )
+        written += len(loads)
+        if report is not None:
+            report(written)
+    return written
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from workouts.models import BaseDuration
+from workouts.units import backfill_canonical_values
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the canonical SI value of every duration, for rows "
+        "written without going through the model (raw SQL, fixtures)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10_000,
+            help="Duration pks updated per query.",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be >= 1.")
+        updated = backfill_canonical_values(
+            BaseDuration,
+            batch_size=options["batch_size"],
+            report=lambda count: self.stdout.write(f"Updated {count} durations."),
+        )
+        self.stdout.write(self.style.SUCCESS(f"Backfilled {updated} durations."))
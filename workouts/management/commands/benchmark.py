@@ -0,0 +1,62 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from workouts.benchmarks import test_database
+from workouts.benchmarks.api import INTERVALS_PER_WORKOUT, SCALES, run_suite
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the workouts API at several dataset sizes against a "
+        "throwaway test database and writes the results as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scales",
+            default=",".join(str(scale) for scale in SCALES),
+            help="Comma separated numbers of workouts to benchmark at.",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=5, help="Timed runs per call."
+        )
+        parser.add_argument(
+            "--intervals-per-workout",
+            type=int,
+            default=INTERVALS_PER_WORKOUT,
+            help="Steps per seeded workout.",
+        )
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Random seed for the seeded data."
+        )
+        parser.add_argument(
+            "-o", "--output", help="Write the JSON report to this file."
+        )
+
+    def handle(self, *args, **options):
+        try:
+            scales = [int(scale) for scale in options["scales"].split(",")]
+        except ValueError:
+            raise CommandError("--scales must be a comma separated list of integers.")
+        if options["repeat"] < 1 or any(scale < 1 for scale in scales):
+            raise CommandError("--repeat and every scale must be >= 1.")
+
+        setup_test_environment()
+        try:
+            with test_database():
+                report = run_suite(
+                    scales=scales,
+                    repeat=options["repeat"],
+                    intervals_per_workout=options["intervals_per_workout"],
+                    seed=options["seed"],
+                    stdout=self.stdout,
+                )
+        finally:
+            teardown_test_environment()
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}."))
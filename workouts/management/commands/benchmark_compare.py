@@ -0,0 +1,44 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from workouts.benchmarks.api import compare
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares two benchmark reports and fails when the second regressed "
+        "beyond the threshold."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("baseline", help="Report to compare against.")
+        parser.add_argument("current", help="Report to check.")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.1,
+            help="Relative increase in wall time or memory tolerated (0.1 = 10%%).",
+        )
+
+    def handle(self, *args, **options):
+        reports = []
+        for path in (options["baseline"], options["current"]):
+            try:
+                with open(path) as f:
+                    reports.append(json.load(f))
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read {path}: {e}")
+
+        regressions = compare(*reports, threshold=options["threshold"])
+        for r in regressions:
+            change = f"{r['change']:+.1%}" if r["change"] is not None else "new"
+            self.stdout.write(
+                self.style.ERROR(
+                    f"{r['scale']:>8} {r['name']:<14} {r['metric']:<9} "
+                    f"{r['baseline']} -> {r['current']} ({change})"
+                )
+            )
+        if regressions:
+            raise CommandError(f"{len(regressions)} regression(s) found.")
+        self.stdout.write(self.style.SUCCESS("No regressions."))
@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from workouts.dedupe import (
+    BATCH_SIZE,
+    dedupe_durations,
+    lookup_latency,
+    table_size,
+)
+from workouts.models import BaseDuration, Interval
+
+
+class Command(BaseCommand):
+    help = (
+        "Collapses duplicate duration rows onto one row per (type, value, unit), "
+        "repointing intervals at it, and reports the duration table's size and "
+        "lookup latency before and after. Run it ahead of migration 0007 on "
+        "large tables to dedupe in small transactions, then restart workers so "
+        "they drop the durations they have cached."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+            help="Duplicated keys collapsed per transaction.",
+        )
+        parser.add_argument(
+            "--samples",
+            type=int,
+            default=200,
+            help="Keys looked up to measure lookup latency.",
+        )
+
+    def report(self, label, samples):
+        rows = BaseDuration.objects.count()
+        size = table_size(BaseDuration)
+        latency = lookup_latency(BaseDuration, samples)
+        self.stdout.write(
+            f"{label}: {rows} rows, "
+            + (f"{size / 1024:.0f} KiB" if size is not None else "size unknown")
+            + ", lookup "
+            + (f"{latency:.3f} ms" if latency is not None else "n/a")
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be >= 1.")
+        if options["samples"] < 1:
+            raise CommandError("--samples must be >= 1.")
+
+        self.report("Before", options["samples"])
+        result = dedupe_durations(
+            BaseDuration,
+            Interval,
+            batch_size=options["batch_size"],
+            report=lambda batch: self.stdout.write(
+                f"Collapsed {batch.keys} keys: {batch.deleted} rows deleted, "
+                f"{batch.repointed} intervals repointed."
+            ),
+        )
+        self.report("After", options["samples"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Deduplicated {result.keys} keys: deleted {result.deleted} rows "
+                f"and repointed {result.repointed} intervals. Restart workers to "
+                "drop their cached durations."
+            )
+        )
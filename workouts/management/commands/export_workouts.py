@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from workouts.models import Workout
+from workouts.transfer import Progress, export_workouts, open_ndjson
+
+
+class Command(BaseCommand):
+    help = "Exports workouts with their ordered steps as (optionally gzipped) NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "output", help="File to write, '-' for stdout; '.gz' names are gzipped."
+        )
+        parser.add_argument(
+            "--gzip",
+            action="store_true",
+            default=None,
+            help="Compress the output whatever its name.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Workouts fetched from the database cursor at a time.",
+        )
+        parser.add_argument(
+            "--author", help="Only export the workouts of this username."
+        )
+
+    def handle(self, *args, **options):
+        queryset = Workout.objects.all()
+        if options["author"]:
+            queryset = queryset.filter(author__username=options["author"])
+
+        # Progress goes to stderr so the export itself can go to stdout.
+        progress = Progress(report=lambda p: self.stderr.write(str(p)))
+        with open_ndjson(options["output"], "w", compress=options["gzip"]) as out:
+            export_workouts(queryset, out, options["chunk_size"], progress)
+        self.stderr.write(self.style.SUCCESS(f"Exported {progress}."))
@@ -0,0 +1,49 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from workouts.formats.library import import_files
+from workouts.transfer import Progress
+
+
+class Command(BaseCommand):
+    help = "Imports .zwo, .erg and .mrc workout files, walking directories."
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="+", help="Workout files or directories.")
+        parser.add_argument(
+            "--author", required=True, help="Username the workouts are created for."
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Workouts created per transaction.",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=1,
+            help="Worker processes parsing files in parallel.",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1 or options["processes"] < 1:
+            raise CommandError("--batch-size and --processes must be >= 1.")
+        try:
+            author = get_user_model().objects.get(username=options["author"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"Unknown author {options['author']!r}.")
+
+        progress = Progress(report=lambda p: self.stdout.write(str(p)))
+        progress, errors = import_files(
+            options["paths"],
+            author,
+            processes=options["processes"],
+            batch_size=options["batch_size"],
+            progress=progress,
+        )
+        for path, error in errors:
+            self.stderr.write(f"Skipped {path}: {error}")
+        self.stdout.write(
+            self.style.SUCCESS(f"Imported {progress}; skipped {len(errors)} files.")
+        )
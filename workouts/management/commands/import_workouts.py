@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from workouts.transfer import Checkpoint, Progress, import_workouts, open_ndjson
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports workouts from (optionally gzipped) NDJSON written by "
+        "export_workouts, resuming from the last checkpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "input", help="File to read, '-' for stdin; '.gz' names are gunzipped."
+        )
+        parser.add_argument(
+            "--gzip",
+            action="store_true",
+            default=None,
+            help="Decompress the input whatever its name.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Workouts created per transaction.",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            help="Checkpoint file (default: '<input>.checkpoint'; none for stdin).",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore an existing checkpoint and import from the first line.",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be >= 1.")
+
+        path = options["input"]
+        checkpoint_path = options["checkpoint"]
+        if checkpoint_path is None and path != "-":
+            checkpoint_path = f"{path}.checkpoint"
+        checkpoint = Checkpoint(checkpoint_path) if checkpoint_path else None
+        if checkpoint is not None:
+            if options["restart"]:
+                checkpoint.clear()
+            elif skipped := checkpoint.load():
+                self.stdout.write(f"Resuming after line {skipped}.")
+
+        progress = Progress(report=lambda p: self.stdout.write(str(p)))
+        try:
+            with open_ndjson(path, "r", compress=options["gzip"]) as lines:
+                import_workouts(lines, options["batch_size"], checkpoint, progress)
+        except FileNotFoundError as e:
+            raise CommandError(e)
+        except (ValueError, KeyError) as e:
+            raise CommandError(f"Invalid record: {e!r}")
+
+        if checkpoint is not None:
+            checkpoint.clear()
+        self.stdout.write(self.style.SUCCESS(f"Imported {progress}."))
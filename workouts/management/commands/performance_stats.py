@@ -0,0 +1,51 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from workouts.instrumentation import BUCKET_LABELS, endpoint_stats
+
+
+class Command(BaseCommand):
+    help = "Dumps the per-endpoint request latency histograms."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--json", action="store_true", help="Print the raw stats as JSON."
+        )
+        parser.add_argument(
+            "--reset", action="store_true", help="Clear the histograms afterwards."
+        )
+
+    def handle(self, *args, **options):
+        stats = endpoint_stats.stats()
+        if options["json"]:
+            self.stdout.write(json.dumps(stats, indent=2))
+        elif not stats:
+            self.stdout.write("No requests recorded.")
+        else:
+            self.write_table(stats)
+
+        if options["reset"]:
+            endpoint_stats.reset()
+            self.stdout.write(self.style.SUCCESS("Histograms cleared."))
+
+    def write_table(self, stats):
+        self.stdout.write(
+            f"{'endpoint':<32} {'count':>7} {'mean':>9} {'db':>9} {'queries':>8} "
+            f"{'p50':>7} {'p95':>7} {'p99':>7}"
+        )
+        for endpoint, s in stats.items():
+            percentiles = " ".join(
+                f"{s[p]:>7.0f}" if s[p] is not None else f"{'inf':>7}"
+                for p in ("p50_ms", "p95_ms", "p99_ms")
+            )
+            self.stdout.write(
+                f"{endpoint:<32} {s['count']:>7} {s['mean_ms']:>7.1f}ms "
+                f"{s['db_mean_ms']:>7.1f}ms {s['queries_mean']:>8.1f} {percentiles}"
+            )
+            histogram = "  ".join(
+                f"<={label}:{s['buckets'][label]}"
+                for label in BUCKET_LABELS
+                if s["buckets"][label]
+            )
+            self.stdout.write(f"  {histogram}")
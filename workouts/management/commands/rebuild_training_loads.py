@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from workouts.loads import rebuild_loads
+from workouts.models import TrainingLoad, Workout
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the weekly and monthly training loads of every athlete from "
+        "their workouts, after recompute_totals or writes that bypassed the "
+        "models (raw SQL, fixtures)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Author pks aggregated per query.",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be >= 1.")
+        written = rebuild_loads(
+            Workout,
+            TrainingLoad,
+            batch_size=options["batch_size"],
+            report=lambda count: self.stdout.write(f"Wrote {count} training loads."),
+        )
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} training loads."))
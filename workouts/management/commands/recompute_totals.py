@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from workouts.totals import recompute_all_totals
+
+
+class Command(BaseCommand):
+    help = "Recomputes the denormalized totals of every workout."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10_000,
+            help="Number of workouts summed per query.",
+        )
+
+    def handle(self, *args, **options):
+        updated = recompute_all_totals(
+            batch_size=options["batch_size"], stdout=self.stdout
+        )
+        self.stdout.write(self.style.SUCCESS(f"Recomputed {updated} workouts."))
@@ -1,5 +1,16 @@
-from django.core.management.base import BaseCommand
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+
+import django
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
+from django.db import connections
+from django.db.models import F
+from django.utils import timezone
+from workouts.loads import load_keys, refresh_loads
 from workouts.models import Interval, Workout
 from workouts.models.duration import (
     TimeDuration,
@@ -8,6 +19,7 @@ from workouts.models.duration import (
     BaseDuration,
 )
 from workouts.models.utils import (
+    bulk_build_workouts,
     create_warmup,
     create_cool_down,
     create_interval,
@@ -17,17 +29,251 @@ from workouts.models.utils import (
 
 User = get_user_model()
 
+TITLES = {
+    Workout.WorkoutType.RUN: (
+        "Tempo Run",
+        "Track Intervals",
+        "Hill Repeats",
+        "Easy Run",
+    ),
+    Workout.WorkoutType.SWIM: ("Threshold Swim", "Sprint Set", "Endurance Swim"),
+    Workout.WorkoutType.CYCLE: ("Sweet Spot", "VO2 Max", "Over-Unders", "Base Ride"),
+}
+
+
+def time_step(rng, low, high, unit=TimeDuration.TimeUnitChoices.MINUTES, **extra):
+    return {
+        "duration_type": BaseDuration.DurationType.TIME,
+        "duration_value": Decimal(rng.randint(low, high)),
+        "duration_unit": unit,
+        **extra,
+    }
+
+
+def main_step(rng, workout_type):
+    """A realistic work step for the sport, repeated about a third of the time."""
+    if workout_type == Workout.WorkoutType.RUN:
+        if rng.random() < 0.5:
+            step = {
+                "duration_type": BaseDuration.DurationType.DISTANCE,
+                "duration_value": Decimal(rng.choice((200, 400, 800, 1000, 1600))),
+                "duration_unit": DistanceDuration.DistanceUnitChoices.METERS,
+            }
+        else:
+            step = time_step(rng, 2, 20)
+    elif workout_type == Workout.WorkoutType.SWIM:
+        step = {
+            "duration_type": BaseDuration.DurationType.DISTANCE,
+            "duration_value": Decimal(rng.choice((50, 100, 200, 400))),
+            "duration_unit": DistanceDuration.DistanceUnitChoices.METERS,
+        }
+    elif rng.random() < 0.5:
+        step = {
+            "duration_type": BaseDuration.DurationType.POWER,
+            "duration_value": Decimal(rng.randrange(150, 400, 5)),
+            "duration_unit": PowerDuration.PowerUnitChoices.WATTS,
+        }
+    else:
+        step = time_step(rng, 1, 30)
+
+    step["interval_type"] = Interval.IntervalType.ACTIVE
+    step["perceived_effort"] = rng.choice((None, *range(3, 10)))
+    if rng.random() < 0.35:
+        step["repititions"] = rng.randint(2, 8)
+        step["rest_interval"] = time_step(
+            rng,
+            30,
+            180,
+            unit=TimeDuration.TimeUnitChoices.SECONDS,
+            interval_type=Interval.IntervalType.REST,
+        )
+    return step
+
+
+def workout_spec(rng, author_id, intervals_per_workout):
+    workout_type = rng.choice(Workout.WorkoutType.values)
+    steps = [main_step(rng, workout_type) for _ in range(intervals_per_workout)]
+    if intervals_per_workout >= 3:
+        steps[0] = time_step(rng, 5, 20, interval_type=Interval.IntervalType.WARMUP)
+        steps[-1] = time_step(rng, 5, 15, interval_type=Interval.IntervalType.COOLDOWN)
+    return {
+        "author": User(pk=author_id),
+        "title": rng.choice(TITLES[workout_type]),
+        "description": f"Generated {Workout.WorkoutType(workout_type).label.lower()}",
+        "workout_type": workout_type,
+        "intervals": steps,
+    }
+
+
+def generate_batch(seed, batch, count, intervals_per_workout, author_ids, days):
+    """
+    Create one batch of ``count`` workouts.
+
+    The batch's random stream is derived from ``(seed, batch)`` only, so the
+    generated data is the same however batches are spread across processes.
+    """
+    rng = random.Random(f"{seed}:{batch}")
+    specs = [
+        workout_spec(rng, rng.choice(author_ids), intervals_per_workout)
+        for _ in range(count)
+    ]
+    workouts = bulk_build_workouts(specs)
+
+    # auto_now_add/auto_now stamp every row with "now"; spread them out.
+    stamped = load_keys(workouts)
+    now = timezone.now()
+    for workout in workouts:
+        workout.created_at = now - timedelta(seconds=rng.randrange(days * 24 * 60 * 60))
+    Workout.objects.bulk_update(workouts, ["created_at"])
+    refresh_loads(stamped | load_keys(workouts))
+    Workout.objects.filter(pk__in=[w.pk for w in workouts]).update(
+        updated_at=F("created_at")
+    )
+
+    intervals = sum(len(spec["intervals"]) for spec in specs)
+    rests = sum(
+        1 for spec in specs for step in spec["intervals"] if step.get("rest_interval")
+    )
+    return len(workouts), intervals + rests
+
+
+def init_worker():
+    django.setup()
+    # Never share the parent's database connection with a forked worker.
+    connections.close_all()
+
 
 class Command(BaseCommand):
     help = "Seeds the database with sample workout data."
 
-    def handle(self, *args, **kwargs):
-        self.seed_workouts()
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workouts",
+            type=int,
+            help="Generate this many synthetic workouts instead of the samples.",
+        )
+        parser.add_argument(
+            "--intervals-per-workout",
+            type=int,
+            default=8,
+            help="Steps per generated workout (rest intervals come on top).",
+        )
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=10,
+            help="Number of authors the generated workouts are spread over.",
+        )
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Random seed, for reproducible data."
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Workouts per bulk insert transaction.",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=1,
+            help="Worker processes generating batches in parallel.",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=365,
+            help="Spread created_at over this many past days.",
+        )
+
+    def handle(self, *args, **options):
+        if options["workouts"] is None:
+            self.seed_workouts()
+        else:
+            self.generate(**options)
+
+    def get_authors(self, count):
+        """Ids of the ``count`` seed users, creating whichever are missing."""
+        usernames = [f"seed-user-{i}" for i in range(count)]
+        existing = set(
+            User.objects.filter(username__in=usernames).values_list(
+                "username", flat=True
+            )
+        )
+        User.objects.bulk_create(
+            User(username=name, password="!")
+            for name in usernames
+            if name not in existing
+        )
+        return list(
+            User.objects.filter(username__in=usernames)
+            .order_by("username")
+            .values_list("pk", flat=True)
+        )
+
+    def generate(
+        self,
+        workouts,
+        intervals_per_workout,
+        users,
+        seed,
+        batch_size,
+        processes,
+        days,
+        **options,
+    ):
+        if workouts < 0 or intervals_per_workout < 1 or users < 1 or batch_size < 1:
+            raise CommandError(
+                "--workouts must be >= 0; --intervals-per-workout, --users and "
+                "--batch-size must be >= 1."
+            )
+
+        author_ids = self.get_authors(users)
+        batches = [
+            (
+                seed,
+                batch,
+                min(batch_size, workouts - start),
+                intervals_per_workout,
+                author_ids,
+                max(days, 1),
+            )
+            for batch, start in enumerate(range(0, workouts, batch_size))
+        ]
+
+        started = time.monotonic()
+        created_workouts = created_intervals = 0
+
+        def report(result):
+            nonlocal created_workouts, created_intervals
+            created_workouts += result[0]
+            created_intervals += result[1]
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f"{created_workouts}/{workouts} workouts, {created_intervals} "
+                f"intervals ({created_workouts / elapsed:.0f} workouts/s)"
+            )
+
+        if processes > 1:
+            connections.close_all()
+            with ProcessPoolExecutor(processes, initializer=init_worker) as pool:
+                for result in pool.map(generate_batch, *zip(*batches)):
+                    report(result)
+        else:
+            for batch in batches:
+                report(generate_batch(*batch))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {created_workouts} workouts with {created_intervals} "
+                f"intervals in {time.monotonic() - started:.1f}s."
+            )
+        )
 
     def seed_workouts(self):
-        author = (
-            User.objects.first()
-        )  # Replace with a specific user or adjust as needed
+        author = User.objects.first() or User.objects.create(
+            username="seed-user-0", password="!"
+        )
 
         # Create the first workout
         warmup1 = create_warmup(
@@ -41,7 +287,6 @@ class Command(BaseCommand):
             duration_type=BaseDuration.DurationType.DISTANCE,
             duration_unit=DistanceDuration.DistanceUnitChoices.MILES,
             interval_type=Interval.IntervalType.ACTIVE,
-            parent=warmup1,
         )
 
         repeat1 = create_repeat(
@@ -54,7 +299,6 @@ class Command(BaseCommand):
             duration_value=5,
             duration_type=BaseDuration.DurationType.TIME,
             duration_unit=TimeDuration.TimeUnitChoices.MINUTES,
-            parent=repeat1,
         )
 
         workout1 = build_workout(
@@ -77,7 +321,6 @@ class Command(BaseCommand):
             duration_type=BaseDuration.DurationType.POWER,
             duration_unit=PowerDuration.PowerUnitChoices.WATTS,
             interval_type=Interval.IntervalType.ACTIVE,
-            parent=warmup2,
         )
 
         repeat2 = create_repeat(
@@ -90,7 +333,6 @@ class Command(BaseCommand):
             duration_value=10,
             duration_type=BaseDuration.DurationType.TIME,
             duration_unit=TimeDuration.TimeUnitChoices.MINUTES,
-            parent=repeat2,
         )
 
         workout2 = build_workout(
@@ -0,0 +1,99 @@
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from workouts.instrumentation import (
+    collect_metrics,
+    current_metrics,
+    endpoint_stats,
+)
+
+logger = logging.getLogger("workouts.performance")
+
+
+class InstrumentationMiddleware:
+    """
+    Times every request and reports where the time went.
+
+    Adds a ``Server-Timing`` header (database, serialization, rendering and
+    total time), logs requests slower than ``PERFORMANCE_SLOW_REQUEST_MS``
+    with their most repeated SQL statements, and records each request in the
+    per-endpoint histograms of ``workouts.instrumentation.endpoint_stats``.
+    Disabled when ``PERFORMANCE_INSTRUMENTATION`` is false.
+
+    Supports both sync and async stacks so it never forces async views onto
+    a thread under ASGI.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "PERFORMANCE_INSTRUMENTATION", True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_request_ms = getattr(settings, "PERFORMANCE_SLOW_REQUEST_MS", 500)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with collect_metrics() as metrics:
+            response = self.get_response(request)
+            metrics.finish()
+        if self.report(request, response, metrics):
+            endpoint_stats.flush()
+        return response
+
+    async def __acall__(self, request):
+        with collect_metrics() as metrics:
+            response = await self.get_response(request)
+            metrics.finish()
+        if self.report(request, response, metrics):
+            # The flush talks to the cache; keep that off the event loop.
+            await sync_to_async(endpoint_stats.flush)()
+        return response
+
+    def report(self, request, response, metrics) -> bool:
+        """
+        Report on the request without any I/O but logging. Returns whether
+        ``endpoint_stats`` is due to be flushed.
+        """
+        response["Server-Timing"] = metrics.server_timing()
+        endpoint = self.endpoint(request)
+        if metrics.duration * 1e3 >= self.slow_request_ms:
+            self.log_slow_request(endpoint, request, metrics)
+        return endpoint_stats.record(endpoint, metrics)
+
+    def process_template_response(self, request, response):
+        # Called right before the handler renders the response, so the render
+        # time is the gap between here and the post-render callback.
+        metrics = current_metrics()
+        if metrics is not None:
+            started = time.perf_counter()
+            response.add_post_render_callback(
+                lambda response: metrics.add("render", time.perf_counter() - started)
+            )
+        return response
+
+    @staticmethod
+    def endpoint(request):
+        match = getattr(request, "resolver_match", None)
+        name = match.view_name if match is not None else "unresolved"
+        return f"{request.method} {name}"
+
+    def log_slow_request(self, endpoint, request, metrics):
+        lines = [
+            f"Slow request {endpoint} {request.get_full_path()}: "
+            f"{metrics.duration * 1e3:.0f}ms, {metrics.sql_count} queries in "
+            f"{metrics.sql_time * 1e3:.0f}ms"
+        ]
+        lines += [
+            f"  {count}x {seconds * 1e3:.1f}ms {statement}"
+            for statement, count, seconds in metrics.repeated_statements()
+        ]
+        logger.warning("\n".join(lines))
@@ -0,0 +1,134 @@
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+# BaseDuration.DurationType -> the multi-table subclass that used to hold it.
+DURATION_TABLES = {
+    1: "DistanceDuration",
+    2: "TimeDuration",
+    3: "CaloricDuration",
+    4: "HeartRateDuration",
+    5: "PowerDuration",
+}
+
+
+def copy_subclass_rows(apps, schema_editor):
+    """Fold each subclass table's rows into type/unit on the base table."""
+    BaseDuration = apps.get_model("workouts", "BaseDuration")
+    for duration_type, model_name in DURATION_TABLES.items():
+        Duration = apps.get_model("workouts", model_name)
+        unit = Duration.objects.filter(pk=OuterRef("pk")).values("unit")[:1]
+        BaseDuration.objects.filter(pk__in=Duration.objects.values("pk")).update(
+            type=duration_type, flat_unit=Subquery(unit)
+        )
+
+
+def restore_subclass_rows(apps, schema_editor):
+    ContentType = apps.get_model("contenttypes", "ContentType")
+    BaseDuration = apps.get_model("workouts", "BaseDuration")
+    quote = schema_editor.quote_name
+    base_table = BaseDuration._meta.db_table
+    for duration_type, model_name in DURATION_TABLES.items():
+        Duration = apps.get_model("workouts", model_name)
+        ctype, _ = ContentType.objects.get_or_create(
+            app_label="workouts", model=model_name.lower()
+        )
+        BaseDuration.objects.filter(type=duration_type).update(polymorphic_ctype=ctype)
+        schema_editor.execute(
+            f"INSERT INTO {quote(Duration._meta.db_table)} "
+            f"({quote('baseduration_ptr_id')}, {quote('unit')}) "
+            f"SELECT {quote('id')}, {quote('flat_unit')} FROM {quote(base_table)} "
+            f"WHERE {quote('type')} = %s",
+            [duration_type],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("workouts", "0002_workout_created_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="baseduration",
+            name="type",
+            field=models.PositiveSmallIntegerField(
+                choices=[
+                    (1, "DISTANCE"),
+                    (2, "TIME"),
+                    (3, "CALORIC"),
+                    (4, "HEART_RATE"),
+                    (5, "POWER"),
+                ],
+                null=True,
+            ),
+        ),
+        # Named flat_unit until the subclass tables, which each have their
+        # own "unit" field, are gone.
+        migrations.AddField(
+            model_name="baseduration",
+            name="flat_unit",
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+        migrations.RunPython(copy_subclass_rows, restore_subclass_rows),
+        migrations.DeleteModel(name="CaloricDuration"),
+        migrations.DeleteModel(name="DistanceDuration"),
+        migrations.DeleteModel(name="HeartRateDuration"),
+        migrations.DeleteModel(name="PowerDuration"),
+        migrations.DeleteModel(name="TimeDuration"),
+        migrations.RemoveField(model_name="baseduration", name="polymorphic_ctype"),
+        migrations.RenameField(
+            model_name="baseduration", old_name="flat_unit", new_name="unit"
+        ),
+        migrations.AlterModelOptions(name="baseduration", options={}),
+        migrations.AlterField(
+            model_name="baseduration",
+            name="type",
+            field=models.PositiveSmallIntegerField(
+                choices=[
+                    (1, "DISTANCE"),
+                    (2, "TIME"),
+                    (3, "CALORIC"),
+                    (4, "HEART_RATE"),
+                    (5, "POWER"),
+                ]
+            ),
+        ),
+        migrations.AlterField(
+            model_name="baseduration",
+            name="unit",
+            field=models.PositiveSmallIntegerField(),
+        ),
+        migrations.CreateModel(
+            name="CaloricDuration",
+            fields=[],
+            options={"proxy": True, "indexes": [], "constraints": []},
+            bases=("workouts.baseduration",),
+        ),
+        migrations.CreateModel(
+            name="DistanceDuration",
+            fields=[],
+            options={"proxy": True, "indexes": [], "constraints": []},
+            bases=("workouts.baseduration",),
+        ),
+        migrations.CreateModel(
+            name="HeartRateDuration",
+            fields=[],
+            options={"proxy": True, "indexes": [], "constraints": []},
+            bases=("workouts.baseduration",),
+        ),
+        migrations.CreateModel(
+            name="PowerDuration",
+            fields=[],
+            options={"proxy": True, "indexes": [], "constraints": []},
+            bases=("workouts.baseduration",),
+        ),
+        migrations.CreateModel(
+            name="TimeDuration",
+            fields=[],
+            options={"proxy": True, "indexes": [], "constraints": []},
+            bases=("workouts.baseduration",),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.1 on 2026-10-18 16:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0003_single_table_durations'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workout',
+            name='total_distance',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Total distance in meters, repeats and rests included.', max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='workout',
+            name='total_time',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Total time in seconds, repeats and rests included.', max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='workout',
+            name='total_work',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Total work in joules, repeats and rests included.', max_digits=14),
+        ),
+        migrations.AddIndex(
+            model_name='workout',
+            index=models.Index(fields=['total_time'], name='workout_total_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workout',
+            index=models.Index(fields=['total_distance'], name='workout_total_distance_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workout',
+            index=models.Index(fields=['total_work'], name='workout_total_work_idx'),
+        ),
+    ]
@@ -0,0 +1,127 @@
+from itertools import groupby
+from types import SimpleNamespace
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from workouts.ordering import order_intervals
+
+# workouts.positions.GAP
+GAP = 1 << 16
+
+BATCH_SIZE = 1000
+
+
+def number_steps(apps, schema_editor):
+    """Give each workout's steps positions in their ``parent`` chain order."""
+    WorkoutStep = apps.get_model("workouts", "WorkoutStep")
+    rows = (
+        WorkoutStep.objects.order_by("workout_id", "id")
+        .values_list("id", "workout_id", "interval_id", "interval__parent")
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    batch = []
+    for _, workout_rows in groupby(rows, key=lambda row: row[1]):
+        links = [
+            SimpleNamespace(step=step, pk=interval, parent=parent)
+            for step, _, interval, parent in workout_rows
+        ]
+        for index, link in enumerate(order_intervals(links)):
+            batch.append(WorkoutStep(pk=link.step, position=GAP * (index + 1)))
+        if len(batch) >= BATCH_SIZE:
+            WorkoutStep.objects.bulk_update(batch, ["position"])
+            batch = []
+    WorkoutStep.objects.bulk_update(batch, ["position"], batch_size=BATCH_SIZE)
+
+
+def link_parents(apps, schema_editor):
+    """Point each step's ``parent`` at the step before it."""
+    Interval = apps.get_model("workouts", "Interval")
+    WorkoutStep = apps.get_model("workouts", "WorkoutStep")
+    rows = (
+        WorkoutStep.objects.order_by("workout_id", "position")
+        .values_list("workout_id", "interval_id")
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    batch = []
+    for _, workout_rows in groupby(rows, key=lambda row: row[0]):
+        parent = None
+        for _, interval in workout_rows:
+            batch.append(Interval(pk=interval, parent=parent))
+            parent = interval
+        if len(batch) >= BATCH_SIZE:
+            Interval.objects.bulk_update(batch, ["parent"])
+            batch = []
+    Interval.objects.bulk_update(batch, ["parent"], batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("workouts", "0005_workout_filter_indexes"),
+    ]
+
+    operations = [
+        # Adopt the auto-created many-to-many table as an explicit model.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name="WorkoutStep",
+                    fields=[
+                        (
+                            "id",
+                            models.BigAutoField(
+                                auto_created=True,
+                                primary_key=True,
+                                serialize=False,
+                                verbose_name="ID",
+                            ),
+                        ),
+                        (
+                            "interval",
+                            models.ForeignKey(
+                                on_delete=django.db.models.deletion.CASCADE,
+                                related_name="workout_steps",
+                                to="workouts.interval",
+                            ),
+                        ),
+                        (
+                            "workout",
+                            models.ForeignKey(
+                                on_delete=django.db.models.deletion.CASCADE,
+                                related_name="steps",
+                                to="workouts.workout",
+                            ),
+                        ),
+                    ],
+                    options={
+                        "db_table": "workouts_workout_intervals",
+                        "unique_together": {("workout", "interval")},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name="workout",
+                    name="intervals",
+                    field=models.ManyToManyField(
+                        related_name="workouts",
+                        through="workouts.WorkoutStep",
+                        to="workouts.interval",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="workoutstep",
+            name="position",
+            field=models.BigIntegerField(default=0),
+            preserve_default=False,
+        ),
+        migrations.RunPython(number_steps, link_parents),
+        migrations.AddIndex(
+            model_name="workoutstep",
+            index=models.Index(
+                fields=["workout", "position"], name="workout_step_position_idx"
+            ),
+        ),
+        migrations.RemoveField(model_name="interval", name="parent"),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations, models
+
+from workouts.dedupe import dedupe_durations
+
+
+def dedupe(apps, schema_editor):
+    """Collapse duplicate durations so the unique constraint can be added."""
+    dedupe_durations(
+        apps.get_model("workouts", "BaseDuration"),
+        apps.get_model("workouts", "Interval"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("workouts", "0006_workout_step_positions"),
+    ]
+
+    operations = [
+        # Copies deleted here cannot be told apart again: nothing to undo.
+        migrations.RunPython(dedupe, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="baseduration",
+            constraint=models.UniqueConstraint(
+                fields=("type", "value", "unit"), name="duration_type_value_unit_uniq"
+            ),
+        ),
+    ]
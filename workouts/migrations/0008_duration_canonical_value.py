@@ -0,0 +1,36 @@
+from django.db import migrations, models
+
+from workouts.units import backfill_canonical_values
+
+
+def backfill(apps, schema_editor):
+    backfill_canonical_values(apps.get_model("workouts", "BaseDuration"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("workouts", "0007_intern_durations"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="baseduration",
+            name="canonical_value",
+            field=models.DecimalField(
+                decimal_places=6,
+                editable=False,
+                help_text="The value in the canonical SI unit of its type "
+                "(workouts.units); null for heart rates.",
+                max_digits=20,
+                null=True,
+            ),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="baseduration",
+            index=models.Index(
+                fields=["type", "canonical_value"], name="duration_canonical_idx"
+            ),
+        ),
+    ]
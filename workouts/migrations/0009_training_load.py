@@ -0,0 +1,107 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from workouts.loads import rebuild_loads
+
+
+def rebuild(apps, schema_editor):
+    rebuild_loads(
+        apps.get_model("workouts", "Workout"),
+        apps.get_model("workouts", "TrainingLoad"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("workouts", "0008_duration_canonical_value"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TrainingLoad",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "period",
+                    models.PositiveSmallIntegerField(
+                        choices=[(1, "Week"), (2, "Month")]
+                    ),
+                ),
+                (
+                    "period_start",
+                    models.DateField(
+                        help_text="The Monday of the week or the first day of "
+                        "the month, in TIME_ZONE."
+                    ),
+                ),
+                (
+                    "workout_type",
+                    models.PositiveSmallIntegerField(
+                        choices=[(1, "Run"), (2, "Swim"), (3, "Cycle")]
+                    ),
+                ),
+                ("workouts", models.PositiveIntegerField(default=0)),
+                (
+                    "total_time",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        help_text="Total time in seconds.",
+                        max_digits=16,
+                    ),
+                ),
+                (
+                    "total_distance",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        help_text="Total distance in meters.",
+                        max_digits=16,
+                    ),
+                ),
+                (
+                    "total_work",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        help_text="Total work in joules.",
+                        max_digits=18,
+                    ),
+                ),
+                (
+                    "author",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="training_loads",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["period", "period_start"],
+                        name="training_load_period_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("author", "period", "period_start", "workout_type"),
+                        name="training_load_uniq",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(rebuild, migrations.RunPython.noop),
+    ]
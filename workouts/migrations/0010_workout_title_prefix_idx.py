@@ -0,0 +1,19 @@
+# Generated by Django 5.1 on 2026-10-18 18:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0009_training_load'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='workout',
+            index=models.Index(fields=['title'], name='workout_title_prefix_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1 on 2026-10-18 18:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_title_nocase_index(apps, schema_editor):
+    """
+    SQLite's LIKE ignores ASCII case, so it can only search an index in the
+    NOCASE collation. Other backends use ``workout_title_prefix_idx``.
+
+    Django does not know about this index, so a later migration that remakes
+    the table on SQLite drops it; ``test_filters_use_an_index`` notices.
+    """
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute(
+            'CREATE INDEX "workout_title_nocase_idx" '
+            'ON "workouts_workout" ("title" COLLATE NOCASE)'
+        )
+
+
+def drop_title_nocase_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute('DROP INDEX IF EXISTS "workout_title_nocase_idx"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0010_workout_title_prefix_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='workout',
+            index=models.Index(fields=['updated_at', 'created_at', 'id'], name='workout_updated_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workout',
+            index=models.Index(fields=['author', 'updated_at', 'id'], name='workout_author_updated_idx'),
+        ),
+        migrations.RunPython(create_title_nocase_index, drop_title_nocase_index),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1 on 2026-10-18 18:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0011_workout_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='interval',
+            name='duration',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='intervals', to='workouts.baseduration'),
+        ),
+    ]
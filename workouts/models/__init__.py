@@ -1,4 +1,4 @@
-from .workout import Workout
+from .workout import Workout, WorkoutStep
 from .interval import Interval
 from .duration import (
     BaseDuration,
@@ -7,14 +7,17 @@ from .duration import (
     CaloricDuration,
     HeartRateDuration,
 )
+from .load import TrainingLoad
 
 
 __all__ = [
     "Workout",
+    "WorkoutStep",
     "Interval",
     "BaseDuration",
     "DistanceDuration",
     "TimeDuration",
     "CaloricDuration",
     "HeartRateDuration",
+    "TrainingLoad",
 ]
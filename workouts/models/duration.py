@@ -1,8 +1,188 @@
-from django.db import models
-from polymorphic.models import PolymorphicModel
+from decimal import Decimal
+from functools import reduce, wraps
+from operator import or_
 
+from django.db import IntegrityError, models, router, transaction
 
-class BaseDuration(PolymorphicModel):
+from workouts import units
+
+CENTS = Decimal("0.01")
+
+# Keys per lookup query, so its parameters stay within SQLite's limits.
+LOOKUP_BATCH_SIZE = 300
+
+
+def duration_key(duration_type, value, unit) -> tuple:
+    """The ``(type, value, unit)`` a duration is interned under."""
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    return (int(duration_type), value.quantize(CENTS), int(unit))
+
+
+class DurationInterner:
+    """
+    Get-or-create of durations by ``(type, value, unit)``.
+
+    Durations are values: the unique ``duration_type_value_unit_uniq``
+    constraint keeps one row per key, shared by every interval with that
+    duration. ``pks`` caches the row of each key this process has seen, so
+    interning durations that were seen before costs no query; the others cost
+    one lookup, plus an insert and a second lookup for keys that are new.
+
+    Keys are only cached once the transaction that found or created their row
+    commits, so a rollback cannot leave the cache pointing at a missing row.
+    The cache is dropped when it grows past ``max_size``, and when a duration
+    is deleted through the ORM in this process. Rows deleted elsewhere (by
+    ``dedupe_durations`` in particular) are only noticed when a write using
+    them fails; see ``retry_stale_durations``. Restart workers after a dedupe.
+    """
+
+    max_size = 100_000
+
+    def __init__(self):
+        self.pks = {}
+
+    def clear(self) -> None:
+        self.pks = {}
+
+    def remember(self, pks: dict, using) -> None:
+        def store():
+            if len(self.pks) + len(pks) > self.max_size:
+                self.clear()
+            self.pks.update(pks)
+
+        transaction.on_commit(store, using=using)
+
+    def lookup(self, keys) -> dict:
+        """
+        ``{key: pk}`` of the rows already stored for ``keys``: the lowest pk
+        of each, the copy ``dedupe_durations`` keeps, where there are several
+        (before migration 0007).
+        """
+        keys = list(keys)
+        found = {}
+        for start in range(0, len(keys), LOOKUP_BATCH_SIZE):
+            batch = keys[start : start + LOOKUP_BATCH_SIZE]
+            condition = reduce(
+                or_,
+                (
+                    models.Q(type=duration_type, value=value, unit=unit)
+                    for duration_type, value, unit in batch
+                ),
+            )
+            rows = BaseDuration.objects.filter(condition).values_list(
+                "pk", "type", "value", "unit"
+            )
+            for pk, *key in rows:
+                key = duration_key(*key)
+                found[key] = min(pk, found.get(key, pk))
+        return found
+
+    def intern_many(self, specs) -> list["BaseDuration"]:
+        """
+        The durations of ``(duration_type, value, unit)`` ``specs``, in order,
+        each as the proxy subclass matching its type; missing rows are created.
+        """
+        keys = [duration_key(*spec) for spec in specs]
+        pks = {key: self.pks[key] for key in keys if key in self.pks}
+        missing = set(keys) - set(pks)
+        if missing:
+            found = self.lookup(missing)
+            new = missing - set(found)
+            if new:
+                # A concurrent writer may insert the same keys: skip them
+                # rather than fail, and read back whichever row won.
+                BaseDuration.objects.bulk_create(
+                    (
+                        BaseDuration(
+                            type=t,
+                            value=v,
+                            unit=u,
+                            canonical_value=units.canonical_value(t, v, u),
+                        )
+                        for t, v, u in new
+                    ),
+                    ignore_conflicts=True,
+                )
+                found.update(self.lookup(new))
+            pks.update(found)
+            self.remember(found, router.db_for_write(BaseDuration))
+        return [
+            BaseDuration.get_duration_model(key[0])(
+                pk=pks[key],
+                type=key[0],
+                value=key[1],
+                unit=key[2],
+                canonical_value=units.canonical_value(*key),
+            )
+            for key in keys
+        ]
+
+
+duration_interner = DurationInterner()
+
+
+def retry_stale_durations(function):
+    """
+    Run ``function``, which writes rows referencing interned durations in its
+    own transaction, once more with an empty interning cache if it fails
+    with an ``IntegrityError``: a cached duration may have been deleted by
+    another process since.
+
+    Foreign keys are checked when the transaction commits on PostgreSQL and
+    SQLite, so the retry only helps where ``function``'s transaction is the
+    outermost one.
+    """
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        try:
+            return function(*args, **kwargs)
+        except IntegrityError:
+            if not duration_interner.pks:
+                raise
+            duration_interner.clear()
+            return function(*args, **kwargs)
+
+    return wrapper
+
+
+class DurationManager(models.Manager):
+    """Limits a duration subclass's queries to rows of its own type."""
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.model.duration_type is not None:
+            queryset = queryset.filter(type=self.model.duration_type)
+        return queryset
+
+    def intern(self, value, unit=None, duration_type=None) -> "BaseDuration":
+        """
+        The shared duration of ``value`` in ``unit`` (the model's default
+        unit when None), creating it if no interval has used it yet.
+        """
+        duration_type = duration_type or self.model.duration_type
+        if unit is None:
+            unit = BaseDuration.get_duration_model(duration_type).default_unit
+        return duration_interner.intern_many([(duration_type, value, unit)])[0]
+
+
+class BaseDuration(models.Model):
+    """
+    A duration stored in a single table.
+
+    Every kind of duration lives in one row holding a ``type`` discriminator,
+    the ``value`` and its ``unit``. The subclasses below are proxy models: rows
+    loaded through any manager or relation come back as the subclass matching
+    their ``type``, so subclass behaviour (``unit`` choices,
+    ``duration_string``, ``converted_value``) is kept without a join or a
+    query per subclass.
+
+    Rows are interned: there is one per ``(type, value, unit)``, shared by all
+    intervals of that duration. Get them with ``objects.intern`` (or
+    ``duration_interner.intern_many`` in bulk) rather than creating them, and
+    give an interval a different duration instead of editing a shared one.
+    """
 
     class DurationType(models.IntegerChoices):
         DISTANCE = 1, "DISTANCE"
@@ -11,14 +191,73 @@ class BaseDuration(PolymorphicModel):
         HEART_RATE = 4, "HEART_RATE"
         POWER = 5, "POWER"
 
+    type = models.PositiveSmallIntegerField(choices=DurationType.choices)
     value = models.DecimalField(max_digits=10, decimal_places=2)
+    unit = models.PositiveSmallIntegerField()
+    # Derived from the three above on save, for sorting, range filters and
+    # totals in SQL across units.
+    canonical_value = models.DecimalField(
+        max_digits=units.CANONICAL_MAX_DIGITS,
+        decimal_places=units.CANONICAL_DECIMAL_PLACES,
+        null=True,
+        editable=False,
+        help_text="The value in the canonical SI unit of its type (workouts.units);"
+        " null for heart rates.",
+    )
+
+    # Set by the proxy subclasses. ``total_field`` is the ``Workout`` total the
+    # duration adds up into and ``unit_factors`` convert each unit to the
+    # canonical unit, which is the total's.
+    duration_type = None
+    unit_choices = None
+    default_unit = None
+    total_field = None
+    unit_factors = {}
+
+    objects = DurationManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["type", "value", "unit"], name="duration_type_value_unit_uniq"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["type", "canonical_value"], name="duration_canonical_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.value} {self.unit}"
 
-    @property
-    def unit(self):
-        raise NotImplementedError
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Swap in the proxy class for the row's type. Proxies share the
+        # concrete model's fields, so only the behaviour changes.
+        duration_type = instance.__dict__.get("type")
+        model = cls.get_duration_model(duration_type) if duration_type else None
+        if model is not None and model is not cls:
+            instance.__class__ = model
+        return instance
+
+    def normalized_value(self):
+        """The value in the unit of ``total_field``, or None if not a total."""
+        if self.total_field is None:
+            return None
+        return units.canonical_value(self.duration_type, self.value, self.unit)
+
+    def save(self, *args, **kwargs):
+        if self.duration_type is not None:
+            self.type = self.duration_type
+            if self.unit is None:
+                self.unit = self.default_unit
+        self.canonical_value = units.canonical_value(self.type, self.value, self.unit)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "canonical_value"}
+        super().save(*args, **kwargs)
 
     @staticmethod
     def get_duration_model(duration_type: DurationType):
@@ -33,6 +272,7 @@ class BaseDuration(PolymorphicModel):
 
 
 class DistanceDuration(BaseDuration):
+    duration_type = BaseDuration.DurationType.DISTANCE
     duration_string = BaseDuration.DurationType.DISTANCE.name
 
     class DistanceUnitChoices(models.IntegerChoices):
@@ -40,12 +280,17 @@ class DistanceDuration(BaseDuration):
         KILOMETERS = 2, "Kilometers"
         METERS = 3, "Meters"
 
-    unit = models.PositiveSmallIntegerField(
-        choices=DistanceUnitChoices.choices, default=DistanceUnitChoices.MILES
-    )
+    unit_choices = DistanceUnitChoices
+    default_unit = DistanceUnitChoices.MILES
+    total_field = "total_distance"
+    unit_factors = units.UNIT_FACTORS[units.DISTANCE]
+
+    class Meta:
+        proxy = True
 
 
 class TimeDuration(BaseDuration):
+    duration_type = BaseDuration.DurationType.TIME
     duration_string = BaseDuration.DurationType.TIME.name
 
     class TimeUnitChoices(models.IntegerChoices):
@@ -53,50 +298,64 @@ class TimeDuration(BaseDuration):
         MINUTES = 2, "Minutes"
         HOURS = 3, "Hours"
 
-    unit = models.PositiveSmallIntegerField(
-        choices=TimeUnitChoices.choices, default=TimeUnitChoices.MINUTES
-    )
+    unit_choices = TimeUnitChoices
+    default_unit = TimeUnitChoices.MINUTES
+    total_field = "total_time"
+    unit_factors = units.UNIT_FACTORS[units.TIME]
+
+    class Meta:
+        proxy = True
 
     def converted_value(self):
-        if self.unit == self.TimeUnitChoices.SECONDS:
-            return self.value / 60
-        elif self.unit == self.TimeUnitChoices.MINUTES:
-            return self.value
-        elif self.unit == self.TimeUnitChoices.HOURS:
-            return self.value * 60
+        """The value in minutes."""
+        return units.convert(
+            units.TIME, self.value, self.unit, self.TimeUnitChoices.MINUTES
+        )
 
 
 class CaloricDuration(BaseDuration):
+    duration_type = BaseDuration.DurationType.CALORIC
     duration_string = BaseDuration.DurationType.CALORIC.name
 
     class CaloricUnitChoices(models.IntegerChoices):
         CALORIES = 1, "Calories"
         KJ = 2, "Kilocalories"
 
-    unit = models.PositiveSmallIntegerField(
-        choices=CaloricUnitChoices, default=CaloricUnitChoices.CALORIES
-    )
+    unit_choices = CaloricUnitChoices
+    default_unit = CaloricUnitChoices.CALORIES
+    total_field = "total_work"
+    unit_factors = units.UNIT_FACTORS[units.CALORIC]
+
+    class Meta:
+        proxy = True
 
 
 class HeartRateDuration(BaseDuration):
+    duration_type = BaseDuration.DurationType.HEART_RATE
     duration_string = BaseDuration.DurationType.HEART_RATE.name
 
     class HeartRateUnitChoices(models.IntegerChoices):
         BPM = 1, "Beats Per Minute"
         PERCENT = 2, "Percentage"
 
-    unit = models.PositiveSmallIntegerField(
-        choices=HeartRateUnitChoices, default=HeartRateUnitChoices.BPM
-    )
+    unit_choices = HeartRateUnitChoices
+    default_unit = HeartRateUnitChoices.BPM
+
+    class Meta:
+        proxy = True
 
 
 class PowerDuration(BaseDuration):
+    duration_type = BaseDuration.DurationType.POWER
     duration_string = BaseDuration.DurationType.POWER.name
 
     class PowerUnitChoices(models.IntegerChoices):
         WATTS = 1, "Watts"
         KJ = 2, "Kilowatts"
 
-    unit = models.PositiveSmallIntegerField(
-        choices=PowerUnitChoices, default=PowerUnitChoices.WATTS
-    )
+    unit_choices = PowerUnitChoices
+    default_unit = PowerUnitChoices.WATTS
+    unit_factors = units.UNIT_FACTORS[units.POWER]
+
+    class Meta:
+        proxy = True
@@ -1,5 +1,5 @@
 from typing import Optional, Union
-from django.db import models
+from django.db import models, transaction
 
 
 from workouts.models.duration import (
@@ -27,18 +27,15 @@ class Interval(models.Model):
         choices=IntervalType.choices, default=IntervalType.ACTIVE
     )
 
+    # Durations are interned and shared across workouts, so deleting one
+    # must not take other workouts' intervals with it.
     duration = models.ForeignKey(
-        BaseDuration, on_delete=models.CASCADE, related_name="intervals"
+        BaseDuration, on_delete=models.PROTECT, related_name="intervals"
     )
 
     perceived_effort = models.PositiveSmallIntegerField(
         choices=EFFORT_CHOICES, blank=True, null=True
     )
-    parent = models.PositiveIntegerField(
-        blank=True,
-        null=True,
-        help_text="This will serve as a pointer to the parent intervals PK.",
-    )
     repititions = models.PositiveIntegerField(default=0, blank=True, null=True)
     rest_interval = models.OneToOneField(
         "Interval", on_delete=models.CASCADE, related_name="repeat_interval", null=True
@@ -48,9 +45,19 @@ class Interval(models.Model):
         return self.repititions > 0
 
     def delete(self, *args, **kwargs):
-        # link the parent to the next interval
-
-        super().delete(*args, **kwargs)
+        """
+        Delete the interval along with its rest interval, unless that is also
+        a step of some workout. Order is kept by ``WorkoutStep.position``, so
+        the steps around it need no relinking.
+        """
+        rest_interval_id = self.rest_interval_id
+        with transaction.atomic():
+            deleted = super().delete(*args, **kwargs)
+            if rest_interval_id is not None:
+                Interval.objects.filter(
+                    pk=rest_interval_id, workout_steps__isnull=True
+                ).delete()
+        return deleted
 
     def __str__(self):
         return f"{self.type} - {self.duration}"
@@ -0,0 +1,70 @@
+from django.contrib.auth.models import User
+from django.db import models
+
+from workouts.models.workout import Workout
+
+
+class TrainingLoad(models.Model):
+    """
+    An athlete's training volume over a week or a month, per workout type.
+
+    A materialized aggregate of ``Workout`` rows (their count and the sums of
+    their totals), grouped by author, period and workout type. It is kept
+    current by ``workouts.loads`` and never edited directly.
+    """
+
+    class Period(models.IntegerChoices):
+        WEEK = 1, "Week"
+        MONTH = 2, "Month"
+
+    author = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="training_loads"
+    )
+    period = models.PositiveSmallIntegerField(choices=Period.choices)
+    period_start = models.DateField(
+        help_text="The Monday of the week or the first day of the month, in "
+        "TIME_ZONE."
+    )
+    workout_type = models.PositiveSmallIntegerField(
+        choices=Workout.WorkoutType.choices
+    )
+    workouts = models.PositiveIntegerField(default=0)
+    total_time = models.DecimalField(
+        max_digits=16,
+        decimal_places=2,
+        default=0,
+        help_text="Total time in seconds.",
+    )
+    total_distance = models.DecimalField(
+        max_digits=16,
+        decimal_places=2,
+        default=0,
+        help_text="Total distance in meters.",
+    )
+    total_work = models.DecimalField(
+        max_digits=18,
+        decimal_places=2,
+        default=0,
+        help_text="Total work in joules.",
+    )
+
+    class Meta:
+        constraints = [
+            # Also the index of an athlete's range queries.
+            models.UniqueConstraint(
+                fields=["author", "period", "period_start", "workout_type"],
+                name="training_load_uniq",
+            ),
+        ]
+        indexes = [
+            # Range queries over every athlete.
+            models.Index(
+                fields=["period", "period_start"], name="training_load_period_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.author_id}: {self.get_workout_type_display()} "
+            f"{self.get_period_display().lower()} of {self.period_start}"
+        )
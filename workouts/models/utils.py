@@ -7,14 +7,21 @@ from workouts.models.duration import (
     HeartRateDuration,
     PowerDuration,
     TimeDuration,
+    duration_interner,
+    retry_stale_durations,
 )
 from workouts.models.interval import Interval
 
 from django.contrib.auth.models import User
 
-from workouts.models.workout import Workout
+from workouts.loads import load_keys, refresh_loads
+from workouts.positions import initial_positions, lock_workout
 
+from workouts.models.workout import Workout, WorkoutStep
+from workouts.totals import TOTAL_FIELDS, recompute_totals, workout_totals
 
+
+@retry_stale_durations
 def create_warmup(
     duration_value: int,
     duration_type: BaseDuration.DurationType,
@@ -26,9 +33,9 @@ def create_warmup(
         HeartRateDuration.HeartRateUnitChoices,
     ],
 ) -> Interval:
-    """Create a warm-up interval with the given duration and order."""
+    """Create a warm-up interval with the given duration."""
     model = BaseDuration.get_duration_model(duration_type)
-    warmup_duration = model.objects.create(value=duration_value, unit=duration_unit)
+    warmup_duration = model.objects.intern(duration_value, duration_unit)
     warmup_interval = Interval.objects.create(
         type=Interval.IntervalType.WARMUP,
         duration=warmup_duration,
@@ -36,6 +43,7 @@ def create_warmup(
     return warmup_interval
 
 
+@retry_stale_durations
 def create_cool_down(
     duration_value: int,
     duration_type: BaseDuration.DurationType,
@@ -46,21 +54,18 @@ def create_cool_down(
         CaloricDuration.CaloricUnitChoices,
         HeartRateDuration.HeartRateUnitChoices,
     ],
-    parent: Optional[int] = None,
 ) -> Interval:
-    """Create a cool-down interval with the given duration and order."""
+    """Create a cool-down interval with the given duration."""
     model = BaseDuration.get_duration_model(duration_type)
-    cool_down_duration = model.objects.create(value=duration_value, unit=duration_unit)
+    cool_down_duration = model.objects.intern(duration_value, duration_unit)
     cool_down_interval = Interval.objects.create(
         type=Interval.IntervalType.COOLDOWN,
         duration=cool_down_duration,
     )
-    if parent:
-        cool_down_interval.parent = parent.pk
-        cool_down_interval.save()
     return cool_down_interval
 
 
+@retry_stale_durations
 def create_interval(
     duration_value: int,
     duration_type: BaseDuration.DurationType,
@@ -72,15 +77,11 @@ def create_interval(
         HeartRateDuration.HeartRateUnitChoices,
     ],
     interval_type: Interval.IntervalType,
-    parent: Optional[int] = None,
 ) -> Interval:
-    """Create an interval with the given duration and order."""
+    """Create an interval with the given duration."""
     model = BaseDuration.get_duration_model(duration_type)
-    interval_duration = model.objects.create(value=duration_value, unit=duration_unit)
+    interval_duration = model.objects.intern(duration_value, duration_unit)
     interval = Interval.objects.create(type=interval_type, duration=interval_duration)
-    if parent:
-        interval.parent = parent.pk
-        interval.save()
     return interval
 
 
@@ -89,7 +90,7 @@ def create_repeat(
     repititions: int = 2,
     rest_interval: Interval = None,
 ) -> Interval:
-    """Create a repeat interval with the given duration and order."""
+    """Turn ``interval`` into a repeat with an optional rest interval."""
 
     interval.repititions = repititions
     interval.rest_interval = rest_interval
@@ -106,19 +107,20 @@ def build_workout(
     intervals: list[Interval],
 ) -> Workout:
     """
-    Build a workout with the specified first and last intervals.
+    Build a workout from existing intervals.
 
     Args:
         author (User): The user creating the workout.
         title (str): The title of the workout.
         description (str): A brief description of the workout.
     workout_type (Workout.WorkoutType): The type of workout (Run, Swim, Cycle).
-        first_interval (Interval): The first interval in the workout.
-        last_interval (Interval): The last interval in the workout.
+        intervals (list[Interval]): The steps of the workout, in order.
 
     Returns:
         Workout: The created workout instance.
     """
+    # The same interval listed twice is one step, at its first place.
+    intervals = list(dict.fromkeys(intervals))
     with transaction.atomic():
         workout = Workout.objects.create(
             author=author,
@@ -127,6 +129,152 @@ def build_workout(
             workout_type=workout_type,
         )
         if intervals:
-            workout.intervals.add(*intervals)
+            WorkoutStep.objects.bulk_create(
+                WorkoutStep(workout=workout, interval=interval, position=position)
+                for interval, position in zip(
+                    intervals, initial_positions(len(intervals))
+                )
+            )
+            recompute_totals([workout.pk])
+            refresh_loads(load_keys([workout]))
+            workout.refresh_from_db(fields=TOTAL_FIELDS)
 
     return workout
+
+
+def bulk_create_durations(specs: list[tuple]) -> list[BaseDuration]:
+    """
+    The interned ``(duration_type, value, unit)`` durations, creating the
+    missing ones with a single insert.
+
+    Each duration is returned as the proxy subclass matching its type.
+    """
+    return duration_interner.intern_many(specs)
+
+
+def bulk_create_steps(steps: list[dict]) -> list[Interval]:
+    """
+    Create the intervals of ``steps`` (see :func:`bulk_build_workouts`) with
+    their durations and rest intervals, in at most five queries (three when
+    every duration has been interned before).
+    """
+    rests = [step["rest_interval"] for step in steps if step.get("rest_interval")]
+
+    def duration_spec(step):
+        return (step["duration_type"], step["duration_value"], step["duration_unit"])
+
+    def build_interval(step, duration, **kwargs):
+        return Interval(
+            type=step.get("interval_type", Interval.IntervalType.ACTIVE),
+            duration=duration,
+            perceived_effort=step.get("perceived_effort"),
+            **kwargs,
+        )
+
+    durations = bulk_create_durations(
+        [duration_spec(step) for step in steps] + [duration_spec(r) for r in rests]
+    )
+    step_durations, rest_durations = durations[: len(steps)], durations[len(steps) :]
+
+    rest_intervals = iter(
+        Interval.objects.bulk_create(
+            build_interval(rest, duration)
+            for rest, duration in zip(rests, rest_durations)
+        )
+    )
+    return Interval.objects.bulk_create(
+        build_interval(
+            step,
+            duration,
+            repititions=step.get("repititions") or 0,
+            rest_interval=next(rest_intervals) if step.get("rest_interval") else None,
+        )
+        for step, duration in zip(steps, step_durations)
+    )
+
+
+@retry_stale_durations
+def bulk_build_workouts(workouts: list[dict]) -> list[Workout]:
+    """
+    Create whole workouts, steps included, in a single transaction.
+
+    Each item holds the ``Workout`` fields (``author``, ``title``,
+    ``description``, ``workout_type``) and an ordered ``intervals`` list. A step
+    takes the same arguments as :func:`create_interval` (``duration_value``,
+    ``duration_type``, ``duration_unit``, ``interval_type``) plus optional
+    ``perceived_effort``, ``repititions`` and a nested ``rest_interval`` step.
+
+    The number of queries does not depend on how many workouts or steps are
+    created: rest intervals, steps and workouts (with their totals) are each
+    one ``bulk_create``, the positioned workout steps one more, and durations
+    are interned by :func:`bulk_create_durations`. The authors' training
+    loads are refreshed by ``workouts.loads.refresh_loads``.
+    """
+    steps = []  # (workout index, step spec)
+    for index, spec in enumerate(workouts):
+        steps.extend((index, step) for step in spec.get("intervals", ()))
+
+    with transaction.atomic():
+        intervals = bulk_create_steps([step for _, step in steps])
+
+        # Totals come from the in-memory steps, so they cost no extra query.
+        steps_by_workout = [[] for _ in workouts]
+        for (index, _), interval in zip(steps, intervals):
+            steps_by_workout[index].append(interval)
+        created = Workout.objects.bulk_create(
+            Workout(
+                author=spec["author"],
+                title=spec["title"],
+                description=spec.get("description", ""),
+                workout_type=spec.get("workout_type", Workout.WorkoutType.RUN),
+                **workout_totals(workout_steps),
+            )
+            for spec, workout_steps in zip(workouts, steps_by_workout)
+        )
+
+        WorkoutStep.objects.bulk_create(
+            WorkoutStep(workout=workout, interval=interval, position=position)
+            for workout, workout_steps in zip(created, steps_by_workout)
+            for interval, position in zip(
+                workout_steps, initial_positions(len(workout_steps))
+            )
+        )
+        refresh_loads(load_keys(created))
+
+    return created
+
+
+def replace_steps(workout: Workout, steps: list[dict]) -> list[Interval]:
+    """
+    Replace every step of ``workout`` with new intervals built from ``steps``
+    (see :func:`bulk_build_workouts`), in position order.
+
+    The intervals of the old steps are deleted unless another workout shares
+    them, and so are their rest intervals, as ``Interval.delete`` does.
+    Totals, loads and caches are left to the caller
+    (``workouts.signals.intervals_changed``). Writes interned durations, so
+    callers run it in a transaction wrapped in ``retry_stale_durations``.
+    """
+    with transaction.atomic():
+        lock_workout(workout.pk)
+        old_steps = WorkoutStep.objects.filter(workout_id=workout.pk)
+        old = set(old_steps.values_list("interval_id", flat=True))
+        old_steps.delete()
+        shared = WorkoutStep.objects.filter(interval_id__in=old).values_list(
+            "interval_id", flat=True
+        )
+        unshared = Interval.objects.filter(pk__in=old - set(shared))
+        rest_ids = set(
+            unshared.exclude(rest_interval=None).values_list(
+                "rest_interval_id", flat=True
+            )
+        )
+        unshared.delete()
+        Interval.objects.filter(pk__in=rest_ids, workout_steps__isnull=True).delete()
+
+        intervals = bulk_create_steps(steps)
+        WorkoutStep.objects.bulk_create(
+            WorkoutStep(workout_id=workout.pk, interval=interval, position=position)
+            for interval, position in zip(intervals, initial_positions(len(intervals)))
+        )
+    return intervals
@@ -1,9 +1,59 @@
 from django.db import models, transaction
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 from workouts.models.interval import Interval
 
 
+def link_steps(steps) -> list[Interval]:
+    """
+    The intervals of ``steps`` (in position order), each with ``parent`` set
+    to the pk of the interval before it, as representations expose it.
+    """
+    intervals = []
+    parent = None
+    for step in steps:
+        interval = step.interval
+        interval.parent = parent
+        parent = interval.pk
+        intervals.append(interval)
+    return intervals
+
+
+class WorkoutQuerySet(models.QuerySet):
+    def with_intervals(self, rest_interval=True):
+        """
+        Prefetch everything the nested workout representation touches.
+
+        Steps are loaded in position order joined to their interval, its
+        duration, rest interval and rest interval duration, so a whole page of
+        workouts costs two queries however many workouts or intervals it
+        holds. Pass ``rest_interval=False`` when rest intervals are not nested.
+        """
+        steps = WorkoutStep.objects.ordered(rest_interval=rest_interval)
+        return self.prefetch_related(models.Prefetch("steps", queryset=steps))
+
+    def sorted_intervals(self):
+        """
+        Return ``{workout_pk: [ordered intervals]}`` for every workout in the
+        queryset, from a single ordered query over the steps.
+        """
+        grouped = {}
+        for step in WorkoutStep.objects.ordered().filter(
+            workout__in=self.values("pk")
+        ):
+            grouped.setdefault(step.workout_id, []).append(step)
+        return {pk: link_steps(steps) for pk, steps in grouped.items()}
+
+    def touch(self) -> int:
+        """
+        Bump ``updated_at`` to now, without sending signals: it validates the
+        representation caches and the ETag and Last-Modified of responses, so
+        it has to move whenever anything a representation shows changes.
+        """
+        return self.update(updated_at=timezone.now())
+
+
 class Workout(models.Model):
 
     class WorkoutType(models.IntegerChoices):
@@ -17,33 +67,116 @@ class Workout(models.Model):
     workout_type = models.PositiveSmallIntegerField(
         choices=WorkoutType.choices, default=WorkoutType.RUN
     )
-    intervals = models.ManyToManyField(Interval, related_name="workouts")
+    intervals = models.ManyToManyField(
+        Interval, related_name="workouts", through="WorkoutStep"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Denormalized totals, maintained by workouts.totals.
+    total_time = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        help_text="Total time in seconds, repeats and rests included.",
+    )
+    total_distance = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        help_text="Total distance in meters, repeats and rests included.",
+    )
+    total_work = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        help_text="Total work in joules, repeats and rests included.",
+    )
+
+    objects = WorkoutQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination and streaming walk the table in this order.
+            models.Index(fields=["created_at", "id"], name="workout_created_id_idx"),
+            # Filters on an author or a type, paginated or ranged on created_at.
+            models.Index(
+                fields=["author", "created_at", "id"], name="workout_author_created_idx"
+            ),
+            models.Index(
+                fields=["workout_type", "created_at", "id"],
+                name="workout_type_created_idx",
+            ),
+            models.Index(fields=["updated_at", "id"], name="workout_updated_id_idx"),
+            # updated_at ranges (in the default order, or an author's newest),
+            # covering the columns a page of ids reads.
+            models.Index(
+                fields=["updated_at", "created_at", "id"],
+                name="workout_updated_created_idx",
+            ),
+            models.Index(
+                fields=["author", "updated_at", "id"], name="workout_author_updated_idx"
+            ),
+            models.Index(fields=["title", "id"], name="workout_title_idx"),
+            # title LIKE 'prefix%' (PostgreSQL; opclasses are ignored elsewhere).
+            # SQLite's case-insensitive LIKE needs a NOCASE index, which only
+            # migration 0011 creates, on SQLite alone.
+            models.Index(
+                fields=["title"],
+                name="workout_title_prefix_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+            models.Index(fields=["total_time"], name="workout_total_time_idx"),
+            models.Index(fields=["total_distance"], name="workout_total_distance_idx"),
+            models.Index(fields=["total_work"], name="workout_total_work_idx"),
+        ]
+
     @property
     def sorted_intervals(self):
-        intervals = self.intervals.all()
-        object_map = {interval.pk: interval for interval in intervals}
-        visited = set()
-        sorted_intervals = []
+        if "steps" in getattr(self, "_prefetched_objects_cache", {}):
+            return link_steps(self.steps.all())
+        return link_steps(WorkoutStep.objects.ordered().filter(workout=self))
 
-        def _add_to_sorted_pks(interval: Interval):
+    def __str__(self):
+        return self.title
 
-            if interval.pk in visited:
-                return
 
-            parent_pk = interval.parent
-            if parent_pk is not None and parent_pk in object_map:
-                _add_to_sorted_pks(object_map[parent_pk])
+class WorkoutStepQuerySet(models.QuerySet):
+    def ordered(self, rest_interval=True):
+        """Steps in workout order, joined to everything their interval shows."""
+        related = ["interval__duration"]
+        if rest_interval:
+            related.append("interval__rest_interval__duration")
+        return self.select_related(*related).order_by("workout_id", "position")
 
-            sorted_intervals.append(interval)
-            visited.add(interval.pk)
 
-        for i in intervals:
-            _add_to_sorted_pks(i)
+class WorkoutStep(models.Model):
+    """
+    An interval's place in a workout.
 
-        return sorted_intervals
+    Steps are ordered by ``position``, a sparse integer key. New steps are
+    numbered ``workouts.positions.GAP`` apart, so a step is inserted or moved
+    by giving it a position between its new neighbours, without touching any
+    other row. The table is the one Django created for the original plain
+    ``Workout.intervals`` many-to-many.
+    """
+
+    workout = models.ForeignKey(Workout, on_delete=models.CASCADE, related_name="steps")
+    interval = models.ForeignKey(
+        Interval, on_delete=models.CASCADE, related_name="workout_steps"
+    )
+    position = models.BigIntegerField()
+
+    objects = WorkoutStepQuerySet.as_manager()
+
+    class Meta:
+        db_table = "workouts_workout_intervals"
+        unique_together = [("workout", "interval")]
+        indexes = [
+            models.Index(
+                fields=["workout", "position"], name="workout_step_position_idx"
+            ),
+        ]
 
     def __str__(self):
-        return self.title
+        return f"{self.workout_id}: {self.interval_id} at {self.position}"
@@ -0,0 +1,114 @@
+"""
+Ordering of workout intervals.
+
+Intervals used to form a singly linked list through ``Interval.parent`` (the
+pk of the preceding interval); they are now ordered by
+``WorkoutStep.position``, and these helpers remain for turning such chains
+into positions (see migration 0006). They order an unordered collection of
+intervals iteratively, in linear time, so that arbitrarily long workouts
+cannot hit the recursion limit.
+
+The module deliberately has no Django imports: anything with ``pk`` and
+``parent`` attributes can be ordered.
+"""
+
+from collections import defaultdict
+from typing import Hashable, Iterable, Protocol, TypeVar
+
+
+class Linked(Protocol):
+    pk: Hashable
+    parent: Hashable
+
+
+T = TypeVar("T", bound=Linked)
+
+
+class IntervalOrderError(ValueError):
+    """The ``parent`` pointers of a workout do not form a valid chain."""
+
+
+class IntervalCycleError(IntervalOrderError):
+    def __init__(self, pks):
+        self.pks = list(pks)
+        super().__init__(f"Intervals form a cycle: {self.pks}")
+
+
+class DanglingParentError(IntervalOrderError):
+    def __init__(self, pk, parent):
+        self.pk = pk
+        self.parent = parent
+        super().__init__(f"Interval {pk} points at missing parent {parent}")
+
+
+def order_intervals(intervals: Iterable[T], strict: bool = False) -> list[T]:
+    """
+    Return ``intervals`` with every interval placed after its parent.
+
+    Intervals are taken in their incoming order and each one is emitted after
+    its not-yet-emitted ancestors, which reproduces the order of the original
+    recursive walk exactly. Each interval is visited once, so the cost is
+    O(n) time and O(n) extra memory regardless of chain length.
+
+    Broken chains are reported when ``strict`` is true. Otherwise intervals
+    pointing at a parent outside the collection are treated as a head of the
+    chain, and the members of a cycle are appended in the order they were
+    reached, so serialization never fails on bad data.
+    """
+    intervals = list(intervals)
+    by_pk = {interval.pk: interval for interval in intervals}
+    emitted = set()
+    ordered = []
+
+    for interval in intervals:
+        if interval.pk in emitted:
+            continue
+
+        # Walk up towards the head collecting ancestors that still need to be
+        # emitted; ``on_path`` catches a walk that comes back on itself.
+        path = []
+        on_path = set()
+        current = interval
+        while current is not None and current.pk not in emitted:
+            if current.pk in on_path:
+                if strict:
+                    start = next(
+                        i for i, node in enumerate(path) if node.pk == current.pk
+                    )
+                    raise IntervalCycleError(node.pk for node in path[start:])
+                break
+            path.append(current)
+            on_path.add(current.pk)
+
+            parent_pk = current.parent
+            if parent_pk is None:
+                break
+            current = by_pk.get(parent_pk)
+            if current is None and strict:
+                raise DanglingParentError(path[-1].pk, parent_pk)
+
+        for node in reversed(path):
+            ordered.append(node)
+            emitted.add(node.pk)
+
+    return ordered
+
+
+def order_intervals_by_workout(
+    rows: Iterable[tuple[Hashable, T]], strict: bool = False
+) -> dict[Hashable, list[T]]:
+    """
+    Order the intervals of many workouts from one flat result set.
+
+    ``rows`` yields ``(workout_pk, interval)`` pairs, e.g. from a single query
+    over the workout/interval join table. The rows are grouped in one pass and
+    each group is ordered with :func:`order_intervals`, so the total cost is
+    linear in the number of rows.
+    """
+    grouped = defaultdict(list)
+    for workout_pk, interval in rows:
+        grouped[workout_pk].append(interval)
+    return {
+        workout_pk: order_intervals(intervals, strict=strict)
+        for workout_pk, intervals in grouped.items()
+    }
@@ -0,0 +1,205 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from datetime import datetime
+from functools import reduce
+from operator import or_
+from typing import NamedTuple, Optional
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class Cursor(NamedTuple):
+    # The ordering the cursor was made for and the row's values of it.
+    ordering: tuple
+    values: tuple
+    reverse: bool = False
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opaque cursor pagination over the queryset's ordering plus ``id``
+    (``(created_at, id)`` unless the view orders it, e.g. by ``?ordering=``).
+    ``id`` runs in the direction of the last key, so a composite index on
+    the ordering and ``id`` serves pages either way without a sort.
+
+    Unlike DRF's ``CursorPagination`` this never falls back to ``OFFSET`` to
+    break ties: the cursor stores the full position so every page is a single
+    range scan, however deep the client is. A cursor only continues the
+    ordering it was made for.
+
+    Pagination is opt-in so existing clients keep receiving a plain list; it
+    is enabled by passing either ``cursor`` or ``page_size``.
+    """
+
+    page_size = 100
+    max_page_size = 1000
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    invalid_cursor_message = "Invalid cursor"
+    default_ordering = ("created_at",)
+
+    def is_requested(self, request) -> bool:
+        return (
+            self.cursor_query_param in request.query_params
+            or self.page_size_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        cursor = self.decode_cursor(request, queryset.model)
+
+        if cursor is None:
+            queryset = queryset.order_by(*self.ordering)
+        else:
+            if cursor.ordering != self.ordering:
+                raise NotFound(self.invalid_cursor_message)
+            queryset = queryset.filter(self.after(cursor)).order_by(
+                *(flip(name) if cursor.reverse else name for name in self.ordering)
+            )
+
+        # Fetch one extra row to find out whether there is a further page.
+        results = list(queryset[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        page = results[: self.page_size]
+
+        if cursor is not None and cursor.reverse:
+            page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.page = page
+        return page
+
+    def get_ordering(self, queryset) -> tuple:
+        """The queryset's ordering (or ``default_ordering``), ending in ``id``."""
+        ordering = [
+            name
+            for name in queryset.query.order_by
+            if isinstance(name, str) and name.lstrip("-") not in ("id", "pk")
+        ]
+        return with_tiebreak(ordering or self.default_ordering)
+
+    def after(self, cursor: Cursor) -> Q:
+        """
+        Rows past ``cursor`` in its direction:
+        ``a > x OR (a = x AND b > y) OR ...`` over the ordering.
+        """
+        conditions, equal = [], {}
+        for name, value in zip(cursor.ordering, cursor.values):
+            field = name.lstrip("-")
+            descending = name.startswith("-") != cursor.reverse
+            lookup = f"{field}__lt" if descending else f"{field}__gt"
+            conditions.append(Q(**equal, **{lookup: value}))
+            equal[field] = value
+        return reduce(or_, conditions)
+
+    def position(self, row, reverse=False) -> Cursor:
+        values = tuple(getattr(row, name.lstrip("-")) for name in self.ordering)
+        return Cursor(self.ordering, values, reverse)
+
+    def get_page_size(self, request) -> int:
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_next_link(self) -> Optional[str]:
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.position(self.page[-1]))
+
+    def get_previous_link(self) -> Optional[str]:
+        if not self.has_previous:
+            return None
+        if not self.page:
+            # Walking backwards off the start of an empty forward page.
+            return remove_query_param(
+                self.request.build_absolute_uri(), self.cursor_query_param
+            )
+        return self.encode_cursor(self.position(self.page[0], reverse=True))
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def decode_cursor(self, request, model) -> Optional[Cursor]:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = urlsafe_b64decode(encoded.encode("ascii")).decode("ascii")
+            data = json.loads(raw)
+            ordering = tuple(data["ordering"])
+            values = tuple(
+                model._meta.get_field(name.lstrip("-")).to_python(value)
+                for name, value in zip(ordering, data["values"], strict=True)
+            )
+            return Cursor(ordering, values, bool(data["reverse"]))
+        except (
+            TypeError,
+            ValueError,
+            KeyError,
+            UnicodeError,
+            FieldDoesNotExist,
+            ValidationError,
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, cursor: Cursor) -> str:
+        raw = json.dumps(
+            {
+                "ordering": cursor.ordering,
+                "values": [
+                    value.isoformat() if isinstance(value, datetime) else str(value)
+                    for value in cursor.values
+                ],
+                "reverse": cursor.reverse,
+            },
+            separators=(",", ":"),
+        )
+        encoded = urlsafe_b64encode(raw.encode("ascii")).decode("ascii")
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, encoded
+        )
+
+
+def flip(name: str) -> str:
+    return name[1:] if name.startswith("-") else f"-{name}"
+
+
+def with_tiebreak(ordering) -> tuple:
+    """``ordering`` ending in ``id``, descending after a descending key."""
+    return (*ordering, "-id" if ordering[-1].startswith("-") else "id")
@@ -0,0 +1,137 @@
+"""
+Positions of steps within a workout.
+
+A workout's steps are ordered by ``WorkoutStep.position``. Positions are
+sparse: a new workout numbers its steps ``GAP`` apart, a step inserted or
+moved between two others takes the midpoint of their positions, and one
+placed before the first or after the last step takes a position ``GAP``
+beyond it. Each of ``insert_step``, ``move_step`` and ``delete_step`` thus
+writes a constant number of rows and finds its neighbours with indexed
+lookups on ``(workout, position)``.
+
+Only when two neighbours are adjacent integers, after about ``log2(GAP)``
+inserts into the same spot, is the workout renumbered (``renumber``); that is
+one ``bulk_update`` of its steps and is rare enough to be amortized.
+
+All three take the workout row lock, so concurrent edits of one workout are
+serialized on databases that support ``SELECT ... FOR UPDATE``.
+"""
+
+from typing import Optional, Union
+
+from django.db import transaction
+
+from workouts.models import Interval, Workout, WorkoutStep
+
+GAP = 1 << 16
+
+# Pass as ``after`` to place a step after the current last step.
+LAST = "last"
+
+
+class StepNotFound(LookupError):
+    """The interval is not a step of the workout."""
+
+    def __init__(self, interval_id):
+        self.interval_id = interval_id
+        super().__init__(f"Interval {interval_id} is not a step of this workout.")
+
+
+def initial_positions(count: int) -> list[int]:
+    return [GAP * (index + 1) for index in range(count)]
+
+
+def renumber(workout_id) -> None:
+    """Space a workout's steps ``GAP`` apart again, keeping their order."""
+    steps = list(
+        WorkoutStep.objects.filter(workout_id=workout_id)
+        .order_by("position")
+        .only("pk", "position")
+    )
+    for step, position in zip(steps, initial_positions(len(steps))):
+        step.position = position
+    WorkoutStep.objects.bulk_update(steps, ["position"], batch_size=1000)
+
+
+def get_step(workout_id, interval_id) -> WorkoutStep:
+    try:
+        return WorkoutStep.objects.get(workout_id=workout_id, interval_id=interval_id)
+    except WorkoutStep.DoesNotExist:
+        raise StepNotFound(interval_id)
+
+
+def position_after(workout_id, after: Union[int, str, None], exclude=None) -> int:
+    """
+    A free position right after the step of interval ``after`` (at the start
+    when None, at the end when ``LAST``), ignoring the step ``exclude`` (the
+    one being moved).
+    """
+    steps = WorkoutStep.objects.filter(workout_id=workout_id)
+    if exclude is not None:
+        steps = steps.exclude(pk=exclude.pk)
+
+    if after is None:
+        first = steps.order_by("position").values_list("position", flat=True).first()
+        return GAP if first is None else first - GAP
+    if after == LAST:
+        last = steps.order_by("-position").values_list("position", flat=True).first()
+        return GAP if last is None else last + GAP
+
+    previous = get_step(workout_id, after).position
+    following = (
+        steps.filter(position__gt=previous)
+        .order_by("position")
+        .values_list("position", flat=True)
+        .first()
+    )
+    if following is None:
+        return previous + GAP
+    if following - previous > 1:
+        return (previous + following) // 2
+    renumber(workout_id)
+    return position_after(workout_id, after, exclude)
+
+
+def lock_workout(workout_id) -> None:
+    Workout.objects.select_for_update().filter(pk=workout_id).exists()
+
+
+def insert_step(workout_id, interval: Interval, after=LAST) -> WorkoutStep:
+    """Make ``interval`` a step of the workout, after the step ``after``."""
+    with transaction.atomic():
+        lock_workout(workout_id)
+        return WorkoutStep.objects.create(
+            workout_id=workout_id,
+            interval=interval,
+            position=position_after(workout_id, after),
+        )
+
+
+def move_step(workout_id, interval_id, after: Optional[int]) -> WorkoutStep:
+    """Move the step of ``interval_id`` right after the step ``after``."""
+    with transaction.atomic():
+        lock_workout(workout_id)
+        step = get_step(workout_id, interval_id)
+        if after != interval_id:
+            step.position = position_after(workout_id, after, exclude=step)
+            step.save(update_fields=["position"])
+        return step
+
+
+def delete_step(workout_id, interval_id) -> None:
+    """
+    Remove a step, deleting its interval unless another workout shares it;
+    the steps around it keep their positions.
+    """
+    with transaction.atomic():
+        lock_workout(workout_id)
+        step = get_step(workout_id, interval_id)
+        shared = (
+            WorkoutStep.objects.filter(interval_id=interval_id)
+            .exclude(pk=step.pk)
+            .exists()
+        )
+        if shared:
+            step.workout.intervals.remove(interval_id)
+        else:
+            Interval.objects.get(pk=interval_id).delete()
@@ -0,0 +1,36 @@
+"""
+DRF renderers for device workout files.
+
+A view negotiating one of these renders the workout itself (see
+``WorkoutViewSet.file_response``) and hands the renderer finished bytes;
+anything else, such as an error, is rendered as JSON.
+"""
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from workouts.formats import erg, zwo
+
+
+class WorkoutFileRenderer(BaseRenderer):
+    charset = "utf-8"
+    render_workout = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, bytes):
+            return data
+        response = (renderer_context or {}).get("response")
+        if response is not None:
+            response["Content-Type"] = JSONRenderer.media_type
+        return JSONRenderer().render(data)
+
+
+class ZwoRenderer(WorkoutFileRenderer):
+    media_type = "application/vnd.zwift.workout+xml"
+    format = "zwo"
+    render_workout = staticmethod(zwo.render)
+
+
+class ErgRenderer(WorkoutFileRenderer):
+    media_type = "text/x-erg"
+    format = "erg"
+    render_workout = staticmethod(erg.render)
@@ -0,0 +1,188 @@
+"""
+Read-replica routing.
+
+With ``DATABASE_REPLICA_URLS`` set, settings add a ``replica_<n>`` database
+per URL, list their aliases in ``DATABASE_REPLICAS`` and install
+``ReplicaRouter``. Writes always go to the primary (``default``). Reads go
+to a replica only inside ``replica_reads()``, which ``ReplicaReadsMixin``
+opens for the safe (GET/HEAD/OPTIONS) requests of a view, and only for
+models of ``REPLICATED_APPS``: sessions and users stay on the primary, so a
+user who just logged in is never missing on a lagging replica.
+
+Lag is handled by stickiness. Once a request has written, its remaining
+reads use the primary, and the response pins the client to the primary for
+``DATABASE_REPLICA_STICKY_SECONDS`` with a cookie, so it reads its own
+writes even when a replica is behind.
+
+Failover: each replica is health-checked with a query against its
+``django_migrations`` table at most every
+``DATABASE_REPLICA_HEALTH_INTERVAL`` seconds, when a read is about to use it.
+Requests are spread at random over the replicas that passed their last check,
+and fall back to the primary when none did. All reads of a ``replica_reads()``
+block use the replica chosen for its first one: replicas lag by different
+amounts, and a response built from two of them (an ETag from one, the body
+from another) could pair a row with a state it never had.
+"""
+
+import contextvars
+import logging
+import math
+import random
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework.permissions import SAFE_METHODS
+
+logger = logging.getLogger("workouts.routers")
+
+PIN_COOKIE = "primary_pin"
+
+REPLICATED_APPS = {"workouts"}
+
+
+def replica_aliases() -> list[str]:
+    return getattr(settings, "DATABASE_REPLICAS", [])
+
+
+@dataclass
+class ReadState:
+    replica_reads: bool
+    wrote: bool = False
+    chosen: bool = False
+    # The database of the block's reads once chosen; None for the primary.
+    replica: Optional[str] = None
+
+
+_state = contextvars.ContextVar("replica_read_state", default=None)
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """
+    Let reads in the block use a replica (unless ``enabled`` is false). The
+    yielded ``ReadState`` records whether the block wrote.
+    """
+    state = ReadState(replica_reads=enabled)
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+
+class ReplicaHealth:
+    """Per-process health of the replicas, rechecked every ``interval`` s."""
+
+    def __init__(self):
+        self.checked = {}  # alias: monotonic time of the last check
+        self.healthy = {}
+
+    @property
+    def interval(self) -> float:
+        return getattr(settings, "DATABASE_REPLICA_HEALTH_INTERVAL", 10)
+
+    def check(self, alias) -> bool:
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute("SELECT 1 FROM django_migrations LIMIT 1")
+                cursor.fetchone()
+        except DatabaseError as e:
+            logger.warning("Replica %s failed its health check: %s", alias, e)
+            connections[alias].close()
+            return False
+        return True
+
+    def is_healthy(self, alias) -> bool:
+        now = time.monotonic()
+        if now - self.checked.get(alias, -math.inf) >= self.interval:
+            self.healthy[alias] = self.check(alias)
+            self.checked[alias] = now
+        return self.healthy[alias]
+
+    def reset(self) -> None:
+        self.checked.clear()
+        self.healthy.clear()
+
+
+replica_health = ReplicaHealth()
+
+
+def choose_replica():
+    """A healthy replica, or None when there is none."""
+    healthy = [alias for alias in replica_aliases() if replica_health.is_healthy(alias)]
+    return random.choice(healthy) if healthy else None
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.replica_reads or state.wrote:
+            return None
+        if model._meta.app_label not in REPLICATED_APPS:
+            return None
+        # Follow relations of an object on the replica it was read from.
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db in replica_aliases():
+            return instance._state.db
+        if not state.chosen:
+            state.replica, state.chosen = choose_replica(), True
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Replicas get their schema from the primary.
+        if db in replica_aliases():
+            return False
+        return None
+
+
+def is_pinned(request) -> bool:
+    try:
+        return float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def pin_to_primary(response) -> None:
+    seconds = getattr(settings, "DATABASE_REPLICA_STICKY_SECONDS", 5)
+    if seconds > 0:
+        response.set_cookie(
+            PIN_COOKIE,
+            f"{time.time() + seconds:.3f}",
+            max_age=math.ceil(seconds),
+            httponly=True,
+            samesite="Lax",
+        )
+
+
+class ReplicaReadsMixin:
+    """
+    Serve a view's safe requests from a replica, unless the client wrote
+    within ``DATABASE_REPLICA_STICKY_SECONDS``; pin clients that write.
+
+    Does nothing without ``DATABASE_REPLICAS``. Content streamed after the
+    view returns is read from the primary.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if not replica_aliases():
+            return super().dispatch(request, *args, **kwargs)
+        safe = request.method in SAFE_METHODS and not is_pinned(request)
+        with replica_reads(safe) as state:
+            response = super().dispatch(request, *args, **kwargs)
+        if state.wrote:
+            pin_to_primary(response)
+        return response
@@ -1,2 +1,7 @@
 from .workout import WorkoutSerializer
-from .interval import IntervalSerializer
+from .load import TrainingLoadSerializer
+from .interval import (
+    IntervalSerializer,
+    StepInsertSerializer,
+    StepPlacementSerializer,
+)
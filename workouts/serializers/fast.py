@@ -0,0 +1,200 @@
+"""
+Fast read-only workout representations.
+
+``WorkoutSerializer`` builds a tree of DRF fields per workout and a nested
+``IntervalSerializer`` and ``DurationSerializer`` per interval, which
+dominates the cost of large reads. This module produces the exact same
+representation (rendered, it is byte-identical) from plain rows:
+
+* ``WORKOUT_COLUMNS`` and ``INTERVAL_COLUMNS`` are the ``values_list``
+  columns read, from the workout table and the workout/interval join table.
+* ``IntervalRow`` holds one step (with its rest interval, if any); it can be
+  built from a row tuple and the previous step's pk with ``interval_row`` or
+  from a dict with ``IntervalRow(**row)``.
+* ``workout_data`` and ``interval_data`` turn rows into representations as
+  plain dicts: no field objects are built per workout or interval.
+* ``workout_representations`` (and its async twin) load and represent a
+  queryset of workouts in two queries, like ``with_intervals()``;
+  ``represent_rows`` does the same for already fetched workout rows.
+
+Rest intervals are represented one level deep. A rest interval is never a
+repeat itself (nothing in the API or ``bulk_build_workouts`` can make one),
+so its own ``rest_interval`` is always None, as it is in the serializer.
+Like the serializer, steps give the pk of the step before them as ``parent``;
+rest intervals have none.
+"""
+
+from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Iterable, NamedTuple, Optional
+
+from django.utils import timezone
+
+from workouts.instrumentation import timed
+from workouts.models import BaseDuration, WorkoutStep
+
+# In the order WorkoutSerializer emits them (``intervals`` follows author).
+WORKOUT_COLUMNS = (
+    "id",
+    "title",
+    "description",
+    "author_id",
+    "workout_type",
+    "created_at",
+    "updated_at",
+    "total_time",
+    "total_distance",
+    "total_work",
+)
+
+INTERVAL_COLUMNS = (
+    "workout_id",
+    "interval_id",
+    "interval__perceived_effort",
+    "interval__repititions",
+    "interval__duration__type",
+    "interval__duration__value",
+    "interval__duration__unit",
+    "interval__rest_interval_id",
+    "interval__rest_interval__perceived_effort",
+    "interval__rest_interval__repititions",
+    "interval__rest_interval__duration__type",
+    "interval__rest_interval__duration__value",
+    "interval__rest_interval__duration__unit",
+)
+
+DURATION_STRINGS = {
+    duration_type: BaseDuration.get_duration_model(duration_type).duration_string
+    for duration_type in BaseDuration.DurationType.values
+}
+
+CENTS = Decimal("0.01")
+
+
+class IntervalRow(NamedTuple):
+    pk: int
+    parent: Optional[int]
+    perceived_effort: Optional[int]
+    repititions: Optional[int]
+    duration_type: int
+    duration_value: Decimal
+    duration_unit: int
+    rest: Optional["IntervalRow"] = None
+
+
+class WorkoutRepresentation(NamedTuple):
+    pk: int
+    updated_at: datetime
+    data: dict
+
+
+def decimal_string(value) -> str:
+    """``serializers.DecimalField(decimal_places=2)`` output."""
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value).strip())
+    return f"{value.quantize(CENTS, rounding=ROUND_HALF_UP):f}"
+
+
+def datetime_string(value: datetime) -> str:
+    """``serializers.DateTimeField`` ISO 8601 output."""
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    value = value.isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+
+def interval_row(row, parent=None) -> IntervalRow:
+    """``IntervalRow`` from a row of ``INTERVAL_COLUMNS``."""
+    rest = None
+    if row[7] is not None:
+        rest = IntervalRow(row[7], None, *row[8:13])
+    return IntervalRow(row[1], parent, *row[2:7], rest)
+
+
+def intervals_by_workout(interval_rows) -> dict:
+    """``{workout_pk: [IntervalRow]}`` from rows in workout and position order."""
+    intervals = {}
+    for row in interval_rows:
+        steps = intervals.setdefault(row[0], [])
+        steps.append(interval_row(row, steps[-1].pk if steps else None))
+    return intervals
+
+
+def interval_data(row: IntervalRow) -> dict:
+    repeat = row.repititions > 0
+    rest = row.rest if repeat else None
+    return {
+        "id": row.pk,
+        "type": DURATION_STRINGS[row.duration_type],
+        "duration": {
+            "value": decimal_string(row.duration_value),
+            "unit": row.duration_unit,
+        },
+        "perceived_effort": row.perceived_effort,
+        "parent": row.parent,
+        "is_repeat": repeat,
+        "repititions": row.repititions if repeat else None,
+        "rest_interval": interval_data(rest) if rest is not None else None,
+    }
+
+
+def workout_data(row, intervals: Iterable[IntervalRow]) -> dict:
+    """Representation of a ``WORKOUT_COLUMNS`` row and its ordered steps."""
+    pk, title, description, author, workout_type, created_at, updated_at, *totals = row
+    return {
+        "id": pk,
+        "title": title,
+        "description": description,
+        "author": author,
+        "intervals": [interval_data(interval) for interval in intervals],
+        "workout_type": workout_type,
+        "created_at": datetime_string(created_at),
+        "updated_at": datetime_string(updated_at),
+        "total_time": decimal_string(totals[0]),
+        "total_distance": decimal_string(totals[1]),
+        "total_work": decimal_string(totals[2]),
+    }
+
+
+def represent(workout_rows, interval_rows) -> list[WorkoutRepresentation]:
+    with timed("serialize"):
+        intervals = intervals_by_workout(interval_rows)
+        return [
+            WorkoutRepresentation(
+                row[0], row[6], workout_data(row, intervals.get(row[0], ()))
+            )
+            for row in workout_rows
+        ]
+
+
+def interval_queryset(workout_pks):
+    return (
+        WorkoutStep.objects.filter(workout_id__in=workout_pks)
+        .order_by("workout_id", "position")
+        .values_list(*INTERVAL_COLUMNS)
+    )
+
+
+def represent_rows(workout_rows) -> list[WorkoutRepresentation]:
+    """Represent ``WORKOUT_COLUMNS`` rows, loading their steps in one query."""
+    if not workout_rows:
+        return []
+    interval_rows = list(interval_queryset([row[0] for row in workout_rows]))
+    return represent(workout_rows, interval_rows)
+
+
+def workout_representations(queryset) -> list[WorkoutRepresentation]:
+    """Represent every workout of ``queryset`` in two queries."""
+    return represent_rows(list(queryset.values_list(*WORKOUT_COLUMNS)))
+
+
+async def aworkout_representations(queryset) -> list[WorkoutRepresentation]:
+    workout_rows = [row async for row in queryset.values_list(*WORKOUT_COLUMNS)]
+    if not workout_rows:
+        return []
+    interval_rows = [
+        row async for row in interval_queryset([row[0] for row in workout_rows])
+    ]
+    return represent(workout_rows, interval_rows)
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from workouts.models import Interval
+from workouts.models.interval import EFFORT_CHOICES
 from workouts.models.duration import BaseDuration
 
 
@@ -17,6 +18,7 @@ class DurationSerializer(serializers.ModelSerializer):
 class IntervalSerializer(serializers.ModelSerializer):
     duration = DurationSerializer()
     type = serializers.SerializerMethodField()
+    parent = serializers.SerializerMethodField()
     is_repeat = serializers.SerializerMethodField()
     repititions = serializers.SerializerMethodField()
     rest_interval = serializers.SerializerMethodField()
@@ -37,6 +39,10 @@ class IntervalSerializer(serializers.ModelSerializer):
     def get_type(self, obj: Interval):
         return obj.duration.duration_string
 
+    def get_parent(self, obj: Interval):
+        # Set on intervals loaded through ``Workout.sorted_intervals``.
+        return getattr(obj, "parent", None)
+
     def get_is_repeat(self, obj: Interval):
         return obj.is_repeat()
 
@@ -46,6 +52,69 @@ class IntervalSerializer(serializers.ModelSerializer):
         return obj.repititions
 
     def get_rest_interval(self, obj: Interval):
-        if not obj.is_repeat():
+        if not obj.is_repeat() or obj.rest_interval_id is None:
             return None
+        if not self.context.get("expand_rest_interval", True):
+            return obj.rest_interval_id
         return IntervalSerializer(obj.rest_interval).data
+
+
+class RestIntervalStepSerializer(serializers.Serializer):
+    """
+    Write-only description of a single step.
+
+    Fields mirror the arguments of ``workouts.models.utils.create_interval``.
+    """
+
+    interval_type = serializers.ChoiceField(
+        choices=Interval.IntervalType.choices, default=Interval.IntervalType.REST
+    )
+    duration_type = serializers.ChoiceField(choices=BaseDuration.DurationType.choices)
+    duration_value = serializers.DecimalField(max_digits=10, decimal_places=2)
+    duration_unit = serializers.IntegerField()
+    perceived_effort = serializers.ChoiceField(
+        choices=EFFORT_CHOICES, required=False, allow_null=True
+    )
+
+    def validate(self, attrs):
+        model = BaseDuration.get_duration_model(attrs["duration_type"])
+        units = model.unit_choices.values
+        if attrs["duration_unit"] not in units:
+            raise serializers.ValidationError(
+                {
+                    "duration_unit": f"Must be one of {units} for "
+                    f"{model.duration_string} durations."
+                }
+            )
+        return attrs
+
+
+class IntervalStepSerializer(RestIntervalStepSerializer):
+    interval_type = serializers.ChoiceField(
+        choices=Interval.IntervalType.choices, default=Interval.IntervalType.ACTIVE
+    )
+    repititions = serializers.IntegerField(min_value=0, default=0)
+    rest_interval = RestIntervalStepSerializer(required=False, allow_null=True)
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if attrs.get("rest_interval") and not attrs["repititions"]:
+            raise serializers.ValidationError(
+                {"rest_interval": "Only repeated steps can have a rest interval."}
+            )
+        return attrs
+
+
+class StepPlacementSerializer(serializers.Serializer):
+    """
+    Where a step goes: right after the step of interval ``after``, or first
+    when ``after`` is null.
+    """
+
+    after = serializers.IntegerField(allow_null=True)
+
+
+class StepInsertSerializer(IntervalStepSerializer):
+    """A new step, appended unless ``after`` places it (see above)."""
+
+    after = serializers.IntegerField(required=False, allow_null=True)
@@ -0,0 +1,18 @@
+from rest_framework import serializers
+
+from workouts.models import TrainingLoad
+
+
+class TrainingLoadSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TrainingLoad
+        fields = [
+            "author",
+            "period",
+            "period_start",
+            "workout_type",
+            "workouts",
+            "total_time",
+            "total_distance",
+            "total_work",
+        ]
@@ -1,34 +1,121 @@
+from django.db import transaction
 from rest_framework import serializers
 
+from workouts.models.duration import retry_stale_durations
+from workouts.models.utils import bulk_build_workouts, replace_steps
 from workouts.models.workout import Workout
+from workouts.signals import intervals_changed
 from django.contrib.auth.models import User
 
-from workouts.serializers.interval import IntervalSerializer
+from workouts.serializers.interval import IntervalSerializer, IntervalStepSerializer
+
+
+class IntervalsField(serializers.Field):
+    """
+    Ordered intervals of a workout.
+
+    Read as the nested ``IntervalSerializer`` representation and written as a
+    list of ``IntervalStepSerializer`` steps in workout order. Rest intervals
+    are nested unless ``expand_rest_interval`` is turned off, in which case
+    only their id is given.
+    """
+
+    expand_rest_interval = True
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("source", "*")
+        super().__init__(**kwargs)
+
+    def to_representation(self, workout: Workout):
+        return IntervalSerializer(
+            workout.sorted_intervals,
+            many=True,
+            context={"expand_rest_interval": self.expand_rest_interval},
+        ).data
+
+    def to_internal_value(self, data):
+        steps = IntervalStepSerializer(data=data, many=True)
+        if not steps.is_valid():
+            raise serializers.ValidationError(steps.errors)
+        return {"intervals": steps.validated_data}
+
+
+class WorkoutListSerializer(serializers.ListSerializer):
+    def create(self, validated_data):
+        return bulk_build_workouts(validated_data)
 
 
 class WorkoutSerializer(serializers.ModelSerializer):
+    """
+    Full workout representation, optionally narrowed to a sparse fieldset.
+
+    ``fields`` selects top-level fields and ``expand`` opts into nested data
+    (``EXPANDABLE``). When either is given, ``intervals`` is only included if
+    expanded (or listed in ``fields``) and rest intervals are only nested if
+    ``intervals.rest_interval`` is expanded, otherwise they are given as ids.
+    Without either, everything is included as before.
+    """
+
+    EXPANDABLE = ("intervals", "intervals.rest_interval")
+
     class Meta:
         model = Workout
         read_only_fields = (
             "created_at",
             "updated_at",
+            "total_time",
+            "total_distance",
+            "total_work",
         )
         fields = "__all__"
+        list_serializer_class = WorkoutListSerializer
 
     title = serializers.CharField()
     description = serializers.CharField()
     author = serializers.PrimaryKeyRelatedField(queryset=User.objects.all())
-    intervals = serializers.SerializerMethodField()
+    intervals = IntervalsField(required=False)
 
-    def get_intervals(self, obj: Workout):
-        return IntervalSerializer(obj.sorted_intervals, many=True).data
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is None and expand is None:
+            return
+        expand = set(expand or ())
+        if "intervals.rest_interval" in expand or "intervals" in (fields or ()):
+            expand.add("intervals")
+        keep = set(self.fields if fields is None else fields)
+        if "intervals" in expand:
+            keep.add("intervals")
+            self.fields["intervals"].expand_rest_interval = (
+                "intervals.rest_interval" in expand
+            )
+        else:
+            keep.discard("intervals")
+        for name in set(self.fields) - keep:
+            self.fields.pop(name)
 
     def create(self, validated_data):
-        return Workout.objects.create(**validated_data)
+        [workout] = bulk_build_workouts([validated_data])
+        return workout
 
     def update(self, instance, validated_data):
+        """
+        Update the workout's fields; given ``intervals``, replace its steps
+        with them.
+        """
         instance.title = validated_data.get("title", instance.title)
         instance.description = validated_data.get("description", instance.description)
         instance.author = validated_data.get("author", instance.author)
-        instance.save()
-        return instance
+        if "intervals" not in validated_data:
+            instance.save()
+            return instance
+
+        @retry_stale_durations
+        def update():
+            with transaction.atomic():
+                instance.save()
+                replace_steps(instance, validated_data["intervals"])
+                intervals_changed([instance.pk])
+
+        update()
+        # The prefetched steps, totals and updated_at are all stale now.
+        return Workout.objects.with_intervals().get(pk=instance.pk)
@@ -0,0 +1,164 @@
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_migrate,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+
+from workouts.cache import rendered_cache, workout_cache
+from workouts.loads import LOAD_FIELDS, load_keys, refresh_loads, refresh_workout_loads
+from workouts.models import BaseDuration, Interval, Workout, WorkoutStep
+from workouts.models.duration import duration_interner
+from workouts.totals import TOTAL_FIELDS, recompute_totals
+
+# Workout fields that decide which training loads a workout counts in, and
+# how much.
+LOAD_UPDATE_FIELDS = {"author", "author_id", "workout_type", "created_at", *TOTAL_FIELDS}
+
+
+def workout_ids_for_intervals(interval_ids) -> set:
+    """Workouts containing the intervals, directly or as a rest interval."""
+    interval_ids = set(interval_ids)
+    interval_ids |= set(
+        Interval.objects.filter(rest_interval__in=interval_ids).values_list(
+            "pk", flat=True
+        )
+    )
+    return set(
+        WorkoutStep.objects.filter(interval_id__in=interval_ids).values_list(
+            "workout_id", flat=True
+        )
+    )
+
+
+def workout_ids_for_duration(duration_id) -> set:
+    return workout_ids_for_intervals(
+        Interval.objects.filter(duration_id=duration_id).values_list("pk", flat=True)
+    )
+
+
+def representations_changed(workout_ids):
+    """Bump the ``updated_at`` of ``workout_ids`` and drop their cache entries."""
+    Workout.objects.filter(pk__in=workout_ids).touch()
+    workout_cache.invalidate(workout_ids)
+    rendered_cache.invalidate(workout_ids)
+
+
+def intervals_changed(workout_ids):
+    """Steps of ``workout_ids`` changed: refresh their totals, loads and cache."""
+    workout_ids = set(workout_ids)
+    if not workout_ids:
+        return
+    recompute_totals(workout_ids)
+    refresh_workout_loads(workout_ids)
+    representations_changed(workout_ids)
+
+
+def remember_affected_workouts(instance, workout_ids):
+    # Relations are gone by the time post_delete fires, so collect them first.
+    instance._affected_workout_ids = workout_ids
+
+
+def invalidate_workout(sender, instance, **kwargs):
+    workout_cache.invalidate([instance.pk])
+    rendered_cache.invalidate([instance.pk])
+
+
+def affects_loads(update_fields) -> bool:
+    return update_fields is None or not LOAD_UPDATE_FIELDS.isdisjoint(update_fields)
+
+
+def collect_workout_loads(sender, instance, update_fields=None, **kwargs):
+    # The training loads the workout counted in before this save.
+    instance._previous_load_keys = set()
+    if not instance._state.adding and affects_loads(update_fields):
+        instance._previous_load_keys = load_keys(
+            Workout.objects.filter(pk=instance.pk).only(*LOAD_FIELDS)
+        )
+
+
+def refresh_saved_workout_loads(
+    sender, instance, update_fields=None, raw=False, **kwargs
+):
+    # Fixtures are loaded raw; rebuild_training_loads catches up after them.
+    if not raw and affects_loads(update_fields):
+        refresh_loads(instance._previous_load_keys | load_keys([instance]))
+
+
+def refresh_deleted_workout_loads(sender, instance, **kwargs):
+    refresh_loads(load_keys([instance]))
+
+
+def invalidate_interval(sender, instance, **kwargs):
+    intervals_changed(workout_ids_for_intervals([instance.pk]))
+
+
+def invalidate_duration(sender, instance, **kwargs):
+    intervals_changed(workout_ids_for_duration(instance.pk))
+
+
+def invalidate_step(sender, instance, update_fields=None, **kwargs):
+    """A step was inserted or moved through ``workouts.positions``."""
+    if update_fields is not None and set(update_fields) == {"position"}:
+        # Reordered: the totals stay the same.
+        representations_changed([instance.workout_id])
+    else:
+        intervals_changed([instance.workout_id])
+
+
+def collect_interval(sender, instance, **kwargs):
+    remember_affected_workouts(instance, workout_ids_for_intervals([instance.pk]))
+
+
+def invalidate_deleted(sender, instance, **kwargs):
+    intervals_changed(getattr(instance, "_affected_workout_ids", ()))
+
+
+def forget_durations(sender, **kwargs):
+    # A deleted, flushed or migrated duration row must not be handed out
+    # again from the interning cache.
+    duration_interner.clear()
+
+
+def invalidate_workout_intervals(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("pre_clear", "post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        if action != "pre_clear":
+            intervals_changed([instance.pk])
+    elif action == "pre_clear":
+        # interval.workouts.clear() does not report which workouts it touched.
+        remember_affected_workouts(instance, workout_ids_for_intervals([instance.pk]))
+    elif action == "post_clear":
+        intervals_changed(getattr(instance, "_affected_workout_ids", ()))
+    elif pk_set:
+        intervals_changed(pk_set)
+
+
+def connect():
+    post_save.connect(invalidate_workout, sender=Workout)
+    post_delete.connect(invalidate_workout, sender=Workout)
+    pre_save.connect(collect_workout_loads, sender=Workout)
+    post_save.connect(refresh_saved_workout_loads, sender=Workout)
+    post_delete.connect(refresh_deleted_workout_loads, sender=Workout)
+
+    post_save.connect(invalidate_interval, sender=Interval)
+    pre_delete.connect(collect_interval, sender=Interval)
+    post_delete.connect(invalidate_deleted, sender=Interval)
+
+    # Signals are sent with the proxy subclass as sender, so every duration
+    # subclass has to be connected individually.
+    for model in (BaseDuration, *BaseDuration.__subclasses__()):
+        post_save.connect(invalidate_duration, sender=model)
+        # Only durations no interval uses can be deleted (PROTECT), so
+        # there is nothing to invalidate but the interning cache.
+        post_delete.connect(forget_durations, sender=model)
+    post_migrate.connect(forget_durations)
+
+    m2m_changed.connect(invalidate_workout_intervals, sender=WorkoutStep)
+    # Not post_delete: steps go away with their interval or workout, whose
+    # handlers cover them, and a receiver would stop Django from deleting
+    # them in bulk.
+    post_save.connect(invalidate_step, sender=WorkoutStep)
@@ -1,3 +1,2611 @@
-from django.test import TestCase
+import contextlib
+import copy
+import gzip
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, connections, router, transaction
+from django.db.models import ProtectedError
+from django.db.migrations.executor import MigrationExecutor
+from django.db.utils import load_backend
+from django.test import (
+    AsyncClient,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+    skipUnlessDBFeature,
+)
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework.utils.encoders import JSONEncoder
+
+from workouts.benchmarks.api import compare
+from workouts.benchmarks.startup import (
+    BUDGET,
+    PROJECT_DIR,
+    child_environment,
+    measure,
+    measure_once,
+    over_budget,
+)
+from workouts.cache import render, workout_cache
+from workouts.instrumentation import EndpointStats, collect_metrics, endpoint_stats
+from workouts.loads import refresh_workout_loads
+from workouts.models import Interval, TrainingLoad, Workout, WorkoutStep
+from workouts.models.duration import (
+    BaseDuration,
+    CaloricDuration,
+    DistanceDuration,
+    HeartRateDuration,
+    PowerDuration,
+    TimeDuration,
+    duration_interner,
+    duration_key,
+)
+from workouts.ordering import (
+    DanglingParentError,
+    IntervalCycleError,
+    order_intervals,
+    order_intervals_by_workout,
+)
+from workouts.models.utils import (
+    build_workout,
+    bulk_build_workouts,
+    bulk_create_steps,
+)
+from workouts.positions import delete_step, insert_step, move_step
+from workouts.positions import initial_positions
+from workouts.routers import PIN_COOKIE, replica_health, replica_reads
+from workouts.transfer import import_workouts
+from workouts.totals import TOTAL_FIELDS, recompute_all_totals, recompute_totals
+from workouts import units
+from workouts.serializers import IntervalSerializer, WorkoutSerializer
+from workouts.serializers.fast import (
+    IntervalRow,
+    interval_data,
+    workout_representations,
+)
+from workouts.views import WorkoutViewSet
+
+
+def latest_migrations():
+    return MigrationExecutor(connection).loader.graph.leaf_nodes()
+
+
+def bulk_create_workouts(author, count):
+    """
+    Create ``count`` workouts of warm-up -> repeat (with rest) -> cool-down.
+
+    Durations are shared between intervals, everything else goes through
+    ``bulk_create``.
+    """
+    warmup = TimeDuration.objects.intern(10, TimeDuration.TimeUnitChoices.MINUTES)
+    active = DistanceDuration.objects.intern(
+        1, DistanceDuration.DistanceUnitChoices.MILES
+    )
+    rest = TimeDuration.objects.intern(90, TimeDuration.TimeUnitChoices.SECONDS)
+    cool_down = PowerDuration.objects.intern(150, PowerDuration.PowerUnitChoices.WATTS)
+
+    workouts = Workout.objects.bulk_create(
+        Workout(author=author, title=f"Workout {i}", workout_type=Workout.WorkoutType.RUN)
+        for i in range(count)
+    )
+    warmups = Interval.objects.bulk_create(
+        Interval(type=Interval.IntervalType.WARMUP, duration=warmup)
+        for _ in range(count)
+    )
+    rests = Interval.objects.bulk_create(
+        Interval(type=Interval.IntervalType.REST, duration=rest)
+        for _ in range(count)
+    )
+    repeats = Interval.objects.bulk_create(
+        Interval(
+            type=Interval.IntervalType.ACTIVE,
+            duration=active,
+            repititions=4,
+            rest_interval=r,
+        )
+        for r in rests
+    )
+    cool_downs = Interval.objects.bulk_create(
+        Interval(type=Interval.IntervalType.COOLDOWN, duration=cool_down)
+        for _ in range(count)
+    )
+
+    WorkoutStep.objects.bulk_create(
+        WorkoutStep(workout_id=workout.pk, interval_id=interval.pk, position=position)
+        for workout, *steps in zip(workouts, warmups, repeats, cool_downs)
+        for interval, position in zip(steps, initial_positions(len(steps)))
+    )
+    return workouts
+
+
+class WorkoutQueryBudgetTests(TestCase):
+    # The narrow cache lookup query, then on a cold cache the workouts and
+    # their intervals joined to durations and rest intervals.
+    LIST_QUERIES = 3
+    RETRIEVE_QUERIES = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username="athlete")
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+    def assert_list_budget(self, count):
+        bulk_create_workouts(self.author, count)
+        with self.assertNumQueries(self.LIST_QUERIES):
+            response = self.client.get("/api/workouts/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), count)
+        return response
+
+    def test_list_one_workout(self):
+        response = self.assert_list_budget(1)
+        intervals = response.data[0]["intervals"]
+        self.assertEqual(
+            [i["type"] for i in intervals], ["TIME", "DISTANCE", "POWER"]
+        )
+        self.assertEqual(intervals[1]["rest_interval"]["duration"]["value"], "90.00")
+
+    def test_list_hundred_workouts(self):
+        self.assert_list_budget(100)
+
+    def test_list_ten_thousand_workouts(self):
+        self.assert_list_budget(10_000)
+
+    def test_retrieve(self):
+        workout = bulk_create_workouts(self.author, 10)[3]
+        with self.assertNumQueries(self.RETRIEVE_QUERIES):
+            response = self.client.get(f"/api/workouts/{workout.pk}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["title"], workout.title)
+        self.assertEqual(len(response.data["intervals"]), 3)
+
+
+class WorkoutKeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create(username="athlete")
+        cls.workouts = bulk_create_workouts(author, 25)
+        # Force ties on created_at so ordering has to fall back to id.
+        Workout.objects.filter(pk__in=[w.pk for w in cls.workouts[5:15]]).update(
+            created_at=cls.workouts[5].created_at
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+    def test_pages_walk_whole_table_without_offset(self):
+        seen = []
+        url = "/api/workouts/?page_size=10"
+        with CaptureQueriesContext(connection) as queries:
+            while url:
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                seen.extend(w["id"] for w in response.data["results"])
+                url = response.data["next"]
+
+        expected = list(
+            Workout.objects.order_by("created_at", "id").values_list("id", flat=True)
+        )
+        self.assertEqual(seen, expected)
+        self.assertFalse(any("OFFSET" in q["sql"].upper() for q in queries))
+
+    def test_previous_link_returns_previous_page(self):
+        first = self.client.get("/api/workouts/?page_size=10").data
+        self.assertIsNone(first["previous"])
+        second = self.client.get(first["next"]).data
+        back = self.client.get(second["previous"]).data
+        self.assertEqual(
+            [w["id"] for w in back["results"]], [w["id"] for w in first["results"]]
+        )
+        self.assertIsNotNone(back["next"])
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/api/workouts/?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, 404)
+
+    def test_pages_follow_requested_ordering(self):
+        # Ties on total_time have to fall back to id, descending like it.
+        for i, workout in enumerate(self.workouts):
+            Workout.objects.filter(pk=workout.pk).update(total_time=i % 4)
+        expected = list(
+            Workout.objects.order_by("-total_time", "-id").values_list("id", flat=True)
+        )
+
+        seen = []
+        url = "/api/workouts/?ordering=-total_time&page_size=2"
+        with CaptureQueriesContext(connection) as queries:
+            while url:
+                response = self.client.get(url)
+                seen.extend(w["id"] for w in response.data["results"])
+                url = response.data["next"]
+        self.assertEqual(seen, expected)
+        # Per page: the page itself (ordering column included, not loaded
+        # row by row) and the representations of its two workouts.
+        self.assertEqual(len(queries), 3 * 13)
+
+        second = self.client.get(
+            "/api/workouts/?ordering=-total_time&page_size=2"
+        ).data["next"]
+        back = self.client.get(self.client.get(second).data["previous"]).data
+        self.assertEqual([w["id"] for w in back["results"]], expected[:2])
+
+        # A cursor only continues the ordering it was made for.
+        response = self.client.get(second.replace("-total_time", "title"))
+        self.assertEqual(response.status_code, 404)
+
+        response = self.client.get("/api/workouts/?ordering=-total_time&stream=1")
+        streamed = json.loads(b"".join(response.streaming_content))
+        self.assertEqual([w["id"] for w in streamed], expected)
+
+    def test_unpaginated_list_is_plain_array(self):
+        response = self.client.get("/api/workouts/")
+        self.assertEqual(len(response.data), 25)
+
+    def test_stream_matches_list(self):
+        with mock.patch.object(WorkoutViewSet, "stream_chunk_size", 7):
+            response = self.client.get("/api/workouts/?stream=1")
+        self.assertTrue(response.streaming)
+        streamed = json.loads(b"".join(response.streaming_content))
+        listed = self.client.get("/api/workouts/?page_size=100").data["results"]
+        self.assertEqual(streamed, json.loads(json.dumps(listed, cls=JSONEncoder)))
+
+
+def chain(*links):
+    return [SimpleNamespace(pk=pk, parent=parent) for pk, parent in links]
+
+
+class IntervalOrderingTests(SimpleTestCase):
+    def test_orders_shuffled_chain(self):
+        intervals = chain((3, 2), (1, None), (4, 3), (2, 1))
+        self.assertEqual([i.pk for i in order_intervals(intervals)], [1, 2, 3, 4])
+
+    def test_long_chain_does_not_recurse(self):
+        intervals = chain(*((pk, pk - 1 if pk else None) for pk in range(50_000)))
+        ordered = order_intervals(reversed(intervals))
+        self.assertEqual([i.pk for i in ordered], list(range(50_000)))
+
+    def test_dangling_parent(self):
+        intervals = chain((2, 99), (3, 2))
+        self.assertEqual([i.pk for i in order_intervals(intervals)], [2, 3])
+        with self.assertRaises(DanglingParentError) as ctx:
+            order_intervals(intervals, strict=True)
+        self.assertEqual((ctx.exception.pk, ctx.exception.parent), (2, 99))
+
+    def test_cycle(self):
+        intervals = chain((1, None), (2, 4), (3, 2), (4, 3))
+        self.assertEqual(
+            sorted(i.pk for i in order_intervals(intervals)), [1, 2, 3, 4]
+        )
+        with self.assertRaises(IntervalCycleError) as ctx:
+            order_intervals(intervals, strict=True)
+        self.assertEqual(sorted(ctx.exception.pks), [2, 3, 4])
+
+    def test_order_by_workout(self):
+        rows = [(1, i) for i in chain((2, 1), (1, None))]
+        rows += [(2, i) for i in chain((5, 4), (4, 3), (3, None))]
+        ordered = order_intervals_by_workout(rows)
+        self.assertEqual([i.pk for i in ordered[1]], [1, 2])
+        self.assertEqual([i.pk for i in ordered[2]], [3, 4, 5])
+
+
+class WorkoutSortedIntervalsTests(TestCase):
+    def test_queryset_orders_all_workouts_in_one_pass(self):
+        author = User.objects.create(username="athlete")
+        workouts = bulk_create_workouts(author, 3)
+        with self.assertNumQueries(1):
+            ordered = Workout.objects.all().sorted_intervals()
+        for workout in workouts:
+            self.assertEqual(
+                [i.pk for i in ordered[workout.pk]],
+                [i.pk for i in workout.sorted_intervals],
+            )
+            self.assertEqual(
+                [i.type for i in ordered[workout.pk]],
+                [
+                    Interval.IntervalType.WARMUP,
+                    Interval.IntervalType.ACTIVE,
+                    Interval.IntervalType.COOLDOWN,
+                ],
+            )
+
+
+class WorkoutCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username="athlete", is_staff=True)
+        cls.workouts = bulk_create_workouts(cls.author, 3)
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        self.workout = self.workouts[0]
+        self.url = f"/api/workouts/{self.workout.pk}/"
+
+    def assert_cached(self, url):
+        self.client.get(url)
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+    def assert_invalidated(self, change):
+        self.assert_cached(self.url)
+        change()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertGreater(len(queries), 1)
+        return response
+
+    def test_list_and_retrieve_serve_from_cache(self):
+        self.assert_cached("/api/workouts/")
+        self.assert_cached(self.url)
+        self.assert_cached("/api/workouts/?page_size=2")
+        self.client.force_authenticate(self.author)
+        stats = self.client.get("/api/workouts/cache-stats/").data
+        self.assertEqual(stats, {"hits": 9, "misses": 3})
+
+    def test_cache_stats_staff_only(self):
+        response = self.client.get("/api/workouts/cache-stats/")
+        self.assertEqual(response.status_code, 403)
+
+    def test_etag_not_modified(self):
+        for url in ("/api/workouts/", self.url):
+            etag = self.client.get(url)["ETag"]
+            self.assertTrue(etag.startswith('"'))
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+
+    def test_not_modified_before_serializing(self):
+        for url in ("/api/workouts/", "/api/workouts/?page_size=2", self.url):
+            etag = self.client.get(url)["ETag"]
+            cache.clear()
+            # Only the narrow query: nothing is loaded, serialized or cached.
+            with self.assertNumQueries(1):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response["ETag"], etag)
+            self.assertIsNone(workout_cache.cache.get(workout_cache.key(self.workout.pk)))
+
+        last_modified = self.client.get(self.url)["Last-Modified"]
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+        # A deletion does not move the latest updated_at of a list.
+        self.assertNotIn("Last-Modified", self.client.get("/api/workouts/"))
+
+    def test_head_sends_validators_only(self):
+        response = self.client.get(self.url)
+        cache.clear()
+        with self.assertNumQueries(1):
+            head = self.client.head(self.url)
+        self.assertEqual(head.status_code, 200)
+        self.assertEqual(head.content, b"")
+        self.assertEqual(head["ETag"], response["ETag"])
+        self.assertEqual(head["Last-Modified"], response["Last-Modified"])
+        self.assertIn("no-cache", head["Cache-Control"])
+
+    def test_changes_bump_updated_at(self):
+        first, second, _ = self.workout.sorted_intervals
+        changes = {
+            "interval": first.save,
+            "duration": first.duration.save,
+            "reorder": lambda: move_step(self.workout.pk, first.pk, second.pk),
+        }
+        for name, change in changes.items():
+            updated_at = Workout.objects.get(pk=self.workout.pk).updated_at
+            etag = self.client.get(self.url)["ETag"]
+            change()
+            self.assertGreater(
+                Workout.objects.get(pk=self.workout.pk).updated_at, updated_at, name
+            )
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+
+    def test_rebuilt_totals_invalidate(self):
+        recompute_all_totals()
+        self.assertEqual(recompute_all_totals(), 0)
+        updated_at = Workout.objects.get(pk=self.workout.pk).updated_at
+        Workout.objects.filter(pk=self.workout.pk).update(total_time=1)
+
+        response = self.assert_invalidated(
+            lambda: self.assertEqual(recompute_all_totals(), 1)
+        )
+        self.assertNotEqual(response.data["total_time"], "1.00")
+        self.assertGreater(
+            Workout.objects.get(pk=self.workout.pk).updated_at, updated_at
+        )
+
+    def test_workout_save_invalidates(self):
+        def change():
+            Workout.objects.filter(pk=self.workout.pk).update(title="Renamed")
+            Workout.objects.get(pk=self.workout.pk).save()
+
+        response = self.assert_invalidated(change)
+        self.assertEqual(response.data["title"], "Renamed")
+
+    def test_interval_save_invalidates(self):
+        interval = self.workout.sorted_intervals[0]
+
+        def change():
+            interval.perceived_effort = 7
+            interval.save()
+
+        response = self.assert_invalidated(change)
+        self.assertEqual(response.data["intervals"][0]["perceived_effort"], 7)
+
+    def test_rest_interval_save_invalidates(self):
+        rest = self.workout.sorted_intervals[1].rest_interval
+
+        def change():
+            rest.perceived_effort = 2
+            rest.save()
+
+        response = self.assert_invalidated(change)
+        self.assertEqual(
+            response.data["intervals"][1]["rest_interval"]["perceived_effort"], 2
+        )
+
+    def test_duration_save_invalidates(self):
+        duration = self.workout.sorted_intervals[0].duration
+
+        def change():
+            duration.value = 12
+            duration.save()
+
+        response = self.assert_invalidated(change)
+        self.assertEqual(response.data["intervals"][0]["duration"]["value"], "12.00")
+
+    def test_interval_delete_invalidates(self):
+        interval = self.workout.sorted_intervals[2]
+        response = self.assert_invalidated(interval.delete)
+        self.assertEqual(len(response.data["intervals"]), 2)
+
+    def test_m2m_change_invalidates(self):
+        first, second, _ = self.workout.sorted_intervals
+        response = self.assert_invalidated(
+            lambda: self.workout.intervals.remove(first)
+        )
+        self.assertEqual(len(response.data["intervals"]), 2)
+
+        response = self.assert_invalidated(lambda: second.workouts.clear())
+        self.assertEqual(len(response.data["intervals"]), 1)
+
+    def test_deleted_while_serializing(self):
+        # The workout goes away between the narrow query and its representation.
+        with mock.patch(
+            "workouts.views.workouts.workout_representations", return_value=[]
+        ):
+            response = self.client.get(self.url)
+            self.assertEqual(response.status_code, 404)
+            response = self.client.get("/api/workouts/")
+            self.assertEqual(len(response.data), 0)
+
+    def test_update_writes_through(self):
+        self.client.patch(self.url, {"title": "Written"}, format="json")
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data["title"], "Written")
+
+
+def step_payload(count):
+    steps = [
+        {
+            "interval_type": Interval.IntervalType.WARMUP,
+            "duration_type": BaseDuration.DurationType.TIME,
+            "duration_value": "10",
+            "duration_unit": TimeDuration.TimeUnitChoices.MINUTES,
+        }
+    ]
+    for i in range(count - 2):
+        steps.append(
+            {
+                "duration_type": BaseDuration.DurationType.DISTANCE,
+                "duration_value": "0.5",
+                "duration_unit": DistanceDuration.DistanceUnitChoices.MILES,
+                "perceived_effort": 8,
+                "repititions": 3,
+                "rest_interval": {
+                    "duration_type": BaseDuration.DurationType.TIME,
+                    "duration_value": "90",
+                    "duration_unit": TimeDuration.TimeUnitChoices.SECONDS,
+                },
+            }
+            if i % 2
+            else {
+                "duration_type": BaseDuration.DurationType.POWER,
+                "duration_value": "250",
+                "duration_unit": PowerDuration.PowerUnitChoices.WATTS,
+            }
+        )
+    steps.append(
+        {
+            "interval_type": Interval.IntervalType.COOLDOWN,
+            "duration_type": BaseDuration.DurationType.TIME,
+            "duration_value": "5",
+            "duration_unit": TimeDuration.TimeUnitChoices.MINUTES,
+        }
+    )
+    return steps
+
+
+class WorkoutNestedCreateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username="athlete")
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+    def payload(self, steps, title="Intervals"):
+        return {
+            "author": self.author.pk,
+            "title": title,
+            "description": "Track session",
+            "workout_type": Workout.WorkoutType.RUN,
+            "intervals": step_payload(steps),
+        }
+
+    def post(self, data):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post("/api/workouts/", data, format="json")
+        self.assertEqual(response.status_code, 201, response.data)
+        return response, len(queries)
+
+    def test_create_nested_workout(self):
+        response, _ = self.post(self.payload(6))
+        intervals = response.data["intervals"]
+        self.assertEqual(
+            [i["type"] for i in intervals],
+            ["TIME", "POWER", "DISTANCE", "POWER", "DISTANCE", "TIME"],
+        )
+        self.assertEqual(intervals[2]["repititions"], 3)
+        self.assertEqual(intervals[2]["perceived_effort"], 8)
+        self.assertEqual(intervals[2]["rest_interval"]["duration"]["value"], "90.00")
+        self.assertEqual(intervals[2]["rest_interval"]["duration"]["unit"], 1)
+
+        workout = Workout.objects.get(pk=response.data["id"])
+        self.assertEqual(
+            [i.pk for i in workout.sorted_intervals], [i["id"] for i in intervals]
+        )
+        self.assertEqual(
+            self.client.get(f"/api/workouts/{workout.pk}/").data, response.data
+        )
+
+    def test_query_count_does_not_depend_on_steps(self):
+        # Intern the durations first: creating them costs two more queries.
+        self.post(self.payload(40))
+        _, small = self.post(self.payload(4))
+        _, large = self.post(self.payload(40))
+        self.assertEqual(small, large)
+
+    def test_batch_create(self):
+        self.post([self.payload(6)])
+        _, single = self.post([self.payload(6)])
+        response, batch = self.post(
+            [self.payload(6, title=f"Batch {i}") for i in range(5)]
+        )
+        self.assertEqual(
+            [w["title"] for w in response.data], [f"Batch {i}" for i in range(5)]
+        )
+        self.assertTrue(all(len(w["intervals"]) == 6 for w in response.data))
+        # Only the per-workout author lookups of validation scale with the batch.
+        self.assertEqual(batch - single, 4)
+
+    def test_update_replaces_steps(self):
+        created, _ = self.post(self.payload(6))
+        shared = Interval.objects.get(pk=created.data["intervals"][0]["id"])
+        other = build_workout(
+            self.author, "Other", "", Workout.WorkoutType.RUN, [shared]
+        )
+        url = f"/api/workouts/{created.data['id']}/"
+
+        response = self.client.patch(
+            url, {"intervals": step_payload(3)}, format="json"
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(
+            [i["type"] for i in response.data["intervals"]], ["TIME", "POWER", "TIME"]
+        )
+        self.assertEqual(self.client.get(url).data, response.data)
+        self.assertEqual(Decimal(response.data["total_time"]), 900)
+        # Intervals no other workout uses go with their steps.
+        old = {i["id"] for i in created.data["intervals"]}
+        self.assertEqual(
+            set(Interval.objects.filter(pk__in=old).values_list("pk", flat=True)),
+            {shared.pk},
+        )
+        self.assertEqual(other.sorted_intervals, [shared])
+        # So do the rest intervals of the replaced repeats.
+        self.assertEqual(Interval.objects.count(), 4)
+
+        # Without intervals the steps are kept.
+        response = self.client.patch(url, {"title": "Renamed"}, format="json")
+        self.assertEqual(len(response.data["intervals"]), 3)
+
+    def test_invalid_unit_rolls_back(self):
+        payload = self.payload(3)
+        payload["intervals"][1]["duration_unit"] = 9
+        response = self.client.post("/api/workouts/", payload, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("duration_unit", response.data["intervals"][1])
+        self.assertFalse(Workout.objects.exists())
+
+
+class SingleTableDurationMigrationTests(TransactionTestCase):
+    before = [("workouts", "0002_workout_created_id_idx")]
+    after = [("workouts", "0003_single_table_durations")]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(latest_migrations())
+
+    def test_subclass_rows_are_folded_into_base_table(self):
+        apps = self.migrate(self.before)
+        ContentType = apps.get_model("contenttypes", "ContentType")
+        OldInterval = apps.get_model("workouts", "Interval")
+        created = {}
+        for model_name, unit in (("TimeDuration", 3), ("PowerDuration", 2)):
+            model = apps.get_model("workouts", model_name)
+            ctype, _ = ContentType.objects.get_or_create(
+                app_label="workouts", model=model_name.lower()
+            )
+            duration = model.objects.create(value=7, unit=unit, polymorphic_ctype=ctype)
+            OldInterval.objects.create(duration_id=duration.pk)
+            created[model_name] = duration.pk
+
+        self.migrate(self.after)
+        # The current models only fit the latest schema.
+        self.migrate(latest_migrations())
+        time = BaseDuration.objects.get(pk=created["TimeDuration"])
+        self.assertIsInstance(time, TimeDuration)
+        self.assertEqual(time.unit, TimeDuration.TimeUnitChoices.HOURS)
+        self.assertEqual(time.converted_value(), 420)
+        power = Interval.objects.get(duration_id=created["PowerDuration"]).duration
+        self.assertIsInstance(power, PowerDuration)
+        self.assertEqual(power.unit, PowerDuration.PowerUnitChoices.KJ)
+
+        apps = self.migrate(self.before)
+        restored = apps.get_model("workouts", "TimeDuration").objects.get(
+            pk=created["TimeDuration"]
+        )
+        self.assertEqual(restored.unit, 3)
+
+
+class DurationModelTests(TestCase):
+    def test_proxy_subclasses(self):
+        time = TimeDuration.objects.create(value=90)
+        power = PowerDuration.objects.create(value=250)
+        self.assertEqual(time.type, BaseDuration.DurationType.TIME)
+        self.assertEqual(time.unit, TimeDuration.TimeUnitChoices.MINUTES)
+        self.assertEqual(
+            [type(d) for d in BaseDuration.objects.order_by("pk")],
+            [TimeDuration, PowerDuration],
+        )
+        self.assertEqual(list(TimeDuration.objects.all()), [time])
+        self.assertEqual(PowerDuration.objects.get().duration_string, "POWER")
+
+    def test_intern_keeps_one_row_per_key(self):
+        minutes = TimeDuration.TimeUnitChoices.MINUTES
+        ten = TimeDuration.objects.intern(10, minutes)
+        self.assertIsInstance(ten, TimeDuration)
+        self.assertEqual(ten.type, BaseDuration.DurationType.TIME)
+        same = BaseDuration.objects.intern(
+            Decimal("10.00"), minutes, duration_type=BaseDuration.DurationType.TIME
+        )
+        self.assertEqual(same.pk, ten.pk)
+        self.assertEqual(TimeDuration.objects.intern(10).pk, ten.pk)
+        seconds = TimeDuration.objects.intern(10, TimeDuration.TimeUnitChoices.SECONDS)
+        self.assertNotEqual(seconds.pk, ten.pk)
+        self.assertEqual(BaseDuration.objects.count(), 2)
+        with transaction.atomic(), self.assertRaises(IntegrityError):
+            TimeDuration.objects.create(value=10, unit=minutes)
+
+    def test_built_workouts_share_durations(self):
+        step = {
+            "duration_type": BaseDuration.DurationType.TIME,
+            "duration_value": Decimal("10"),
+            "duration_unit": TimeDuration.TimeUnitChoices.MINUTES,
+        }
+        author = User.objects.create(username="athlete")
+        spec = {"author": author, "title": "Tens", "intervals": [step, step]}
+        bulk_build_workouts([spec, spec])
+        bulk_build_workouts([spec])
+        self.assertEqual(Interval.objects.count(), 6)
+        self.assertEqual(BaseDuration.objects.count(), 1)
+
+        # Deleting the shared duration would take every workout's steps along.
+        with self.assertRaises(ProtectedError):
+            BaseDuration.objects.get().delete()
+        self.assertEqual(Interval.objects.count(), 6)
+
+    def test_interned_keys_are_cached_once_committed(self):
+        self.addCleanup(duration_interner.clear)
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                TimeDuration.objects.intern(5)
+                transaction.set_rollback(True)
+            five = TimeDuration.objects.intern(5)
+        self.assertEqual(list(duration_interner.pks.values()), [five.pk])
+        with self.assertNumQueries(0):
+            self.assertEqual(TimeDuration.objects.intern(5).pk, five.pk)
+
+        five.delete()
+        self.assertEqual(duration_interner.pks, {})
+
+    def test_canonical_value_maintained_on_write(self):
+        mile = DistanceDuration.objects.intern(
+            1, DistanceDuration.DistanceUnitChoices.MILES
+        )
+        self.assertEqual(mile.canonical_value, Decimal("1609.344"))
+        self.assertEqual(
+            BaseDuration.objects.get(pk=mile.pk).canonical_value, Decimal("1609.344")
+        )
+
+        time = TimeDuration.objects.create(value=90, unit=1)
+        self.assertEqual(time.converted_value(), Decimal("1.5"))
+        time.unit = TimeDuration.TimeUnitChoices.HOURS
+        time.save(update_fields=["unit"])
+        time.refresh_from_db()
+        self.assertEqual(time.canonical_value, Decimal(90 * 3600))
+
+        heart_rate = HeartRateDuration.objects.intern(150)
+        self.assertIsNone(BaseDuration.objects.get(pk=heart_rate.pk).canonical_value)
+        self.assertEqual(
+            list(
+                BaseDuration.objects.filter(canonical_value__gt=1000)
+                .order_by("canonical_value")
+                .values_list("pk", flat=True)
+            ),
+            [mile.pk, time.pk],
+        )
+
+
+class UnitsTests(SimpleTestCase):
+    def test_every_unit_has_a_factor(self):
+        for duration_type, factors in units.UNIT_FACTORS.items():
+            model = BaseDuration.get_duration_model(duration_type)
+            self.assertEqual(set(factors), set(model.unit_choices.values))
+            self.assertIs(model.unit_factors, factors)
+        self.assertNotIn(BaseDuration.DurationType.HEART_RATE, units.UNIT_FACTORS)
+
+    def test_conversions(self):
+        self.assertEqual(
+            units.canonical_value(units.CALORIC, Decimal("2.5"), 2), Decimal(10460)
+        )
+        self.assertEqual(units.canonical_value(units.POWER, 1, 2), 1000)
+        self.assertIsNone(units.canonical_value(units.HEART_RATE, 150, 1))
+        self.assertEqual(units.convert(units.DISTANCE, 5, 2, 3), 5000)
+        self.assertEqual(units.convert(units.TIME, 30, 1, 2), Decimal("0.5"))
+
+
+class WorkoutTotalsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username="athlete")
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+    def build(self, steps, title="Totals"):
+        [workout] = bulk_build_workouts(
+            [{"author": self.author, "title": title, "intervals": steps}]
+        )
+        return workout
+
+    def time(self, value, unit=TimeDuration.TimeUnitChoices.MINUTES, **extra):
+        return {
+            "duration_type": BaseDuration.DurationType.TIME,
+            "duration_value": Decimal(value),
+            "duration_unit": unit,
+            **extra,
+        }
+
+    def distance(self, value, unit, **extra):
+        return {
+            "duration_type": BaseDuration.DurationType.DISTANCE,
+            "duration_value": Decimal(value),
+            "duration_unit": unit,
+            **extra,
+        }
+
+    def test_repeats_and_units_are_expanded(self):
+        workout = self.build(
+            [
+                self.time(10),
+                self.distance(
+                    "0.5",
+                    DistanceDuration.DistanceUnitChoices.MILES,
+                    repititions=4,
+                    rest_interval=self.time(90, TimeDuration.TimeUnitChoices.SECONDS),
+                ),
+                self.distance("400", DistanceDuration.DistanceUnitChoices.METERS),
+                {
+                    "duration_type": BaseDuration.DurationType.CALORIC,
+                    "duration_value": Decimal(100),
+                    "duration_unit": CaloricDuration.CaloricUnitChoices.KJ,
+                },
+                {
+                    "duration_type": BaseDuration.DurationType.POWER,
+                    "duration_value": Decimal(250),
+                    "duration_unit": PowerDuration.PowerUnitChoices.WATTS,
+                },
+            ]
+        )
+        workout.refresh_from_db()
+        self.assertEqual(workout.total_time, Decimal("960.00"))
+        self.assertEqual(workout.total_distance, Decimal("3618.69"))
+        self.assertEqual(workout.total_work, Decimal("418400.00"))
+
+    def test_totals_follow_interval_changes(self):
+        workout = self.build([self.time(10), self.time(5)])
+        first, second = workout.sorted_intervals
+
+        first.repititions = 2
+        first.save()
+        workout.refresh_from_db()
+        self.assertEqual(workout.total_time, Decimal("1500.00"))
+
+        second.duration.value = 1
+        second.duration.unit = TimeDuration.TimeUnitChoices.HOURS
+        second.duration.save()
+        workout.refresh_from_db()
+        self.assertEqual(workout.total_time, Decimal("4800.00"))
+
+        second.delete()
+        workout.refresh_from_db()
+        self.assertEqual(workout.total_time, Decimal("1200.00"))
+
+        workout.intervals.clear()
+        workout.refresh_from_db()
+        self.assertEqual(workout.total_time, Decimal("0.00"))
+
+    def test_sql_rebuild_matches_incremental(self):
+        workouts = bulk_create_workouts(self.author, 20)
+        workouts.append(self.build([self.time(3)]))
+        Workout.objects.update(total_time=0, total_distance=0, total_work=0)
+
+        self.assertEqual(recompute_all_totals(batch_size=7), 21)
+        rebuilt = list(Workout.objects.order_by("pk").values(*TOTAL_FIELDS))
+        recompute_totals(w.pk for w in workouts)
+        incremental = list(Workout.objects.order_by("pk").values(*TOTAL_FIELDS))
+        self.assertEqual(rebuilt, incremental)
+        self.assertEqual(rebuilt[0]["total_time"], Decimal("960.00"))
+        self.assertEqual(rebuilt[0]["total_distance"], Decimal("6437.38"))
+
+    def test_totals_exposed_filterable_and_orderable(self):
+        short = self.build([self.time(10)], title="Short")
+        long = self.build([self.time(60)], title="Long")
+
+        response = self.client.get(f"/api/workouts/{short.pk}/")
+        self.assertEqual(response.data["total_time"], "600.00")
+
+        response = self.client.get("/api/workouts/?ordering=-total_time")
+        self.assertEqual([w["title"] for w in response.data], ["Long", "Short"])
+
+        response = self.client.get("/api/workouts/?total_time__gte=1000")
+        self.assertEqual([w["id"] for w in response.data], [long.pk])
+
+    def test_step_range_filters_use_canonical_units(self):
+        miles = self.build(
+            [self.distance("1", DistanceDuration.DistanceUnitChoices.MILES)],
+            title="Miles",
+        )
+        split = self.build(
+            [
+                self.distance("100", DistanceDuration.DistanceUnitChoices.METERS),
+                self.distance("5", DistanceDuration.DistanceUnitChoices.KILOMETERS),
+                self.time(30, TimeDuration.TimeUnitChoices.SECONDS),
+            ],
+            title="Split",
+        )
+
+        def ids(query):
+            response = self.client.get(f"/api/workouts/?{query}")
+            self.assertEqual(response.status_code, 200, response.data)
+            return sorted(w["id"] for w in response.data)
+
+        self.assertEqual(ids("step_distance__gte=1000"), [miles.pk, split.pk])
+        # Both bounds apply to the same step: 100 m and 5 km both miss.
+        self.assertEqual(
+            ids("step_distance__gte=1000&step_distance__lte=2000"), [miles.pk]
+        )
+        self.assertEqual(ids("step_time__lte=60"), [split.pk])
+        self.assertEqual(ids("step_work__gte=0"), [])
+
+
+class SeedCommandTests(TestCase):
+    def seed(self, **options):
+        call_command("seed", stdout=StringIO(), **options)
+
+    def test_samples_without_existing_user(self):
+        self.seed()
+        self.assertEqual(Workout.objects.count(), 2)
+
+    def test_generated_data_is_reproducible(self):
+        options = {
+            "workouts": 30,
+            "intervals_per_workout": 5,
+            "users": 3,
+            "batch_size": 8,
+        }
+        self.seed(seed=7, **options)
+        self.assertEqual(Workout.objects.count(), 30)
+        self.assertEqual(User.objects.count(), 3)
+        self.assertTrue(
+            all(len(w.sorted_intervals) == 5 for w in Workout.objects.with_intervals())
+        )
+        fields = ("title", "author__username", "total_time")
+        first = list(Workout.objects.order_by("pk").values_list(*fields))
+
+        Workout.objects.all().delete()
+        self.seed(seed=7, **options)
+        second = list(Workout.objects.order_by("pk").values_list(*fields))
+        self.assertEqual(first, second)
+
+
+class BenchmarkCompareTests(SimpleTestCase):
+    def report(self, **metrics):
+        result = {"wall_ms": 100.0, "queries": 3, "peak_kib": 500.0, **metrics}
+        return {"results": [{"scale": 100, "name": "list", **result}]}
+
+    def test_regressions_beyond_threshold(self):
+        baseline = self.report()
+        self.assertEqual(compare(baseline, self.report(wall_ms=109.0)), [])
+        self.assertEqual(compare(baseline, self.report(wall_ms=50.0)), [])
+
+        [regression] = compare(baseline, self.report(wall_ms=111.0))
+        self.assertEqual(regression["metric"], "wall_ms")
+        self.assertAlmostEqual(regression["change"], 0.11)
+
+        # Any extra query is a regression.
+        [regression] = compare(baseline, self.report(queries=4))
+        self.assertEqual(regression["metric"], "queries")
+
+    def test_command_fails_on_regression(self):
+        baseline = self.report()
+        paths = {}
+        for name, report in (
+            ("baseline", baseline),
+            ("same", baseline),
+            ("slower", self.report(peak_kib=1000.0)),
+        ):
+            with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+                json.dump(report, f)
+            self.addCleanup(os.unlink, f.name)
+            paths[name] = f.name
+
+        out = StringIO()
+        call_command("benchmark_compare", paths["baseline"], paths["same"], stdout=out)
+        self.assertIn("No regressions", out.getvalue())
+        with self.assertRaisesMessage(CommandError, "1 regression(s) found."):
+            call_command(
+                "benchmark_compare",
+                paths["baseline"],
+                paths["slower"],
+                stdout=StringIO(),
+            )
+
+
+class InstrumentationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username="athlete")
+        cls.staff = User.objects.create(username="staff", is_staff=True)
+        cls.workouts = bulk_create_workouts(cls.author, 3)
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        # Drop what earlier tests' requests left in this process.
+        endpoint_stats.reset()
+
+    def test_server_timing_header(self):
+        response = self.client.get("/api/workouts/")
+        timing = dict(
+            metric.split(";", 1)[0:2] for metric in response["Server-Timing"].split(", ")
+        )
+        self.assertEqual(set(timing), {"db", "serialize", "render", "total"})
+        self.assertIn('desc="3 queries"', timing["db"])
+
+    def test_repeated_statements(self):
+        with collect_metrics() as metrics:
+            for workout in self.workouts:
+                Workout.objects.get(pk=workout.pk)
+            list(Workout.objects.filter(pk__in=[w.pk for w in self.workouts]))
+            list(Workout.objects.filter(pk__in=[self.workouts[0].pk]))
+        metrics.finish()
+
+        self.assertEqual(metrics.sql_count, 5)
+        [(statement, count, _), (in_statement, in_count, _)] = (
+            metrics.repeated_statements()
+        )
+        self.assertEqual(count, 3)
+        # IN lists of different lengths count as the same statement.
+        self.assertEqual(in_count, 2)
+        self.assertIn("IN (...)", in_statement)
+
+    @override_settings(PERFORMANCE_SLOW_REQUEST_MS=0)
+    def test_slow_requests_are_logged(self):
+        with self.assertLogs("workouts.performance", "WARNING") as logs:
+            self.client.get(f"/api/workouts/{self.workouts[0].pk}/")
+        self.assertIn("Slow request GET workout-detail", logs.output[0])
+
+    def test_endpoint_histograms(self):
+        for _ in range(3):
+            self.client.get("/api/workouts/")
+        self.client.get(f"/api/workouts/{self.workouts[0].pk}/")
+
+        stats = endpoint_stats.stats()
+        self.assertEqual(stats["GET workout-list"]["count"], 3)
+        self.assertEqual(sum(stats["GET workout-list"]["buckets"].values()), 3)
+        self.assertEqual(stats["GET workout-detail"]["count"], 1)
+
+        self.assertEqual(self.client.get("/api/performance/").status_code, 403)
+        self.client.force_authenticate(self.staff)
+        response = self.client.get("/api/performance/")
+        self.assertEqual(response.data["GET workout-list"]["count"], 3)
+
+        out = StringIO()
+        call_command("performance_stats", "--reset", stdout=out)
+        self.assertIn("GET workout-list", out.getvalue())
+        self.assertEqual(endpoint_stats.stats(), {})
+
+    @override_settings(PERFORMANCE_FLUSH_SECONDS=0)
+    def test_histograms_flushed_in_batches(self):
+        self.client.get("/api/workouts/")
+        count_key = endpoint_stats.key("GET workout-list", "count")
+        self.assertEqual(cache.get(count_key), 1)
+
+        with override_settings(PERFORMANCE_FLUSH_SECONDS=3600):
+            for _ in range(3):
+                self.client.get("/api/workouts/")
+            # Counted in this process only, until the next flush.
+            self.assertEqual(cache.get(count_key), 1)
+            self.assertEqual(endpoint_stats.stats()["GET workout-list"]["count"], 4)
+        self.assertEqual(cache.get(count_key), 4)
+
+    def test_workers_register_endpoints_concurrently(self):
+        # Two workers flushing endpoints neither has seen before.
+        workers = [EndpointStats(), EndpointStats()]
+        with collect_metrics() as metrics:
+            metrics.finish()
+        for worker, endpoint in zip(workers, ("GET a", "GET b")):
+            worker.record(endpoint, metrics)
+            worker.record("GET shared", metrics)
+        for worker in workers:
+            worker.flush()
+        self.assertEqual(endpoint_stats.endpoints(), ["GET a", "GET b", "GET shared"])
+        self.assertEqual(endpoint_stats.stats()["GET shared"]["count"], 2)
+
+
+class AsyncWorkoutViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username="athlete")
+        cls.workouts = bulk_create_workouts(cls.author, 5)
+
+    def setUp(self):
+        cache.clear()
+
+    async def test_list_matches_sync_endpoint(self):
+        client = AsyncClient()
+        expected = (await client.get("/api/workouts/")).json()
+        response = await client.get("/api/async/workouts/")
+        self.assertEqual(response.status_code, 200)
+        # assertNumQueries() is sync only; the middleware counts them instead.
+        self.assertIn('desc="2 queries"', response["Server-Timing"])
+        self.assertEqual(response.json(), expected)
+
+    async def test_retrieve_matches_sync_endpoint(self):
+        client = AsyncClient()
+        pk = self.workouts[2].pk
+        expected = (await client.get(f"/api/workouts/{pk}/")).json()
+        response = await client.get(f"/api/async/workouts/{pk}/")
+        self.assertIn('desc="2 queries"', response["Server-Timing"])
+        self.assertEqual(response.json(), expected)
+
+        response = await client.get("/api/async/workouts/0/")
+        self.assertEqual(response.status_code, 404)
+        response = await client.post(f"/api/async/workouts/{pk}/")
+        self.assertEqual(response.status_code, 405)
+
+    async def test_stats_flushed_off_the_event_loop(self):
+        loop_thread = threading.get_ident()
+        flushes = []
+        with override_settings(PERFORMANCE_FLUSH_SECONDS=0), mock.patch.object(
+            endpoint_stats, "flush", lambda: flushes.append(threading.get_ident())
+        ):
+            await AsyncClient().get(f"/api/async/workouts/{self.workouts[0].pk}/")
+        self.assertEqual(len(flushes), 1)
+        self.assertNotEqual(flushes[0], loop_thread)
+
+
+class WorkoutFilterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username="athlete")
+        cls.other = User.objects.create(username="other")
+        Workout.objects.bulk_create(
+            Workout(
+                author=cls.author if i % 2 else cls.other,
+                title=f"{'Tempo' if i % 3 else 'Hill'} {i}",
+                workout_type=Workout.WorkoutType.values[i % 3],
+            )
+            for i in range(300)
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+    def get(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/workouts/", {"page_size": 10, **params})
+        self.assertEqual(response.status_code, 200)
+        return response, queries[0]["sql"]
+
+    def test_filters(self):
+        ids = lambda response: [w["id"] for w in response.data["results"]]
+
+        response, _ = self.get(author=self.author.pk, page_size=1000)
+        self.assertEqual(len(response.data["results"]), 150)
+        self.assertTrue(all(w["author"] == self.author.pk for w in response.data["results"]))
+
+        response, _ = self.get(
+            author=self.author.pk,
+            workout_type=Workout.WorkoutType.SWIM,
+            page_size=1000,
+        )
+        self.assertEqual(len(response.data["results"]), 50)
+
+        response, _ = self.get(title__startswith="Hill", page_size=1000)
+        self.assertEqual(len(response.data["results"]), 100)
+        self.assertTrue(all(w["title"].startswith("Hill") for w in response.data["results"]))
+
+        first = Workout.objects.order_by("created_at", "id")[5]
+        response, _ = self.get(created_at__lte=first.created_at.isoformat())
+        self.assertIn(first.pk, ids(response))
+        response, _ = self.get(updated_at__gte="2100-01-01T00:00:00Z")
+        self.assertEqual(ids(response), [])
+
+    def test_ordering_whitelist(self):
+        response = self.client.get("/api/workouts/", {"ordering": "-title"})
+        titles = [w["title"] for w in response.data]
+        self.assertEqual(titles, sorted(titles, reverse=True))
+
+        # Fields outside ordering_fields are ignored.
+        response = self.client.get("/api/workouts/", {"ordering": "description"})
+        self.assertEqual(response.status_code, 200)
+
+    def test_filters_use_an_index(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("Query plans are checked with SQLite's EXPLAIN QUERY PLAN.")
+        since = "2000-01-01T00:00:00Z"
+        combinations = [
+            {},
+            {"author": self.author.pk},
+            {"workout_type": Workout.WorkoutType.RUN},
+            {"created_at__gte": since},
+            {"updated_at__gte": since},
+            {"updated_at__lte": "2100-01-01T00:00:00Z"},
+            {"title__startswith": "Tempo"},
+            {"author": self.author.pk, "created_at__gte": since},
+            {"author": self.author.pk, "workout_type": Workout.WorkoutType.RUN},
+            {"workout_type": Workout.WorkoutType.RUN, "created_at__gte": since},
+            {"author": self.author.pk, "title__startswith": "Tempo"},
+            {"author": self.author.pk, "ordering": "-updated_at", "page_size": None},
+            {"author": self.author.pk, "updated_at__gte": since},
+            {"ordering": "-created_at"},
+            {"ordering": "-total_time"},
+        ]
+        for params in combinations:
+            params = {"page_size": 10, **params}
+            params = {k: v for k, v in params.items() if v is not None}
+            with self.subTest(params=params):
+                _, sql = self.get(**params)
+                with connection.cursor() as cursor:
+                    cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+                    plan = [row[-1] for row in cursor.fetchall()]
+                table_steps = [step for step in plan if "workouts_workout" in step]
+                self.assertTrue(table_steps, plan)
+                for step in table_steps:
+                    # "SEARCH ... USING INDEX" reads the range the filters
+                    # select. "SCAN ... USING INDEX" walks a whole index, which
+                    # only an unfiltered page may do: it stops after a page.
+                    filtered = params.keys() - {"page_size", "ordering"}
+                    expected = "SEARCH" if filtered else "SCAN"
+                    self.assertTrue(step.startswith(expected), plan)
+                    self.assertIn("INDEX", step, plan)
+                if "ordering" in params:
+                    # The index serves the order, descending id tiebreak
+                    # included, rather than a sort of every matching row.
+                    self.assertFalse(any("TEMP B-TREE" in step for step in plan), plan)
+
+
+class WorkoutSparseFieldsetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username="athlete")
+        cls.workouts = bulk_create_workouts(cls.author, 20)
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+    def test_titles_only_is_one_narrow_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/workouts/", {"fields": "id,title"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("description", queries[0]["sql"])
+        self.assertEqual(
+            response.data[0], {"id": self.workouts[0].pk, "title": "Workout 0"}
+        )
+
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                "/api/workouts/", {"fields": "title", "page_size": 5}
+            )
+        self.assertEqual(
+            response.data["results"], [{"title": f"Workout {i}"} for i in range(5)]
+        )
+
+    def test_expand_intervals(self):
+        full = self.client.get(f"/api/workouts/{self.workouts[0].pk}/").data
+
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                "/api/workouts/", {"fields": "title", "expand": "intervals"}
+            )
+        [step] = [i for i in response.data[0]["intervals"] if i["is_repeat"]]
+        self.assertEqual(set(response.data[0]), {"title", "intervals"})
+        # Without intervals.rest_interval the rest is referenced by id.
+        self.assertIsInstance(step["rest_interval"], int)
+
+        response = self.client.get(
+            f"/api/workouts/{self.workouts[0].pk}/",
+            {"expand": "intervals.rest_interval"},
+        )
+        self.assertEqual(response.data, full)
+
+        # Expanding without ``fields`` keeps every top-level field.
+        response = self.client.get("/api/workouts/", {"expand": ""})
+        self.assertNotIn("intervals", response.data[0])
+        self.assertIn("description", response.data[0])
+
+    def test_unknown_fields(self):
+        response = self.client.get(
+            "/api/workouts/", {"fields": "title,secret", "expand": "author"}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data), {"fields", "expand"})
+
+
+class FastSerializationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create(username="athlete")
+        bulk_create_workouts(author, 3)
+        call_command("seed", stdout=StringIO())
+        call_command("seed", workouts=20, users=2, stdout=StringIO())
+
+    def test_parity_with_workout_serializer(self):
+        workouts = Workout.objects.order_by("pk")
+        expected = WorkoutSerializer(workouts.with_intervals(), many=True).data
+        with self.assertNumQueries(2):
+            entries = workout_representations(workouts)
+        self.assertEqual(render([entry.data for entry in entries]), render(expected))
+        self.assertEqual(
+            [(entry.pk, entry.updated_at) for entry in entries],
+            list(workouts.values_list("pk", "updated_at")),
+        )
+
+    def test_repeat_without_rest(self):
+        [workout] = bulk_build_workouts(
+            [
+                {
+                    "author": User.objects.first(),
+                    "title": "Strides",
+                    "intervals": [
+                        {
+                            "duration_type": BaseDuration.DurationType.TIME,
+                            "duration_value": "20",
+                            "duration_unit": TimeDuration.TimeUnitChoices.SECONDS,
+                            "repititions": 6,
+                        }
+                    ],
+                }
+            ]
+        )
+        workouts = Workout.objects.filter(pk=workout.pk)
+        expected = WorkoutSerializer(workouts.with_intervals(), many=True).data
+        [entry] = workout_representations(workouts)
+        self.assertIsNone(entry.data["intervals"][0]["rest_interval"])
+        self.assertEqual(render(entry.data), render(expected[0]))
+
+    def test_interval_from_dict(self):
+        interval = Interval.objects.filter(repititions__gt=0).select_related(
+            "duration", "rest_interval__duration"
+        )[0]
+        rest = interval.rest_interval
+
+        def row(interval, **extra):
+            return {
+                "pk": interval.pk,
+                "parent": None,
+                "perceived_effort": interval.perceived_effort,
+                "repititions": interval.repititions,
+                "duration_type": interval.duration.type,
+                "duration_value": interval.duration.value,
+                "duration_unit": interval.duration.unit,
+                **extra,
+            }
+
+        data = interval_data(IntervalRow(**row(interval, rest=IntervalRow(**row(rest)))))
+        self.assertEqual(render(data), render(IntervalSerializer(interval).data))
+
+
+class TransferCommandTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command("seed", stdout=StringIO())
+        call_command("seed", workouts=25, users=3, stdout=StringIO())
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "workouts.ndjson.gz")
+
+    def snapshot(self):
+        """Every workout's representation with its author, minus database ids."""
+
+        def strip(value):
+            if isinstance(value, dict):
+                return {
+                    key: strip(item)
+                    for key, item in value.items()
+                    if key not in ("id", "parent", "author")
+                }
+            if isinstance(value, list):
+                return [strip(item) for item in value]
+            return value
+
+        workouts = Workout.objects.with_intervals().order_by("created_at", "pk")
+        data = WorkoutSerializer(workouts, many=True).data
+        return [(w.author.username, strip(d)) for w, d in zip(workouts, data)]
+
+    def export(self):
+        call_command(
+            "export_workouts", self.path, "--chunk-size", "10", stderr=StringIO()
+        )
+
+    def test_round_trip(self):
+        before = self.snapshot()
+        self.export()
+        Workout.objects.all().delete()
+
+        out = StringIO()
+        call_command("import_workouts", self.path, "--batch-size", "7", stdout=out)
+        self.assertIn("Imported 27 workouts", out.getvalue())
+        self.assertIn("rows/s", out.getvalue())
+        self.assertEqual(self.snapshot(), before)
+        self.assertFalse(os.path.exists(f"{self.path}.checkpoint"))
+
+    def test_resume_after_failure(self):
+        before = self.snapshot()
+        self.export()
+        Workout.objects.all().delete()
+
+        from workouts import transfer
+
+        import_batch = transfer.import_batch
+        calls = 0
+
+        def failing_batch(records):
+            nonlocal calls
+            calls += 1
+            if calls == 3:
+                raise ValueError("connection lost")
+            return import_batch(records)
+
+        with mock.patch.object(transfer, "import_batch", failing_batch):
+            with self.assertRaises(CommandError):
+                call_command(
+                    "import_workouts", self.path, "--batch-size", "5", stdout=StringIO()
+                )
+        self.assertEqual(Workout.objects.count(), 10)
+        with open(f"{self.path}.checkpoint") as f:
+            self.assertEqual(json.load(f), {"line": 10})
+
+        out = StringIO()
+        call_command("import_workouts", self.path, "--batch-size", "5", stdout=out)
+        self.assertIn("Resuming after line 10.", out.getvalue())
+        self.assertEqual(self.snapshot(), before)
+
+    def test_invalid_records_rejected(self):
+        self.export()
+        with gzip.open(self.path, "rt") as f:
+            records = [json.loads(line) for line in f]
+        Workout.objects.all().delete()
+        changes = {
+            "duration_type": 9,
+            "duration_unit": 9,
+            "duration_value": "ten",
+            "interval_type": None,
+            "perceived_effort": 11,
+            "repititions": -1,
+        }
+        for field, value in changes.items():
+            broken = copy.deepcopy(records)
+            broken[-1]["intervals"][0][field] = value
+            with gzip.open(self.path, "wt") as f:
+                f.writelines(json.dumps(record) + "\n" for record in broken)
+            with self.assertRaisesMessage(CommandError, "Invalid record"):
+                call_command(
+                    "import_workouts",
+                    self.path,
+                    "--batch-size",
+                    "100",
+                    "--restart",
+                    stdout=StringIO(),
+                )
+            self.assertFalse(Workout.objects.exists(), field)
+
+
+class TransferRetryTests(TransactionTestCase):
+    def test_stale_durations_retried(self):
+        self.addCleanup(duration_interner.clear)
+        minutes = TimeDuration.TimeUnitChoices.MINUTES
+        # A duration deleted since this worker interned it.
+        duration_interner.pks[
+            duration_key(BaseDuration.DurationType.TIME, 5, minutes)
+        ] = 10**6
+        step = {
+            "interval_type": Interval.IntervalType.ACTIVE,
+            "duration_type": BaseDuration.DurationType.TIME,
+            "duration_value": "5.00",
+            "duration_unit": minutes,
+        }
+        record = {
+            "author": "athlete",
+            "title": "Fives",
+            "workout_type": Workout.WorkoutType.RUN,
+            "created_at": "2024-01-01T00:00:00+00:00",
+            "updated_at": "2024-01-01T00:00:00+00:00",
+            "intervals": [step],
+        }
+        import_workouts([json.dumps(record)])
+        [interval] = Workout.objects.get().sorted_intervals
+        self.assertEqual(interval.duration.value, 5)
+
+
+ZWO = """<workout_file>
+    <name>Over Unders</name>
+    <description>Threshold work</description>
+    <sportType>run</sportType>
+    <workout>
+        <Warmup Duration="600" PowerLow="0.25" PowerHigh="0.75"/>
+        <SteadyState Duration="300" Power="0.88">
+            <textevent timeoffset="10" message="Settle in"/>
+        </SteadyState>
+        <IntervalsT Repeat="5" OnDuration="60" OffDuration="30"
+                    OnPower="1.2" OffPower="0.5"/>
+        <Cooldown Duration="300" PowerLow="0.7" PowerHigh="0.3"/>
+    </workout>
+</workout_file>
+"""
+
+ERG = """[COURSE HEADER]
+DESCRIPTION = Sprints
+FTP = 200
+MINUTES WATTS
+[END COURSE HEADER]
+[COURSE DATA]
+0.00	100
+10.00	100
+10.00	300
+11.00	300
+11.00	100
+12.00	100
+12.00	300
+13.00	300
+13.00	100
+14.00	100
+14.00	180
+24.00	180
+[END COURSE DATA]
+"""
+
+MRC = """[COURSE HEADER]
+MINUTES PERCENT
+[END COURSE HEADER]
+[COURSE DATA]
+0	50
+5	90
+5	95
+25	95
+[END COURSE DATA]
+"""
+
+
+class WorkoutFileImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username="coach")
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        os.mkdir(os.path.join(self.directory, "zwift"))
+        for name, content in (
+            ("zwift/over-unders.zwo", ZWO),
+            ("sprints.erg", ERG),
+            ("tempo.mrc", MRC),
+            ("broken.zwo", "<workout_file><workout>"),
+            ("notes.txt", "not a workout"),
+        ):
+            with open(os.path.join(self.directory, name), "w") as f:
+                f.write(content)
+
+    def steps(self, title):
+        workout = Workout.objects.get(title=title)
+        return [
+            (
+                interval.type,
+                interval.duration.value,
+                interval.perceived_effort,
+                interval.repititions,
+                interval.rest_interval and interval.rest_interval.duration.value,
+            )
+            for interval in workout.sorted_intervals
+        ]
+
+    def test_import_directory(self):
+        out, err = StringIO(), StringIO()
+        call_command(
+            "import_workout_files",
+            self.directory,
+            "--author",
+            "coach",
+            "--batch-size",
+            "2",
+            stdout=out,
+            stderr=err,
+        )
+        self.assertIn("Imported 3 workouts", out.getvalue())
+        self.assertIn("skipped 1 files", out.getvalue())
+        self.assertIn("broken.zwo", err.getvalue())
+
+        zwo = Workout.objects.get(title="Over Unders")
+        self.assertEqual(zwo.workout_type, Workout.WorkoutType.RUN)
+        self.assertEqual(zwo.description, "Threshold work")
+        self.assertEqual(zwo.author, self.author)
+        self.assertEqual(zwo.total_time, Decimal(600 + 300 + 5 * 90 + 300))
+        self.assertEqual(
+            self.steps("Over Unders"),
+            [
+                (Interval.IntervalType.WARMUP, Decimal(600), 2, 0, None),
+                (Interval.IntervalType.ACTIVE, Decimal(300), 6, 0, None),
+                (Interval.IntervalType.ACTIVE, Decimal(60), 9, 5, Decimal(30)),
+                (Interval.IntervalType.COOLDOWN, Decimal(300), 2, 0, None),
+            ],
+        )
+        # Alternating on/off segments become one repeated step.
+        self.assertEqual(
+            self.steps("sprints"),
+            [
+                (Interval.IntervalType.WARMUP, Decimal(600), 2, 0, None),
+                (Interval.IntervalType.ACTIVE, Decimal(60), 10, 2, Decimal(60)),
+                (Interval.IntervalType.ACTIVE, Decimal(600), 6, 0, None),
+            ],
+        )
+        self.assertEqual(
+            self.steps("tempo"),
+            [
+                (Interval.IntervalType.ACTIVE, Decimal(300), 4, 0, None),
+                (Interval.IntervalType.ACTIVE, Decimal(1200), 8, 0, None),
+            ],
+        )
+
+    def test_unknown_author(self):
+        with self.assertRaises(CommandError):
+            call_command("import_workout_files", self.directory, "--author", "nobody")
+
+
+class WorkoutFileRenderTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create(username="coach")
+
+        def timed_step(seconds, interval_type, effort, **extra):
+            return {
+                "interval_type": interval_type,
+                "duration_type": BaseDuration.DurationType.TIME,
+                "duration_value": Decimal(seconds),
+                "duration_unit": TimeDuration.TimeUnitChoices.SECONDS,
+                "perceived_effort": effort,
+                **extra,
+            }
+
+        cls.steps = [
+            timed_step(600, Interval.IntervalType.WARMUP, 2),
+            timed_step(300, Interval.IntervalType.ACTIVE, 6),
+            timed_step(
+                60,
+                Interval.IntervalType.ACTIVE,
+                9,
+                repititions=5,
+                rest_interval=timed_step(30, Interval.IntervalType.REST, 2),
+            ),
+            timed_step(300, Interval.IntervalType.COOLDOWN, 2),
+        ]
+        [cls.workout] = bulk_build_workouts(
+            [
+                {
+                    "author": author,
+                    "title": "Over Unders",
+                    "description": "Threshold work",
+                    "workout_type": Workout.WorkoutType.CYCLE,
+                    "intervals": cls.steps,
+                }
+            ]
+        )
+        [cls.untimed] = bulk_build_workouts(
+            [
+                {
+                    "author": author,
+                    "title": "Mile repeats",
+                    "intervals": [
+                        {
+                            "duration_type": BaseDuration.DurationType.DISTANCE,
+                            "duration_value": Decimal(1),
+                            "duration_unit": DistanceDuration.DistanceUnitChoices.MILES,
+                        }
+                    ],
+                }
+            ]
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def parse(self, response, format):
+        from workouts.formats import parse_file
+
+        path = os.path.join(self.directory, f"workout.{format}")
+        with open(path, "wb") as f:
+            f.write(response.content)
+        return parse_file(path)
+
+    def test_zwo_round_trip(self):
+        response = self.client.get(f"/api/workouts/{self.workout.pk}/?format=zwo")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(
+            response["Content-Type"].startswith("application/vnd.zwift.workout+xml")
+        )
+        self.assertIn(".zwo", response["Content-Disposition"])
+        spec = self.parse(response, "zwo")
+        self.assertEqual(spec["title"], "Over Unders")
+        self.assertEqual(spec["intervals"], self.steps)
+
+    def test_erg_by_accept_header(self):
+        response = self.client.get(
+            f"/api/workouts/{self.workout.pk}/", HTTP_ACCEPT="text/x-erg"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/x-erg"))
+        # Repeats are written out in full; reading them back folds them again.
+        self.assertEqual(response.content.count(b"\t"), 2 * (3 + 2 * 5))
+        spec = self.parse(response, "erg")
+        self.assertEqual(
+            [(s["duration_value"], s.get("repititions")) for s in spec["intervals"]],
+            [(600, None), (300, None), (60, 5), (300, None)],
+        )
+
+    def test_cached_until_changed(self):
+        url = f"/api/workouts/{self.workout.pk}/?format=erg"
+        first = self.client.get(url)
+        with self.assertNumQueries(1):
+            cached = self.client.get(url)
+        self.assertEqual(cached.content, first.content)
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304
+        )
+
+        interval = self.workout.sorted_intervals[1]
+        interval.duration.value = 420
+        interval.duration.save()
+        changed = self.client.get(url)
+        self.assertNotEqual(changed.content, first.content)
+        self.assertIn(b"17.00\t", changed.content)
+
+    def test_untimed_workout_not_acceptable(self):
+        response = self.client.get(f"/api/workouts/{self.untimed.pk}/?format=zwo")
+        self.assertEqual(response.status_code, 406)
+        self.assertEqual(response["Content-Type"], "application/json")
+
+    def test_list_has_no_file_formats(self):
+        self.assertEqual(self.client.get("/api/workouts/?format=zwo").status_code, 404)
+        self.assertEqual(self.client.get("/api/workouts/").status_code, 200)
+
+
+class WorkoutStepPositionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username="athlete")
+        [cls.workout, cls.long_workout] = bulk_build_workouts(
+            [
+                {
+                    "author": cls.author,
+                    "title": title,
+                    "intervals": [
+                        {
+                            "duration_type": BaseDuration.DurationType.TIME,
+                            "duration_value": Decimal(minutes),
+                            "duration_unit": TimeDuration.TimeUnitChoices.MINUTES,
+                        }
+                        for minutes in range(1, count + 1)
+                    ],
+                }
+                for title, count in (("Short", 3), ("Long", 300))
+            ]
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+    def url(self, workout=None, interval=None):
+        url = f"/api/workouts/{(workout or self.workout).pk}/steps/"
+        return url if interval is None else f"{url}{interval}/"
+
+    def minutes(self, data):
+        return [Decimal(i["duration"]["value"]) for i in data["intervals"]]
+
+    def ids(self, workout=None):
+        return [i.pk for i in (workout or self.workout).sorted_intervals]
+
+    def step(self, minutes, **extra):
+        return {
+            "duration_type": BaseDuration.DurationType.TIME,
+            "duration_value": minutes,
+            "duration_unit": TimeDuration.TimeUnitChoices.MINUTES,
+            **extra,
+        }
+
+    def test_insert(self):
+        first, second, _ = self.ids()
+        response = self.client.post(self.url(), self.step(10), format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.minutes(response.data), [1, 2, 3, 10])
+
+        response = self.client.post(self.url(), self.step(20, after=None), format="json")
+        self.assertEqual(self.minutes(response.data), [20, 1, 2, 3, 10])
+
+        response = self.client.post(
+            self.url(),
+            self.step(
+                30,
+                after=first,
+                repititions=2,
+                rest_interval=self.step(1, interval_type=Interval.IntervalType.REST),
+            ),
+            format="json",
+        )
+        self.assertEqual(self.minutes(response.data), [20, 1, 30, 2, 3, 10])
+        # Parents follow the order; totals count the repeat and its rests.
+        intervals = response.data["intervals"]
+        self.assertEqual(intervals[3]["parent"], intervals[2]["id"])
+        self.assertEqual(intervals[2]["rest_interval"]["duration"]["value"], "1.00")
+        self.assertEqual(response.data["total_time"], f"{(36 + 2 * (30 + 1)) * 60}.00")
+
+    def test_move(self):
+        first, second, third = self.ids()
+        response = self.client.patch(
+            self.url(interval=third), {"after": None}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.minutes(response.data), [3, 1, 2])
+        self.assertIsNone(response.data["intervals"][0]["parent"])
+
+        response = self.client.patch(
+            self.url(interval=third), {"after": second}, format="json"
+        )
+        self.assertEqual(self.minutes(response.data), [1, 2, 3])
+        self.assertEqual(
+            self.client.get(f"/api/workouts/{self.workout.pk}/").data, response.data
+        )
+
+    def test_delete(self):
+        first, second, third = self.ids()
+        response = self.client.delete(self.url(interval=second))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.minutes(response.data), [1, 3])
+        self.assertEqual(response.data["intervals"][1]["parent"], first)
+        self.assertEqual(response.data["total_time"], "240.00")
+        self.assertFalse(Interval.objects.filter(pk=second).exists())
+
+    def test_unknown_steps(self):
+        other = self.ids(self.long_workout)[0]
+        response = self.client.delete(self.url(interval=other))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.patch(
+            self.url(interval=self.ids()[0]), {"after": other}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(self.url(), self.step(5, after=other), format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(self.ids()), 3)
+
+    def test_repeated_inserts_at_one_spot(self):
+        from workouts.models.utils import bulk_create_steps
+        from workouts.positions import insert_step
+
+        first = self.ids()[0]
+        for minutes in range(100, 140):
+            [interval] = bulk_create_steps([self.step(minutes)])
+            insert_step(self.workout.pk, interval, after=first)
+        minutes = [i.duration.value for i in self.workout.sorted_intervals]
+        self.assertEqual(minutes, [1, *range(139, 99, -1), 2, 3])
+
+    def test_actions_touch_a_constant_number_of_rows(self):
+        from workouts.models.utils import bulk_create_steps
+        from workouts.positions import delete_step, insert_step, move_step
+
+        def count(action):
+            with CaptureQueriesContext(connection) as queries:
+                action()
+            return len(queries)
+
+        counts = []
+        for workout in (self.workout, self.long_workout):
+            first, second, *_, last = self.ids(workout)
+            [interval] = bulk_create_steps([self.step(5)])
+            counts.append(
+                (
+                    count(lambda: insert_step(workout.pk, interval, after=first)),
+                    count(lambda: move_step(workout.pk, last, after=None)),
+                    count(lambda: delete_step(workout.pk, second)),
+                )
+            )
+        self.assertEqual(counts[0], counts[1])
+
+    def test_ordered_reads_use_the_position_index(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("Query plans are checked with SQLite's EXPLAIN QUERY PLAN.")
+        from workouts.serializers.fast import interval_queryset
+
+        sql, params = interval_queryset([self.workout.pk]).query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            plan = " ".join(row[-1] for row in cursor.fetchall())
+        self.assertIn("workout_step_position_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+
+class WorkoutStepMigrationTests(TransactionTestCase):
+    before = [("workouts", "0005_workout_filter_indexes")]
+    after = [("workouts", "0006_workout_step_positions")]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(latest_migrations())
+
+    def test_positions_follow_the_parent_chain(self):
+        apps = self.migrate(self.before)
+        OldWorkout = apps.get_model("workouts", "Workout")
+        OldInterval = apps.get_model("workouts", "Interval")
+        duration = apps.get_model("workouts", "BaseDuration").objects.create(
+            type=BaseDuration.DurationType.TIME, value=1, unit=1
+        )
+        author = apps.get_model("auth", "User").objects.create(username="athlete")
+        workout = OldWorkout.objects.create(author_id=author.pk, title="Chain")
+        first, second, third = (
+            OldInterval.objects.create(duration_id=duration.pk) for _ in range(3)
+        )
+        second.parent = third.pk
+        third.parent = first.pk
+        OldInterval.objects.bulk_update([second, third], ["parent"])
+        workout.intervals.add(second, first, third)
+
+        self.migrate(self.after)
+        # The current models only fit the latest schema.
+        self.migrate(latest_migrations())
+        self.assertEqual(
+            [i.pk for i in Workout.objects.get(pk=workout.pk).sorted_intervals],
+            [first.pk, third.pk, second.pk],
+        )
+
+        apps = self.migrate(self.before)
+        parents = dict(
+            apps.get_model("workouts", "Interval").objects.values_list("pk", "parent")
+        )
+        self.assertEqual(
+            parents, {first.pk: None, third.pk: first.pk, second.pk: third.pk}
+        )
+
+
+class DurationDedupeTests(TransactionTestCase):
+    before = [("workouts", "0006_workout_step_positions")]
+    after = [("workouts", "0007_intern_durations")]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(latest_migrations())
+
+    def create_copies(self, apps, values, copies):
+        """``copies`` rows of each TIME duration value, each with an interval."""
+        Duration = apps.get_model("workouts", "BaseDuration")
+        OldInterval = apps.get_model("workouts", "Interval")
+        durations = {}
+        for value in values:
+            for _ in range(copies):
+                duration = Duration.objects.create(
+                    type=BaseDuration.DurationType.TIME,
+                    value=Decimal(value),
+                    unit=TimeDuration.TimeUnitChoices.MINUTES,
+                )
+                OldInterval.objects.create(duration_id=duration.pk)
+                durations.setdefault(value, []).append(duration.pk)
+        return durations
+
+    def test_migration_collapses_copies_onto_lowest_pk(self):
+        durations = self.create_copies(self.migrate(self.before), ["10", "5.5"], 3)
+
+        self.migrate(self.after)
+        # The current models only fit the latest schema.
+        self.migrate(latest_migrations())
+        kept = [pks[0] for pks in durations.values()]
+        self.assertEqual(sorted(BaseDuration.objects.values_list("pk", flat=True)), kept)
+        self.assertEqual(
+            list(
+                Interval.objects.order_by("pk").values_list("duration_id", flat=True)
+            ),
+            [pk for pk in kept for _ in range(3)],
+        )
+        self.assertEqual(
+            Interval.objects.filter(duration_id=kept[1]).first().duration.value,
+            Decimal("5.50"),
+        )
+
+    def test_command_dedupes_in_batches_and_reports(self):
+        durations = self.create_copies(
+            self.migrate(self.before), ["1", "2", "3"], copies=3
+        )
+
+        out = StringIO()
+        call_command("dedupe_durations", batch_size=2, samples=5, stdout=out)
+        output = out.getvalue()
+        self.assertIn("Before: 9 rows", output)
+        self.assertIn("After: 3 rows", output)
+        self.assertEqual(output.count("Collapsed"), 2)
+        self.assertIn("Deduplicated 3 keys: deleted 6 rows and repointed 6", output)
+        self.assertEqual(
+            set(Interval.objects.values_list("duration_id", flat=True)),
+            {pks[0] for pks in durations.values()},
+        )
+
+        with self.assertRaises(CommandError):
+            call_command("dedupe_durations", batch_size=0, stdout=StringIO())
+
+    def test_cached_copies_are_dropped_on_failed_write(self):
+        durations = self.create_copies(self.migrate(self.before), ["4"], copies=2)
+        self.addCleanup(duration_interner.clear)
+        minutes = TimeDuration.TimeUnitChoices.MINUTES
+        key = duration_key(BaseDuration.DurationType.TIME, 4, minutes)
+        # Copies are interned as the lowest pk, the one a dedupe keeps...
+        self.assertEqual(duration_interner.lookup([key]), {key: durations["4"][0]})
+
+        # ...but a worker may have cached another before that was the case.
+        duration_interner.pks[key] = durations["4"][1]
+        call_command("dedupe_durations", stdout=StringIO())
+        self.migrate(latest_migrations())
+        step = {
+            "duration_type": BaseDuration.DurationType.TIME,
+            "duration_value": Decimal(4),
+            "duration_unit": minutes,
+        }
+        author = User.objects.create(username="athlete")
+        [workout] = bulk_build_workouts(
+            [{"author": author, "title": "Fours", "intervals": [step]}]
+        )
+        self.assertEqual(
+            [i.duration_id for i in workout.sorted_intervals], [durations["4"][0]]
+        )
+        self.assertEqual(duration_interner.pks, {key: durations["4"][0]})
+
+
+class CanonicalValueBackfillTests(TransactionTestCase):
+    before = [("workouts", "0007_intern_durations")]
+    after = [("workouts", "0008_duration_canonical_value")]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(latest_migrations())
+
+    def test_migration_backfills_every_type(self):
+        Duration = self.migrate(self.before).get_model("workouts", "BaseDuration")
+        rows = {
+            (units.DISTANCE, Decimal("0.5"), 1): Decimal("804.672"),
+            (units.TIME, Decimal(2), 3): Decimal(7200),
+            (units.CALORIC, Decimal(10), 1): Decimal("41.84"),
+            (units.POWER, Decimal(250), 1): Decimal(250),
+            (units.HEART_RATE, Decimal(150), 1): None,
+        }
+        pks = {
+            key: Duration.objects.create(type=key[0], value=key[1], unit=key[2]).pk
+            for key in rows
+        }
+
+        self.migrate(self.after)
+        self.migrate(latest_migrations())
+        values = dict(BaseDuration.objects.values_list("pk", "canonical_value"))
+        self.assertEqual({key: values[pk] for key, pk in pks.items()}, rows)
+
+    def test_command_recomputes_in_batches(self):
+        for value in range(1, 6):
+            TimeDuration.objects.intern(value)
+        BaseDuration.objects.update(canonical_value=None)
+
+        out = StringIO()
+        call_command("backfill_canonical_values", batch_size=2, stdout=out)
+        self.assertIn("Backfilled 5 durations.", out.getvalue())
+        self.assertEqual(
+            sorted(BaseDuration.objects.values_list("canonical_value", flat=True)),
+            [Decimal(60 * value) for value in range(1, 6)],
+        )
+
+
+SQLITE = "django.db.backends.sqlite3"
+
+
+@override_settings(
+    DATABASE_ROUTERS=["workouts.routers.ReplicaRouter"],
+    DATABASE_REPLICAS=["replica_a", "replica_b"],
+    DATABASE_REPLICA_STICKY_SECONDS=60,
+    DATABASE_REPLICA_HEALTH_INTERVAL=0,
+)
+class ReplicaRoutingTests(TransactionTestCase):
+    """Two SQLite files stand in for replicas, as snapshots of the primary."""
+
+    aliases = ["replica_a", "replica_b"]
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.paths = {}
+        for alias in self.aliases:
+            self.paths[alias] = os.path.join(directory.name, f"{alias}.sqlite3")
+            # configure_settings() fills in the defaults; it needs a default.
+            settings_dict = connections.configure_settings(
+                {
+                    "default": {"ENGINE": SQLITE},
+                    alias: {"ENGINE": SQLITE, "NAME": self.paths[alias]},
+                }
+            )[alias]
+            # Connections added outside settings.DATABASES are not subject to
+            # the test case's database restrictions.
+            connections[alias] = load_backend(SQLITE).DatabaseWrapper(
+                settings_dict, alias
+            )
+            self.addCleanup(self.remove_replica, alias)
+        replica_health.reset()
+        self.addCleanup(replica_health.reset)
+        cache.clear()
+        self.client = APIClient()
+        self.author = User.objects.create(username="athlete")
+
+    def remove_replica(self, alias):
+        connections[alias].close()
+        del connections[alias]
+
+    def snapshot(self, aliases=aliases):
+        """Copy the primary, as it is now, onto ``aliases``."""
+        primary = connections["default"]
+        primary.ensure_connection()
+        for alias in aliases:
+            connections[alias].close()
+            target = sqlite3.connect(self.paths[alias])
+            primary.connection.backup(target)
+            target.close()
+
+    def titles(self):
+        response = self.client.get("/api/workouts/")
+        self.assertEqual(response.status_code, 200)
+        return [w["title"] for w in response.data]
+
+    def test_reads_use_replicas_until_the_client_writes(self):
+        Workout.objects.create(author=self.author, title="Replicated")
+        self.snapshot()
+        Workout.objects.create(author=self.author, title="Lagging")
+
+        self.assertEqual(self.titles(), ["Replicated"])
+
+        response = self.client.post(
+            "/api/workouts/",
+            {
+                "author": self.author.pk,
+                "title": "Mine",
+                "description": "Written to the primary",
+                "intervals": [],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.assertEqual(self.titles(), ["Replicated", "Lagging", "Mine"])
+
+        # Once the pin expires, reads go back to the replicas.
+        self.client.cookies[PIN_COOKIE] = str(time.time() - 1)
+        self.assertEqual(self.titles(), ["Replicated"])
+
+    def test_routing(self):
+        self.snapshot()
+        self.assertEqual(router.db_for_read(Workout), "default")
+        with replica_reads():
+            self.assertIn(router.db_for_read(Workout), self.aliases)
+            self.assertEqual(router.db_for_read(User), "default")
+            Workout.objects.create(author=self.author, title="Written")
+            # The rest of a request that wrote reads its own writes.
+            self.assertEqual(router.db_for_read(Workout), "default")
+        with replica_reads(enabled=False):
+            self.assertEqual(router.db_for_read(Workout), "default")
+        self.assertFalse(router.allow_migrate("replica_a", "workouts"))
+        self.assertTrue(router.allow_migrate("default", "workouts"))
+
+    def test_a_request_reads_from_one_replica(self):
+        first = Workout.objects.create(author=self.author, title="Replicated")
+        self.snapshot(["replica_a"])
+        Workout.objects.create(author=self.author, title="Lagging")
+        self.snapshot(["replica_b"])
+        snapshots = {
+            "replica_a": ["Replicated"],
+            "replica_b": ["Replicated", "Lagging"],
+        }
+
+        with replica_reads():
+            self.assertEqual(len({router.db_for_read(Workout) for _ in range(20)}), 1)
+
+        for url in ("/api/workouts/", f"/api/workouts/{first.pk}/") * 5:
+            cache.clear()
+            with contextlib.ExitStack() as stack:
+                captured = {
+                    alias: stack.enter_context(
+                        CaptureQueriesContext(connections[alias])
+                    )
+                    for alias in self.aliases
+                }
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            # Health checks aside, every query went to the same replica...
+            [alias] = [
+                alias
+                for alias, queries in captured.items()
+                if any("django_migrations" not in q["sql"] for q in queries)
+            ]
+            # ...so the index and the representations agree.
+            if url == "/api/workouts/":
+                self.assertEqual([w["title"] for w in response.data], snapshots[alias])
+
+    def test_unhealthy_replicas_fail_over(self):
+        Workout.objects.create(author=self.author, title="Replicated")
+        # replica_b has no schema: it fails its health check.
+        self.snapshot(["replica_a"])
+        with replica_reads(), self.assertLogs("workouts.routers", "WARNING"):
+            self.assertEqual(
+                {router.db_for_read(Workout) for _ in range(10)}, {"replica_a"}
+            )
+
+        connections["replica_a"].close()
+        os.remove(self.paths["replica_a"])
+        with replica_reads(), self.assertLogs("workouts.routers", "WARNING"):
+            self.assertEqual(router.db_for_read(Workout), "default")
+        with self.assertLogs("workouts.routers", "WARNING"):
+            self.assertEqual(self.titles(), ["Replicated"])
+
+        self.snapshot()
+        with replica_reads():
+            self.assertIn(router.db_for_read(Workout), self.aliases)
+
+
+class StartupBudgetTests(SimpleTestCase):
+    """Worker boots under the production profile, in fresh interpreters."""
+
+    def production_settings(self, **env):
+        code = (
+            "import json; from django.conf import settings; print(json.dumps("
+            "[settings.DEBUG, settings.INSTALLED_APPS, "
+            "settings.REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES']]))"
+        )
+        return subprocess.run(
+            [sys.executable, "-c", code],
+            env={
+                **child_environment("production"),
+                "DJANGO_SETTINGS_MODULE": "goober_api.settings",
+                **env,
+            },
+            cwd=PROJECT_DIR,
+            capture_output=True,
+            text=True,
+        )
+
+    def test_production_profile_serves_only_the_api(self):
+        result = self.production_settings()
+        self.assertEqual(result.returncode, 0, result.stderr)
+        # Only the settings: nothing printed at startup.
+        self.assertEqual(len(result.stdout.splitlines()), 1, result.stdout)
+        debug, apps, renderers = json.loads(result.stdout)
+        self.assertFalse(debug)
+        self.assertNotIn("django_extensions", apps)
+        self.assertNotIn("django.contrib.admin", apps)
+        self.assertEqual(renderers, ["rest_framework.renderers.JSONRenderer"])
+
+        result = self.production_settings(DJANGO_ADMIN_ENABLED="1")
+        self.assertIn("django.contrib.admin", json.loads(result.stdout)[1])
+
+        result = self.production_settings(DJANGO_SECRET_KEY="")
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn("DJANGO_SECRET_KEY", result.stderr)
+
+    def test_worker_loads_modules_within_budget(self):
+        for entry_point in ("goober_api.wsgi", "goober_api.asgi"):
+            with self.subTest(entry_point):
+                startup = measure_once("production", entry_point)
+                self.assertLessEqual(startup.modules, BUDGET.modules, startup)
+
+    @skipUnless(
+        os.getenv("STARTUP_TIMING_TESTS") == "1",
+        "Wall-clock budgets only hold on calibrated hardware.",
+    )
+    def test_worker_boots_within_budget(self):
+        for entry_point in ("goober_api.wsgi", "goober_api.asgi"):
+            with self.subTest(entry_point):
+                startup = measure("production", entry_point, repeat=3)
+                self.assertEqual(over_budget(startup), [], startup)
+
+
+class TrainingLoadTests(TestCase):
+    WEEK, MONTH = TrainingLoad.Period.WEEK, TrainingLoad.Period.MONTH
+    RUN, CYCLE = Workout.WorkoutType.RUN, Workout.WorkoutType.CYCLE
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username="athlete")
+        cls.other = User.objects.create(username="other")
+
+    def setUp(self):
+        cache.clear()
+
+    def step(self, minutes):
+        return {
+            "duration_type": BaseDuration.DurationType.TIME,
+            "duration_value": Decimal(minutes),
+            "duration_unit": TimeDuration.TimeUnitChoices.MINUTES,
+        }
+
+    def build(self, day, minutes, workout_type=Workout.WorkoutType.RUN, author=None):
+        [workout] = bulk_build_workouts(
+            [
+                {
+                    "author": author or self.author,
+                    "title": f"{minutes} minutes",
+                    "workout_type": workout_type,
+                    "intervals": [self.step(minutes)],
+                }
+            ]
+        )
+        workout.created_at = datetime(2026, 3, day, 10, tzinfo=dt_timezone.utc)
+        workout.save()
+        return workout
+
+    def loads(self, author=None):
+        return {
+            (load.period, load.period_start, load.workout_type): (
+                load.workouts,
+                load.total_time,
+            )
+            for load in TrainingLoad.objects.filter(author=author or self.author)
+        }
+
+    def build_month(self):
+        # Monday, Wednesday and the next Monday of March 2026.
+        return [
+            self.build(2, 10),
+            self.build(4, 10),
+            self.build(4, 20, self.CYCLE),
+            self.build(9, 10),
+        ]
+
+    @skipUnlessDBFeature("has_select_for_update")
+    def test_refresh_locks_the_authors_first(self):
+        [workout] = self.build_month()[:1]
+        with CaptureQueriesContext(connection) as queries:
+            refresh_workout_loads([workout.pk])
+        statements = [q["sql"] for q in queries]
+        [lock] = [i for i, sql in enumerate(statements) if "FOR " in sql]
+        self.assertIn("auth_user", statements[lock])
+        aggregates = [i for i, sql in enumerate(statements) if "SUM(" in sql]
+        self.assertLess(lock, min(aggregates))
+
+    def test_loads_follow_workout_changes(self):
+        monday, wednesday, _, next_monday = self.build_month()
+        self.assertEqual(
+            self.loads(),
+            {
+                (self.WEEK, date(2026, 3, 2), self.RUN): (2, 1200),
+                (self.WEEK, date(2026, 3, 2), self.CYCLE): (1, 1200),
+                (self.WEEK, date(2026, 3, 9), self.RUN): (1, 600),
+                (self.MONTH, date(2026, 3, 1), self.RUN): (3, 1800),
+                (self.MONTH, date(2026, 3, 1), self.CYCLE): (1, 1200),
+            },
+        )
+
+        # A step added to a workout.
+        [interval] = bulk_create_steps([self.step(5)])
+        insert_step(monday.pk, interval)
+        # A workout changing type, and one moving to another month.
+        wednesday.workout_type = self.CYCLE
+        wednesday.save()
+        next_monday.created_at = datetime(2026, 2, 27, tzinfo=dt_timezone.utc)
+        next_monday.save()
+        self.assertEqual(
+            self.loads(),
+            {
+                (self.WEEK, date(2026, 3, 2), self.RUN): (1, 900),
+                (self.WEEK, date(2026, 3, 2), self.CYCLE): (2, 1800),
+                (self.WEEK, date(2026, 2, 23), self.RUN): (1, 600),
+                (self.MONTH, date(2026, 3, 1), self.RUN): (1, 900),
+                (self.MONTH, date(2026, 3, 1), self.CYCLE): (2, 1800),
+                (self.MONTH, date(2026, 2, 1), self.RUN): (1, 600),
+            },
+        )
+
+        delete_step(monday.pk, interval.pk)
+        monday.delete()
+        next_monday.delete()
+        self.assertEqual(
+            self.loads(),
+            {
+                (self.WEEK, date(2026, 3, 2), self.CYCLE): (2, 1800),
+                (self.MONTH, date(2026, 3, 1), self.CYCLE): (2, 1800),
+            },
+        )
+
+    def test_loads_follow_rebuilt_totals(self):
+        monday = self.build_month()[0]
+        expected = self.loads()
+        Workout.objects.filter(pk=monday.pk).update(total_time=0)
+        refresh_workout_loads([monday.pk])
+        self.assertNotEqual(self.loads(), expected)
+
+        call_command("recompute_totals", stdout=StringIO())
+        self.assertEqual(self.loads(), expected)
+
+    def test_rebuild_matches_incremental(self):
+        self.build_month()
+        self.build(5, 30, author=self.other)
+        expected = {author: self.loads(author) for author in (self.author, self.other)}
+        TrainingLoad.objects.update(workouts=0, total_time=0)
+        TrainingLoad.objects.filter(author=self.other).delete()
+        TrainingLoad.objects.create(
+            author=self.author,
+            period=self.WEEK,
+            period_start=date(2020, 1, 6),
+            workout_type=self.RUN,
+        )
+
+        out = StringIO()
+        call_command("rebuild_training_loads", batch_size=1, stdout=out)
+        self.assertIn("Rebuilt 7 training loads.", out.getvalue())
+        self.assertEqual(
+            {author: self.loads(author) for author in (self.author, self.other)},
+            expected,
+        )
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_training_loads", batch_size=0)
+
+    def test_range_query_reads_the_aggregate_only(self):
+        self.build_month()
+        self.build(3, 30, author=self.other)
+        client = APIClient()
+        with self.assertNumQueries(1):
+            response = client.get(
+                "/api/training-loads/",
+                {
+                    "author": self.author.pk,
+                    "period": self.WEEK,
+                    "period_start__gte": "2026-03-01",
+                    "period_start__lte": "2026-03-08",
+                },
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [
+                (row["period_start"], row["workout_type"], row["workouts"])
+                for row in response.data
+            ],
+            [("2026-03-02", self.RUN, 2), ("2026-03-02", self.CYCLE, 1)],
+        )
+        self.assertEqual(response.data[1]["total_time"], "1200.00")
+
+        response = client.get(
+            "/api/training-loads/", {"period": self.MONTH, "workout_type": self.RUN}
+        )
+        self.assertEqual(
+            [(row["author"], row["workouts"]) for row in response.data],
+            [(self.author.pk, 3), (self.other.pk, 1)],
+        )
+
+
+class AdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username="athlete")
+        cls.admin = User.objects.create_superuser("admin")
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, [query["sql"] for query in queries]
+
+    def test_changelists_cost_a_fixed_number_of_queries(self):
+        urls = [
+            "/admin/workouts/workout/",
+            "/admin/workouts/interval/",
+            "/admin/workouts/baseduration/",
+        ]
+        bulk_create_workouts(self.author, 2)
+        few = [len(self.get(url)[1]) for url in urls]
+        bulk_create_workouts(self.author, 40)
+        self.assertEqual([len(self.get(url)[1]) for url in urls], few)
+
+    def test_large_tables_are_counted_from_the_estimate(self):
+        bulk_create_workouts(self.author, 3)
+        with mock.patch("workouts.admin.estimated_count", return_value=5_000_000):
+            response, queries = self.get("/admin/workouts/workout/")
+        self.assertEqual(response.context["cl"].result_count, 5_000_000)
+        self.assertFalse([sql for sql in queries if "COUNT(" in sql])
+
+        # Filtered changelists are counted exactly.
+        with mock.patch("workouts.admin.estimated_count", return_value=5_000_000):
+            response, _ = self.get("/admin/workouts/workout/", workout_type=2)
+        self.assertEqual(response.context["cl"].result_count, 0)
+
+    def test_step_inline_is_ordered_and_loads_in_fixed_queries(self):
+        short, long = bulk_create_workouts(self.author, 2)
+        steps = bulk_create_steps(
+            [
+                {
+                    "duration_type": BaseDuration.DurationType.TIME,
+                    "duration_value": minutes,
+                    "duration_unit": TimeDuration.TimeUnitChoices.MINUTES,
+                }
+                for minutes in range(1, 31)
+            ]
+        )
+        original = [interval.pk for interval in long.sorted_intervals]
+        for interval in steps:
+            insert_step(long.pk, interval, after=None)
+
+        def change(workout):
+            return self.get(f"/admin/workouts/workout/{workout.pk}/change/")
+
+        _, short_queries = change(short)
+        response, long_queries = change(long)
+        self.assertEqual(len(long_queries), len(short_queries))
+        formset = response.context["inline_admin_formsets"][0].formset
+        self.assertEqual(
+            [form.instance.interval_id for form in formset.forms],
+            [interval.pk for interval in reversed(steps)] + original,
+        )
+
+    def test_deleting_a_step_updates_the_totals(self):
+        [workout] = bulk_create_workouts(self.author, 1)
+        recompute_totals([workout.pk])
+        workout.refresh_from_db()
+        steps = list(workout.steps.order_by("position"))
+        data = {
+            "title": workout.title,
+            "description": "",
+            "workout_type": workout.workout_type,
+            "author": self.author.pk,
+            "steps-TOTAL_FORMS": len(steps),
+            "steps-INITIAL_FORMS": len(steps),
+            "steps-MIN_NUM_FORMS": 0,
+            "steps-MAX_NUM_FORMS": 1000,
+        }
+        for index, step in enumerate(steps):
+            data.update(
+                {
+                    f"steps-{index}-id": step.pk,
+                    f"steps-{index}-workout": workout.pk,
+                    f"steps-{index}-position": step.position,
+                    f"steps-{index}-interval": step.interval_id,
+                }
+            )
+        # The 10 minute warm-up.
+        data["steps-0-DELETE"] = "on"
+        response = self.client.post(
+            f"/admin/workouts/workout/{workout.pk}/change/", data
+        )
+        self.assertEqual(response.status_code, 302)
+        before = workout.total_time
+        workout.refresh_from_db()
+        self.assertEqual(workout.total_time, before - 600)
+        self.assertEqual(workout.steps.count(), 2)
+
+    def test_duration_autocomplete_searches_by_value(self):
+        bulk_create_workouts(self.author, 1)
+
+        def search(term):
+            response = self.client.get(
+                "/admin/autocomplete/",
+                {
+                    "app_label": "workouts",
+                    "model_name": "interval",
+                    "field_name": "duration",
+                    "term": term,
+                },
+            )
+            self.assertEqual(response.status_code, 200)
+            return [result["text"] for result in response.json()["results"]]
+
+        self.assertEqual(search("90"), ["90.00 1"])
+        self.assertEqual(search("ten"), [])
+        self.assertEqual(search("1e30"), [])
+
+        response = self.client.get(
+            f"/admin/workouts/baseduration/{BaseDuration.objects.first().pk}/change/"
+        )
+        self.assertNotContains(response, 'name="_save"')
@@ -0,0 +1,179 @@
+"""
+Workout totals.
+
+A workout's total time (seconds), distance (meters) and work (joules) are
+denormalized onto ``Workout``. Each interval contributes its duration,
+normalized to its canonical unit (``workouts.units``), into the duration's
+``total_field``. A repeated step counts ``repititions`` times and is followed
+by its rest interval after every repetition. Heart rate and power durations
+are intensities rather than amounts and contribute nothing.
+
+Totals are kept current incrementally by ``recompute_totals`` (called from the
+signal handlers in ``workouts.signals``) and can be rebuilt for the whole
+table with SQL aggregates over ``BaseDuration.canonical_value`` by
+``recompute_all_totals``, which only rewrites the workouts whose totals moved
+and refreshes their training loads, ``updated_at`` and cache entries like any
+other change.
+"""
+
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Iterable
+
+from django.db.models import Case, F, Sum, When
+from django.db.models.functions import Coalesce, Greatest
+
+from workouts.cache import rendered_cache, workout_cache
+from workouts.models import BaseDuration, Interval, Workout
+from workouts.units import canonical_field
+
+TOTAL_FIELDS = ("total_time", "total_distance", "total_work")
+
+CENTS = Decimal("0.01")
+
+WorkoutIntervals = Workout.intervals.through
+
+
+def empty_totals() -> dict:
+    return {field: Decimal(0) for field in TOTAL_FIELDS}
+
+
+def add_duration(totals: dict, duration: BaseDuration, times: int = 1) -> None:
+    value = duration.normalized_value()
+    if value is not None:
+        totals[duration.total_field] += value * times
+
+
+def interval_totals(interval: Interval, totals: dict = None) -> dict:
+    """Add one step, repetitions and rests included, to ``totals``."""
+    totals = empty_totals() if totals is None else totals
+    repititions = interval.repititions or 0
+    add_duration(totals, interval.duration, max(repititions, 1))
+    if repititions and interval.rest_interval is not None:
+        add_duration(totals, interval.rest_interval.duration, repititions)
+    return totals
+
+
+def workout_totals(intervals: Iterable[Interval]) -> dict:
+    totals = empty_totals()
+    for interval in intervals:
+        interval_totals(interval, totals)
+    return {field: value.quantize(CENTS, ROUND_HALF_UP) for field, value in totals.items()}
+
+
+def save_totals(totals_by_workout: dict, batch_size: int = 1000) -> int:
+    """Write ``{workout_pk: totals}`` without touching ``updated_at``."""
+    workouts = [Workout(pk=pk, **totals) for pk, totals in totals_by_workout.items()]
+    Workout.objects.bulk_update(workouts, TOTAL_FIELDS, batch_size=batch_size)
+    return len(workouts)
+
+
+def recompute_totals(workout_ids: Iterable[int]) -> int:
+    """
+    Recompute the totals of the given workouts from their intervals.
+
+    This is the incremental path: one query loads every step of the workouts
+    with its duration, rest interval and rest duration, and one bulk update
+    writes the results.
+    """
+    workout_ids = set(workout_ids)
+    if not workout_ids:
+        return 0
+    rows = WorkoutIntervals.objects.filter(workout_id__in=workout_ids).select_related(
+        "interval__duration", "interval__rest_interval__duration"
+    )
+    intervals = {pk: [] for pk in workout_ids}
+    for row in rows:
+        intervals[row.workout_id].append(row.interval)
+    return save_totals(
+        {pk: workout_totals(steps) for pk, steps in intervals.items()}
+    )
+
+
+def sql_totals() -> dict:
+    """
+    Aggregates summing a workout's totals over its steps (``WorkoutStep``
+    rows grouped by workout), from the durations' ``canonical_value``.
+    """
+    repititions = Coalesce(F("interval__repititions"), 0)
+    aggregates = {}
+    for duration_type in BaseDuration.DurationType.values:
+        field = BaseDuration.get_duration_model(duration_type).total_field
+        if field is None:
+            continue
+        step = Case(
+            When(
+                interval__duration__type=duration_type,
+                then=F("interval__duration__canonical_value")
+                * Greatest(repititions, 1),
+            ),
+            default=0,
+            output_field=canonical_field(),
+        )
+        rest = Case(
+            When(
+                interval__rest_interval__duration__type=duration_type,
+                then=F("interval__rest_interval__duration__canonical_value")
+                * repititions,
+            ),
+            default=0,
+            output_field=canonical_field(),
+        )
+        aggregates[field] = Sum(step + rest, output_field=canonical_field())
+    return aggregates
+
+
+def recompute_all_totals(batch_size: int = 10_000, stdout=None) -> int:
+    """
+    Rebuild the totals of every workout, ``batch_size`` workouts at a time.
+
+    Each batch is one aggregate query over the workout/interval join table,
+    summing canonical duration values in the database, and one bulk update,
+    so the whole table is recomputed without instantiating a single model.
+    Only workouts whose totals changed are written; their training loads are
+    refreshed, their ``updated_at`` bumped and their cached representations
+    dropped, so neither loads nor responses keep the old totals. Returns how
+    many changed.
+    """
+    # workouts.loads sums these totals, so it imports this module.
+    from workouts.loads import refresh_workout_loads
+
+    aggregates = sql_totals()
+    updated = 0
+    last_pk = 0
+    while True:
+        current = {
+            pk: dict(zip(TOTAL_FIELDS, values))
+            for pk, *values in Workout.objects.filter(pk__gt=last_pk)
+            .order_by("pk")
+            .values_list("pk", *TOTAL_FIELDS)[:batch_size]
+        }
+        if not current:
+            return updated
+        workout_ids = list(current)
+
+        rows = (
+            WorkoutIntervals.objects.filter(
+                workout_id__gte=workout_ids[0], workout_id__lte=workout_ids[-1]
+            )
+            .values("workout_id")
+            .annotate(**aggregates)
+            .order_by()
+        )
+        totals = {pk: empty_totals() for pk in workout_ids}
+        for row in rows:
+            pk = row.pop("workout_id")
+            # SQLite sums come back as plain numbers.
+            totals[pk] = {
+                field: Decimal(str(value)).quantize(CENTS, ROUND_HALF_UP)
+                for field, value in row.items()
+            }
+        changed = {pk: row for pk, row in totals.items() if row != current[pk]}
+        if changed:
+            updated += save_totals(changed)
+            refresh_workout_loads(changed)
+            Workout.objects.filter(pk__in=changed).touch()
+            workout_cache.invalidate(changed)
+            rendered_cache.invalidate(changed)
+        last_pk = workout_ids[-1]
+        if stdout is not None:
+            stdout.write(f"Recomputed totals for {updated} workouts.")
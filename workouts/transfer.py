@@ -0,0 +1,342 @@
+"""
+NDJSON export and import of whole workouts.
+
+Each line is one workout with its steps in workout order, in the same shape
+the API accepts for nested creates (``IntervalStepSerializer``), so an export
+can be replayed into any environment::
+
+    {"id": 1, "author": "athlete", "title": "...", "description": "...",
+     "workout_type": 1, "created_at": "...", "updated_at": "...",
+     "intervals": [{"interval_type": 3, "duration_type": 2,
+                    "duration_value": "10.00", "duration_unit": 2,
+                    "perceived_effort": null, "repititions": 4,
+                    "rest_interval": {...}}, ...]}
+
+Authors travel by username; ``id`` is informational only. Records are
+checked as the API would check them, and a bad one raises ``ValueError``.
+
+``export_workouts`` reads workouts through a chunked server-side cursor and
+loads each chunk's steps with one query, so memory does not grow with the
+table. ``import_workouts`` writes ``batch_size`` workouts per transaction
+through ``bulk_build_workouts`` and records the last committed line in a
+``Checkpoint`` so an interrupted import can pick up where it stopped.
+"""
+
+import contextlib
+import gzip
+import io
+import json
+import os
+import sys
+import time
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from workouts.loads import load_keys, refresh_loads
+from workouts.models import BaseDuration, Interval, Workout, WorkoutStep
+from workouts.models.duration import CENTS, retry_stale_durations
+from workouts.models.interval import EFFORT_CHOICES
+from workouts.models.utils import bulk_build_workouts
+
+EFFORTS = [None, *(effort for effort, _ in EFFORT_CHOICES)]
+
+WORKOUT_COLUMNS = (
+    "id",
+    "author__username",
+    "title",
+    "description",
+    "workout_type",
+    "created_at",
+    "updated_at",
+)
+
+STEP_COLUMNS = (
+    "workout_id",
+    "interval__type",
+    "interval__duration__type",
+    "interval__duration__value",
+    "interval__duration__unit",
+    "interval__perceived_effort",
+    "interval__repititions",
+    "interval__rest_interval_id",
+    "interval__rest_interval__type",
+    "interval__rest_interval__duration__type",
+    "interval__rest_interval__duration__value",
+    "interval__rest_interval__duration__unit",
+    "interval__rest_interval__perceived_effort",
+)
+
+
+@contextlib.contextmanager
+def open_ndjson(path, mode, compress=None):
+    """
+    Open ``path`` ("-" for stdin/stdout) as text, gzip-compressed when
+    ``compress`` is true or, if it is None, when the name ends in ``.gz``.
+    """
+    if compress is None:
+        compress = path.endswith(".gz")
+    if path != "-":
+        with (gzip.open if compress else open)(
+            path, mode + "t", encoding="utf-8"
+        ) as f:
+            yield f
+        return
+
+    # Never close the process's own stdin/stdout.
+    stream = sys.stdout.buffer if mode == "w" else sys.stdin.buffer
+    compressed = gzip.GzipFile(fileobj=stream, mode=mode + "b") if compress else None
+    text = io.TextIOWrapper(compressed or stream, encoding="utf-8")
+    try:
+        yield text
+    finally:
+        text.flush()
+        text.detach()
+        if compressed is not None:
+            compressed.close()
+
+
+class Progress:
+    """Counts workouts and rows (workouts plus interval rows) per second."""
+
+    def __init__(self, report=None):
+        self.report = report
+        self.started = time.monotonic()
+        self.workouts = 0
+        self.rows = 0
+
+    def add(self, workouts, rows):
+        self.workouts += workouts
+        self.rows += rows
+        if self.report is not None:
+            self.report(self)
+
+    @property
+    def rate(self):
+        return self.rows / max(time.monotonic() - self.started, 1e-9)
+
+    def __str__(self):
+        return f"{self.workouts} workouts, {self.rows} rows ({self.rate:.0f} rows/s)"
+
+
+def step_record(row) -> dict:
+    _, interval_type, duration_type, value, unit, effort, reps = row[:7]
+    record = {
+        "interval_type": interval_type,
+        "duration_type": duration_type,
+        "duration_value": str(value),
+        "duration_unit": unit,
+        "perceived_effort": effort,
+        "repititions": reps,
+    }
+    if row[7] is not None:
+        rest_type, rest_duration_type, rest_value, rest_unit, rest_effort = row[8:]
+        record["rest_interval"] = {
+            "interval_type": rest_type,
+            "duration_type": rest_duration_type,
+            "duration_value": str(rest_value),
+            "duration_unit": rest_unit,
+            "perceived_effort": rest_effort,
+        }
+    return record
+
+
+def workout_record(row, steps) -> dict:
+    pk, author, title, description, workout_type, created_at, updated_at = row
+    return {
+        "id": pk,
+        "author": author,
+        "title": title,
+        "description": description,
+        "workout_type": workout_type,
+        "created_at": created_at.isoformat(),
+        "updated_at": updated_at.isoformat(),
+        "intervals": steps,
+    }
+
+
+def export_workouts(queryset, out, chunk_size=1000, progress=None) -> Progress:
+    """Write every workout of ``queryset`` to ``out`` as one NDJSON line each."""
+    progress = progress or Progress()
+    rows = (
+        queryset.order_by("pk")
+        .values_list(*WORKOUT_COLUMNS)
+        .iterator(chunk_size=chunk_size)
+    )
+    while chunk := list(islice(rows, chunk_size)):
+        step_rows = (
+            WorkoutStep.objects.filter(workout_id__in=[row[0] for row in chunk])
+            .order_by("workout_id", "position")
+            .values_list(*STEP_COLUMNS)
+        )
+        steps = {}
+        for row in step_rows:
+            steps.setdefault(row[0], []).append(step_record(row))
+        interval_rows = 0
+        for row in chunk:
+            workout_steps = steps.get(row[0], [])
+            interval_rows += sum(
+                2 if "rest_interval" in step else 1 for step in workout_steps
+            )
+            out.write(json.dumps(workout_record(row, workout_steps)))
+            out.write("\n")
+        progress.add(len(chunk), len(chunk) + interval_rows)
+    return progress
+
+
+class Checkpoint:
+    """
+    The number of input lines already imported, kept in a small JSON file.
+
+    The file is replaced atomically after each committed batch. A crash
+    between a commit and the write re-imports at most that one batch.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self) -> int:
+        try:
+            with open(self.path) as f:
+                return json.load(f)["line"]
+        except FileNotFoundError:
+            return 0
+
+    def save(self, line: int) -> None:
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump({"line": line}, f)
+        os.replace(temporary, self.path)
+
+    def clear(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def choice(field, value, choices):
+    if value not in choices:
+        raise ValueError(f"{field} {value!r} is not one of {list(choices)}.")
+    return value
+
+
+def step_spec(record) -> dict:
+    """
+    The ``bulk_build_workouts`` spec of an exported step, validated like
+    ``IntervalStepSerializer`` validates one.
+    """
+    duration_type = choice(
+        "duration_type", record["duration_type"], BaseDuration.DurationType.values
+    )
+    model = BaseDuration.get_duration_model(duration_type)
+    try:
+        value = Decimal(record["duration_value"]).quantize(CENTS)
+    except (InvalidOperation, TypeError):
+        value = None
+    if value is None or not value.is_finite() or abs(value) >= 10**8:
+        raise ValueError(f"duration_value {record['duration_value']!r} is invalid.")
+    repititions = record.get("repititions") or 0
+    if not isinstance(repititions, int) or repititions < 0:
+        raise ValueError(f"repititions {repititions!r} is invalid.")
+    spec = {
+        "interval_type": choice(
+            "interval_type", record["interval_type"], Interval.IntervalType.values
+        ),
+        "duration_type": duration_type,
+        "duration_value": value,
+        "duration_unit": choice(
+            "duration_unit", record["duration_unit"], model.unit_choices.values
+        ),
+        "perceived_effort": choice(
+            "perceived_effort", record.get("perceived_effort"), EFFORTS
+        ),
+        "repititions": repititions,
+    }
+    if record.get("rest_interval"):
+        spec["rest_interval"] = step_spec(record["rest_interval"])
+    return spec
+
+
+def get_authors(usernames) -> dict:
+    """``{username: pk}``, creating users (without a password) that are missing."""
+    User = get_user_model()
+    usernames = set(usernames)
+    authors = dict(
+        User.objects.filter(username__in=usernames).values_list("username", "pk")
+    )
+    missing = usernames - set(authors)
+    if missing:
+        User.objects.bulk_create(User(username=name, password="!") for name in missing)
+        authors.update(
+            User.objects.filter(username__in=missing).values_list("username", "pk")
+        )
+    return authors
+
+
+@retry_stale_durations
+def import_batch(records) -> int:
+    """Create one batch of workouts in a transaction; returns the interval rows."""
+    User = get_user_model()
+    authors = get_authors(record["author"] for record in records)
+    specs = [
+        {
+            "author": User(pk=authors[record["author"]]),
+            "title": record["title"],
+            "description": record.get("description", ""),
+            "workout_type": choice(
+                "workout_type", record["workout_type"], Workout.WorkoutType.values
+            ),
+            "intervals": [step_spec(step) for step in record.get("intervals", ())],
+        }
+        for record in records
+    ]
+    with transaction.atomic():
+        workouts = bulk_build_workouts(specs)
+        # auto_now_add/auto_now stamped "now"; keep the exported times.
+        stamped = load_keys(workouts)
+        for workout, record in zip(workouts, records):
+            workout.created_at = parse_datetime(record["created_at"])
+            workout.updated_at = parse_datetime(record["updated_at"])
+        Workout.objects.bulk_update(workouts, ["created_at", "updated_at"])
+        refresh_loads(stamped | load_keys(workouts))
+    return sum(
+        1 + bool(step.get("rest_interval"))
+        for spec in specs
+        for step in spec["intervals"]
+    )
+
+
+def import_workouts(
+    lines, batch_size=1000, checkpoint: Checkpoint = None, progress=None
+) -> Progress:
+    """
+    Import NDJSON ``lines``, ``batch_size`` workouts per transaction.
+
+    Lines up to the ``checkpoint`` are skipped, and the checkpoint advances
+    after every committed batch.
+    """
+    progress = progress or Progress()
+    start = checkpoint.load() if checkpoint is not None else 0
+    batch = []
+    line_number = 0
+
+    def flush():
+        interval_rows = import_batch(batch)
+        if checkpoint is not None:
+            checkpoint.save(line_number)
+        progress.add(len(batch), len(batch) + interval_rows)
+        batch.clear()
+
+    for line_number, line in enumerate(lines, 1):
+        if line_number <= start or not line.strip():
+            continue
+        batch.append(json.loads(line))
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return progress
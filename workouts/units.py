@@ -0,0 +1,97 @@
+"""
+Canonical units of durations.
+
+Every measurable kind of duration has a canonical SI unit: seconds for time,
+meters for distance, joules for energy and watts for power.
+``UNIT_FACTORS[duration_type][unit]`` converts a value in ``unit`` to it.
+Heart rate has none: a percentage cannot become beats per minute without the
+athlete's maximum.
+
+This is the one definition of the factors. The duration models (and their
+``canonical_value`` column), totals, filters and file formats all convert
+through it. It imports no models, so migrations can use it too.
+"""
+
+from decimal import Decimal
+from typing import Optional
+
+from django.db.models import Case, DecimalField, F, Max, Q, Value, When
+
+# BaseDuration.DurationType
+DISTANCE, TIME, CALORIC, HEART_RATE, POWER = 1, 2, 3, 4, 5
+
+CANONICAL_UNITS = {TIME: "s", DISTANCE: "m", CALORIC: "J", POWER: "W"}
+
+# Keyed by the unit choices of the duration models.
+UNIT_FACTORS = {
+    # Miles, kilometers, meters.
+    DISTANCE: {1: Decimal("1609.344"), 2: Decimal(1000), 3: Decimal(1)},
+    # Seconds, minutes, hours.
+    TIME: {1: Decimal(1), 2: Decimal(60), 3: Decimal(3600)},
+    # Calories, kilocalories.
+    CALORIC: {1: Decimal("4.184"), 2: Decimal(4184)},
+    # Watts, kilowatts.
+    POWER: {1: Decimal(1), 2: Decimal(1000)},
+}
+
+# A value of BaseDuration.value (10 digits, 2 places) times any factor.
+CANONICAL_MAX_DIGITS = 20
+CANONICAL_DECIMAL_PLACES = 6
+
+
+def canonical_field() -> DecimalField:
+    return DecimalField(
+        max_digits=CANONICAL_MAX_DIGITS, decimal_places=CANONICAL_DECIMAL_PLACES
+    )
+
+
+def canonical_value(duration_type, value, unit) -> Optional[Decimal]:
+    """``value`` in ``unit`` converted to the canonical unit, or None."""
+    factor = UNIT_FACTORS.get(duration_type, {}).get(unit)
+    if factor is None or value is None:
+        return None
+    return Decimal(value) * factor
+
+
+def convert(duration_type, value, unit, to_unit) -> Decimal:
+    """``value`` in ``unit`` converted to ``to_unit`` of the same type."""
+    factors = UNIT_FACTORS[duration_type]
+    return Decimal(value) * factors[unit] / factors[to_unit]
+
+
+def canonical_expression(prefix="") -> Case:
+    """
+    SQL computing the canonical value of the duration at ``prefix`` (for
+    instance ``"interval__duration__"``), NULL where there is none.
+    """
+    return Case(
+        *(
+            When(
+                Q(**{f"{prefix}type": duration_type, f"{prefix}unit": unit}),
+                then=F(f"{prefix}value") * Value(factor),
+            )
+            for duration_type, factors in UNIT_FACTORS.items()
+            for unit, factor in factors.items()
+        ),
+        default=None,
+        output_field=canonical_field(),
+    )
+
+
+def backfill_canonical_values(Duration, batch_size=10_000, report=None) -> int:
+    """
+    Recompute ``canonical_value`` of every row of ``Duration``.
+
+    Each batch of ``batch_size`` pks is one ``UPDATE`` evaluating
+    ``canonical_expression`` in the database, so no row is loaded into
+    Python; ``report`` is called with the running count after each batch.
+    """
+    last_pk = Duration.objects.aggregate(last=Max("pk"))["last"] or 0
+    updated = 0
+    for start in range(0, last_pk, batch_size):
+        updated += Duration.objects.filter(
+            pk__gt=start, pk__lte=start + batch_size
+        ).update(canonical_value=canonical_expression())
+        if report is not None:
+            report(updated)
+    return updated
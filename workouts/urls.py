@@ -1,10 +1,20 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import WorkoutViewSet
+from .views import (
+    PerformanceStatsView,
+    TrainingLoadViewSet,
+    WorkoutViewSet,
+    workout_detail,
+    workout_list,
+)
 
 router = DefaultRouter()
 router.register(r"workouts", WorkoutViewSet)
+router.register(r"training-loads", TrainingLoadViewSet)
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("async/workouts/", workout_list, name="async-workout-list"),
+    path("async/workouts/<int:pk>/", workout_detail, name="async-workout-detail"),
+    path("performance/", PerformanceStatsView.as_view(), name="performance-stats"),
 ]
@@ -1,3 +1,12 @@
+from .async_workouts import workout_detail, workout_list
+from .loads import TrainingLoadViewSet
+from .performance import PerformanceStatsView
 from .workouts import WorkoutViewSet
 
-__all__ = ["WorkoutViewSet"]
+__all__ = [
+    "PerformanceStatsView",
+    "TrainingLoadViewSet",
+    "WorkoutViewSet",
+    "workout_detail",
+    "workout_list",
+]
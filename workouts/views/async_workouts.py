@@ -0,0 +1,33 @@
+"""
+Async read path for workouts.
+
+Plain Django async views rather than DRF viewsets (DRF views are sync only),
+so under ASGI a request never takes a thread-pool hop for the view itself.
+Rows come from the async ORM and are represented by the read-only fast path
+in ``workouts.serializers.fast``, which does no I/O of its own. Responses
+match the sync ``/api/workouts/`` endpoints.
+"""
+
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import require_safe
+from rest_framework.utils.encoders import JSONEncoder
+from workouts.models import Workout
+from workouts.serializers.fast import aworkout_representations
+
+
+@require_safe
+async def workout_list(request):
+    entries = await aworkout_representations(
+        Workout.objects.order_by("created_at", "id")
+    )
+    return JsonResponse(
+        [entry.data for entry in entries], encoder=JSONEncoder, safe=False
+    )
+
+
+@require_safe
+async def workout_detail(request, pk):
+    entries = await aworkout_representations(Workout.objects.filter(pk=pk))
+    if not entries:
+        raise Http404("No Workout matches the given query.")
+    return JsonResponse(entries[0].data, encoder=JSONEncoder)
@@ -0,0 +1,24 @@
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import mixins, viewsets
+from workouts.filters import TrainingLoadFilter
+from workouts.models import TrainingLoad
+from workouts.routers import ReplicaReadsMixin
+from workouts.serializers import TrainingLoadSerializer
+
+
+class TrainingLoadViewSet(
+    ReplicaReadsMixin, mixins.ListModelMixin, viewsets.GenericViewSet
+):
+    """
+    Weekly and monthly training volume per athlete and workout type.
+
+    Served from the materialized ``TrainingLoad`` table alone (see
+    workouts.loads): one query, however many workouts the range covers.
+    """
+
+    queryset = TrainingLoad.objects.order_by(
+        "author_id", "period", "period_start", "workout_type"
+    )
+    serializer_class = TrainingLoadSerializer
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = TrainingLoadFilter
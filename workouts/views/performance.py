@@ -0,0 +1,17 @@
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from workouts.instrumentation import endpoint_stats
+
+
+class PerformanceStatsView(APIView):
+    """Per-endpoint latency histograms recorded by the instrumentation middleware."""
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(endpoint_stats.stats())
+
+    def delete(self, request):
+        endpoint_stats.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
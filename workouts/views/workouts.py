@@ -1,19 +1,442 @@
+import json
+from itertools import islice
+
+from django.db import transaction
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from rest_framework import viewsets
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import filters, permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotAcceptable, NotFound, ValidationError
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+from workouts.cache import compute_etag, rendered_cache, workout_cache
+from workouts.filters import WorkoutFilter
+from workouts.formats import WorkoutFileError
+from workouts.instrumentation import timed
 from workouts.models import Workout
-from workouts.serializers import WorkoutSerializer
+from workouts.models.duration import retry_stale_durations
+from workouts.models.utils import bulk_create_steps
+from workouts.pagination import KeysetPagination, with_tiebreak
+from workouts.positions import (
+    LAST,
+    StepNotFound,
+    delete_step,
+    insert_step,
+    move_step,
+)
+from workouts.renderers import ErgRenderer, WorkoutFileRenderer, ZwoRenderer
+from workouts.routers import ReplicaReadsMixin
+from workouts.serializers import (
+    StepInsertSerializer,
+    StepPlacementSerializer,
+    WorkoutSerializer,
+)
+from workouts.serializers.fast import (
+    WORKOUT_COLUMNS,
+    represent_rows,
+    workout_representations,
+)
 from rest_framework.response import Response
 
 
-class WorkoutViewSet(viewsets.ModelViewSet):
-    queryset = Workout.objects.all()
+class WorkoutViewSet(ReplicaReadsMixin, viewsets.ModelViewSet):
+    queryset = Workout.objects.with_intervals()
     serializer_class = WorkoutSerializer
+    pagination_class = KeysetPagination
+    renderer_classes = [
+        *api_settings.DEFAULT_RENDERER_CLASSES,
+        ZwoRenderer,
+        ErgRenderer,
+    ]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_class = WorkoutFilter
+    ordering_fields = [
+        "title",
+        "created_at",
+        "updated_at",
+        "total_time",
+        "total_distance",
+        "total_work",
+    ]
+    stream_query_param = "stream"
+    stream_chunk_size = 500
+    fields_query_param = "fields"
+    expand_query_param = "expand"
+
+    def get_renderers(self):
+        """Device files (``?format=zwo``, ``?format=erg``) are single workouts."""
+        renderers = super().get_renderers()
+        if self.action == "retrieve":
+            return renderers
+        return [r for r in renderers if not isinstance(r, WorkoutFileRenderer)]
+
+    def get_index_queryset(self):
+        """
+        The narrow queryset used to decide *which* workouts to return.
+
+        Only the columns needed for pagination and validation (of the cache
+        and of conditional requests) are read; full representations come from
+        the cache or from ``get_queryset``.
+        """
+        return Workout.objects.only(
+            "id", "created_at", "updated_at", *self.get_ordering_columns()
+        )
+
+    def get_ordering_columns(self):
+        """The columns ``?ordering=`` sorts by, which page cursors hold."""
+        ordering = filters.OrderingFilter().get_ordering(
+            self.request, Workout.objects.none(), self
+        )
+        return {name.lstrip("-") for name in ordering or ()}
+
+    def get_sparse_fieldset(self):
+        """
+        The ``(fields, expand)`` requested through ``?fields=`` and
+        ``?expand=``, or None for the full (cached) representation.
+        """
+        params = self.request.query_params
+        names = (self.fields_query_param, self.expand_query_param)
+        if not any(name in params for name in names):
+            return None
+
+        def split(name):
+            if name not in params:
+                return None
+            return [value for value in params[name].split(",") if value]
+
+        fields, expand = (split(name) for name in names)
+        serializer_class = self.get_serializer_class()
+        errors = {}
+        unknown = set(fields or ()) - set(serializer_class().fields)
+        if unknown:
+            errors[names[0]] = f"Unknown fields: {', '.join(sorted(unknown))}."
+        unknown = set(expand or ()) - set(serializer_class.EXPANDABLE)
+        if unknown:
+            errors[names[1]] = f"Cannot expand: {', '.join(sorted(unknown))}."
+        if errors:
+            raise ValidationError(errors)
+        return fields, expand
+
+    def get_sparse_queryset(self, fields, expand):
+        """
+        Load only the columns and prefetches a sparse fieldset needs; ``id``,
+        ``created_at``, ``updated_at`` and the ordering columns are always
+        read for pagination and validation.
+        """
+        queryset = Workout.objects.all()
+        if fields is not None:
+            columns = {"id", "created_at", "updated_at", *self.get_ordering_columns()}
+            columns.update(
+                field.name
+                for field in Workout._meta.concrete_fields
+                if field.name in fields
+            )
+            queryset = queryset.only(*columns)
+        expand = set(expand or ())
+        if expand or "intervals" in (fields or ()):
+            queryset = queryset.with_intervals(
+                rest_interval="intervals.rest_interval" in expand
+            )
+        return queryset
+
+    def sparse_data(self, instance, fields, expand, many=False):
+        """
+        Serialize a sparse fieldset directly: the cache only holds full
+        representations.
+        """
+        serializer = self.get_serializer(
+            instance, many=many, fields=fields, expand=expand
+        )
+        with timed("serialize"):
+            return serializer.data
+
+    def page_links(self):
+        return (
+            str(self.paginator.get_next_link()),
+            str(self.paginator.get_previous_link()),
+        )
 
     def list(self, request):
-        serializer = self.serializer_class(self.queryset, many=True)
-        return Response(serializer.data)
+        if request.query_params.get(self.stream_query_param) in ("1", "true"):
+            return self.stream_list(self.filter_queryset(Workout.objects.all()))
+
+        sparse = self.get_sparse_fieldset()
+        if sparse is not None:
+            return self.sparse_list(*sparse)
+
+        workouts = self.filter_queryset(self.get_index_queryset())
+        page = self.paginate_queryset(workouts)
+        if page is not None:
+            return self.conditional_response(
+                self.validators(page, *self.page_links()),
+                lambda: self.get_paginated_response(
+                    [entry.data for entry in self.get_representations(page)]
+                ),
+            )
+
+        workouts = list(workouts)
+        return self.conditional_response(
+            self.validators(workouts),
+            lambda: Response(
+                [entry.data for entry in self.get_representations(workouts)]
+            ),
+        )
+
+    def sparse_list(self, fields, expand):
+        workouts = self.filter_queryset(self.get_sparse_queryset(fields, expand))
+        page = self.paginate_queryset(workouts)
+        if page is None:
+            workouts = list(workouts)
+            return self.conditional_response(
+                self.validators(workouts),
+                lambda: Response(
+                    self.sparse_data(workouts, fields, expand, many=True)
+                ),
+            )
+
+        return self.conditional_response(
+            self.validators(page, *self.page_links()),
+            lambda: self.get_paginated_response(
+                self.sparse_data(page, fields, expand, many=True)
+            ),
+        )
 
     def retrieve(self, request, pk=None):
-        workout = get_object_or_404(self.queryset, pk=pk)
-        serializer = self.serializer_class(workout)
-        return Response(serializer.data)
+        if isinstance(request.accepted_renderer, WorkoutFileRenderer):
+            return self.file_response(pk, request.accepted_renderer)
+
+        sparse = self.get_sparse_fieldset()
+        if sparse is not None:
+            workout = get_object_or_404(self.get_sparse_queryset(*sparse), pk=pk)
+            return self.conditional_response(
+                self.validators([workout]),
+                lambda: Response(self.sparse_data(workout, *sparse)),
+                last_modified=workout.updated_at,
+            )
+
+        workout = get_object_or_404(self.get_index_queryset(), pk=pk)
+
+        def build_response():
+            return Response(self.get_representation(workout).data)
+
+        return self.conditional_response(
+            self.validators([workout]),
+            build_response,
+            last_modified=workout.updated_at,
+        )
+
+    def file_response(self, pk, renderer):
+        """
+        The workout rendered as a device file, cached per workout and format
+        so repeat downloads cost only the narrow ``updated_at`` lookup.
+        """
+        workout = get_object_or_404(self.get_index_queryset(), pk=pk)
+
+        def build_response():
+            content = rendered_cache.get(workout, renderer.format)
+            if content is None:
+                full = get_object_or_404(
+                    Workout.objects.with_intervals().select_related("author"), pk=pk
+                )
+                try:
+                    with timed("serialize"):
+                        content = renderer.render_workout(full, full.sorted_intervals)
+                except WorkoutFileError as e:
+                    raise NotAcceptable(str(e))
+                rendered_cache.set(full, renderer.format, content)
+            filename = f"workout-{workout.pk}.{renderer.format}"
+            return Response(
+                content,
+                headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+            )
+
+        return self.conditional_response(
+            self.validators([workout]),
+            build_response,
+            last_modified=workout.updated_at,
+        )
+
+    def create(self, request, *args, **kwargs):
+        """
+        Create one workout, or a batch when the body is a JSON array, with all
+        of their steps in a fixed number of queries.
+        """
+        many = isinstance(request.data, list)
+        serializer = self.get_serializer(data=request.data, many=many)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+
+        # Render through the cache so the response is built from one prefetch
+        # and the new workouts are immediately cached.
+        workouts = serializer.instance if many else [serializer.instance]
+        data = [entry.data for entry in self.get_representations(workouts)]
+        return Response(data if many else data[0], status=status.HTTP_201_CREATED)
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        self.write_through(serializer)
+
+    def write_through(self, serializer):
+        workout = serializer.instance
+        with timed("serialize"):
+            data = serializer.data
+        workout_cache.set_many([workout], [data])
+
+    def get_representations(self, workouts):
+        """
+        Return the cached representation of each of ``workouts`` in order,
+        serializing (and caching) only the ones missing from the cache.
+        """
+        workouts = list(workouts)
+        entries = workout_cache.get_many(workouts)
+        missing = [workout.pk for workout in workouts if workout.pk not in entries]
+        if missing:
+            # Read-only, so the fast row-based path rather than the serializer.
+            fresh = workout_representations(Workout.objects.filter(pk__in=missing))
+            entries.update(
+                workout_cache.set_many(fresh, [entry.data for entry in fresh])
+            )
+        # A workout deleted between the two queries is simply skipped.
+        return [entries[w.pk] for w in workouts if w.pk in entries]
+
+    def get_representation(self, workout):
+        """The representation of one workout, or 404 if it was just deleted."""
+        entries = self.get_representations([workout])
+        if not entries:
+            raise Http404
+        return entries[0]
+
+    def validators(self, workouts, *parts):
+        """
+        The strong ETag of a response showing ``workouts``, from their pks and
+        ``updated_at`` alone (bumped whenever a workout, one of its steps,
+        intervals or durations changes; see ``workouts.signals``), so it is
+        known before anything is serialized. The body is a function of the
+        absolute URL, the media type and those, so it is strong. ``parts`` are
+        whatever else the response depends on, such as page links.
+        """
+        return compute_etag(
+            self.request.build_absolute_uri(),
+            self.request.accepted_media_type,
+            *(f"{workout.pk}:{workout.updated_at.isoformat()}" for workout in workouts),
+            *parts,
+        )
+
+    def conditional_response(self, etag, build_response, last_modified=None):
+        """
+        Answer ``If-None-Match``/``If-Modified-Since`` with a 304 and ``HEAD``
+        with the headers alone, calling ``build_response`` only for a ``GET``
+        that needs the body.
+
+        Lists send no ``Last-Modified``: a workout deleted from them changes
+        the ETag but not the latest ``updated_at``. Clients may store
+        responses but must revalidate them (``no-cache``).
+        """
+        timestamp = None if last_modified is None else int(last_modified.timestamp())
+        response = get_conditional_response(
+            self.request, etag=etag, last_modified=timestamp
+        )
+        if response is None:
+            if self.request.method == "HEAD":
+                response = Response()
+            else:
+                response = build_response()
+        response["ETag"] = etag
+        if timestamp is not None:
+            response["Last-Modified"] = http_date(timestamp)
+        patch_cache_control(response, no_cache=True)
+        return response
+
+    def step_response(self, pk, status_code=status.HTTP_200_OK):
+        workout = get_object_or_404(self.get_index_queryset(), pk=pk)
+        return Response(self.get_representation(workout).data, status=status_code)
+
+    @action(detail=True, methods=["post"], url_path="steps")
+    def insert_step(self, request, pk=None):
+        """
+        Insert a step after the step of interval ``after`` (first when null,
+        last when omitted). Responds with the updated workout.
+        """
+        workout = get_object_or_404(Workout.objects.only("pk"), pk=pk)
+        serializer = StepInsertSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        step = dict(serializer.validated_data)
+        after = step.pop("after", LAST)
+
+        @retry_stale_durations
+        def insert():
+            with transaction.atomic():
+                [interval] = bulk_create_steps([step])
+                insert_step(workout.pk, interval, after)
+
+        try:
+            insert()
+        except StepNotFound as e:
+            raise ValidationError({"after": str(e)})
+        return self.step_response(workout.pk, status.HTTP_201_CREATED)
+
+    @action(
+        detail=True,
+        methods=["patch", "delete"],
+        url_path=r"steps/(?P<interval_pk>\d+)",
+    )
+    def step(self, request, pk=None, interval_pk=None):
+        """
+        ``PATCH`` moves the step of an interval right after the step ``after``
+        (first when null); ``DELETE`` removes it. Both respond with the
+        updated workout.
+        """
+        workout = get_object_or_404(Workout.objects.only("pk"), pk=pk)
+        try:
+            if request.method == "DELETE":
+                delete_step(workout.pk, int(interval_pk))
+            else:
+                serializer = StepPlacementSerializer(data=request.data)
+                serializer.is_valid(raise_exception=True)
+                after = serializer.validated_data["after"]
+                move_step(workout.pk, int(interval_pk), after)
+        except StepNotFound as e:
+            if e.interval_id == int(interval_pk):
+                raise NotFound(str(e))
+            raise ValidationError({"after": str(e)})
+        return self.step_response(workout.pk)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="cache-stats",
+        permission_classes=[permissions.IsAdminUser],
+    )
+    def cache_stats(self, request):
+        return Response(workout_cache.stats())
+
+    def stream_list(self, queryset):
+        """
+        Stream the whole collection as a JSON array, one chunk at a time.
+
+        Rows come from a server-side cursor, in the ``?ordering=`` (by default
+        ``created_at``) then ``id`` order, and each chunk's steps are loaded
+        with one query, so memory stays flat and the first byte is sent after
+        the first chunk rather than after the whole table has been serialized.
+        """
+        ordering = [*queryset.query.order_by] or ["created_at"]
+        rows = (
+            queryset.order_by(*with_tiebreak(ordering))
+            .values_list(*WORKOUT_COLUMNS)
+            .iterator(chunk_size=self.stream_chunk_size)
+        )
+
+        def generate():
+            yield "["
+            separator = ""
+            while chunk := list(islice(rows, self.stream_chunk_size)):
+                data = [entry.data for entry in represent_rows(chunk)]
+                body = json.dumps(data, cls=JSONEncoder, separators=(",", ":"))
+                yield separator + body[1:-1]
+                separator = ","
+            yield "]"
+
+        return StreamingHttpResponse(generate(), content_type="application/json")